@@ -10,9 +10,6 @@ License: see LICENSE file at the root of this repository.
 Author: DavidRodriguezSoaresCUI
 '''
 
-from DRSlib.debug import debug_var
-
-
 YDL_FORMAT = {
     "naming_channel": lambda _info: f"./{_info['channel']}/%(upload_date>%Y-%m-%d)s - %(title)s.%(ext)s",
     "naming_channel_audio": lambda _info: f"./Audio/{_info['channel']}/%(upload_date>%Y-%m-%d)s - %(title)s.%(ext)s",
@@ -22,6 +19,12 @@ YDL_FORMAT = {
     "format_audio_only": "bestaudio[ext=m4a]/bestaudio"
 }
 
+# Container for audio copied out of a downloaded video, by video extension (see ``extract_audio_tracks``)
+AUDIO_COPY_EXT = {
+    '.mp4': '.m4a',
+    '.webm': '.webm'
+}
+
 DEFAULT_PLAYLIST_TEXT = '''# Playlist file
 # Fill this file with the URL of Youtube playlists/channels you want to AutoYoutubeDL to download for you !
 # Remplissez ce fichier d'adresses URL de playlist/chaîne Youtube et AutoYoutubeDL téléchargera son contenu pour vous !
@@ -41,72 +44,149 @@ DEFAULT_PLAYLIST_TEXT = '''# Playlist file
 # To only download audio, use tag "[audio only]" instead. Example:
 # Pour ne télécharger que la version audio, utilisez plutôt "[audio only]". Exemple:
 # https://www.youtube.com/playlist?list=PL_x-m9VghzVdmwfpgIBvd_LgR8Bk9nOLD [audio only]
+#
+# To use a download profile set up by the administrator, add [profile=<name>] after the URL. Example:
+# Pour utiliser un profil de téléchargement défini par l'administrateur, ajoutez [profile=<nom>] après l'URL. Exemple:
+# https://www.youtube.com/playlist?list=PL_x-m9VghzVdmwfpgIBvd_LgR8Bk9nOLD [profile=fast] [audio]
 # 
 '''
 
 ############################## imports section ##############################
 
-if __name__=='__main__':
-
-    import argparse
-    import configparser
-    import datetime
-    # import importlib
-    import subprocess
-    import json
-    import logging
-    import re
-    import sys
-    import urllib.request
-    from collections import defaultdict
-    from pathlib import Path
-    from pprint import pformat
-    from typing import NoReturn, Tuple, List, Iterable, Callable, Any
-    
-    # from pprint import pprint
-
-    try:
-        import yt_dlp
-        from yt_dlp import YoutubeDL
-        from yt_dlp.version import __version__ as YTDLP_VERSION
-        from yt_dlp.utils import DateRange
-    except ModuleNotFoundError:
-        print("Couldn't load yt-dlp: Please run `pip install -r requirements.txt`")
-        raise
-    try:
-        # from DRSlib.execute   import execute
-        from DRSlib.banner    import bannerize
-        from DRSlib.debug     import call_progress
-        from DRSlib.spinner   import MySpinner
-        from DRSlib.utils     import LOG_FORMAT
-    except ModuleNotFoundError:
-        print("Couldn't load libraries from DRSlib: Check https://github.com/DavidRodriguezSoaresCUI/DRSlib for installation instructions or run `pip install -r requirements.txt`.")
-        raise
-
-    SCRIPT_DIR = Path( __file__ ).resolve().parent
-    LOCK = SCRIPT_DIR / 'AutoYoutubeDL.lock'
-
-    # Logging setup
-    LOG_LEVEL = logging.DEBUG
-    logging.basicConfig( 
-        level=LOG_LEVEL,
-        format=LOG_FORMAT,
-        filename=(SCRIPT_DIR / 'AutoYoutubeDL.log').as_posix(),
-        filemode='w'
-    )
-    LOG = logging.getLogger( __name__ )
-
-    # Log warning/errors to file
-    important_h = logging.FileHandler(
-        filename=(SCRIPT_DIR / 'WARNING.log').as_posix(),
-        mode='a',
-        encoding='utf8'
-    )
-    important_h.setLevel(logging.WARNING)
-    # important_h.setFormatter(logging.Formatter(LOG_FORMAT))
-    LOG.addHandler(important_h)
+import argparse
+import atexit
+# asyncio and urllib.request are imported where needed: they are slow to import, and most runs don't need them
+import bisect
+import configparser
+import contextlib
+import datetime
+import functools
+import hashlib
+import itertools
+# import importlib
+import subprocess
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import shlex
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+import weakref
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from pathlib import Path
+from pprint import pformat
+from typing import TYPE_CHECKING, NoReturn, Tuple, List, Iterable, Iterator, Callable, Any, Dict, Optional
+from urllib.parse import urlparse
+try:
+    import fcntl
+except ModuleNotFoundError:
+    fcntl = None # Windows
+    import msvcrt
+if TYPE_CHECKING:
+    import asyncio # for annotations only
+
+# from pprint import pprint
+
+# yt-dlp is slow to import: it is only loaded once needed (see `import_yt_dlp`)
+try:
+    # from DRSlib.execute   import execute
+    from DRSlib.banner    import bannerize
+    from DRSlib.debug     import call_progress
+    from DRSlib.spinner   import MySpinner
+    from DRSlib.utils     import LOG_FORMAT
+except ModuleNotFoundError:
+    print("Couldn't load libraries from DRSlib: Check https://github.com/DavidRodriguezSoaresCUI/DRSlib for installation instructions or run `pip install -r requirements.txt`.")
+    raise
+
+SCRIPT_DIR = Path( __file__ ).resolve().parent
+LOCK = SCRIPT_DIR / 'AutoYoutubeDL.lock'
+
+# Logging setup: logging threads only queue records, which are written to files by a background
+# thread (`log_listener`), so that slow disks don't hold up downloads. Records are buffered until we
+# know whether this run has something to do, so that runs with nothing to do don't rotate the log
+# of the last run that had (see `open_log_file`)
+LOG_LEVEL = logging.DEBUG
+LOG_FILE = SCRIPT_DIR / 'AutoYoutubeDL.log'
+startup_log_h = logging.handlers.MemoryHandler( capacity=100000, flushLevel=logging.CRITICAL+1 )
+
+# Log warning/errors to file (rotated, see `configure_logging`)
+important_h = logging.handlers.RotatingFileHandler(
+    filename=(SCRIPT_DIR / 'WARNING.log').as_posix(),
+    mode='a',
+    encoding='utf8',
+    delay=True
+)
+important_h.setLevel(logging.WARNING)
+# important_h.setFormatter(logging.Formatter(LOG_FORMAT))
+
+log_queue_h = logging.handlers.QueueHandler( queue.SimpleQueue() )
+log_queue_h.setFormatter( logging.Formatter('%(message)s') ) # queued records only hold the message
+log_listener = logging.handlers.QueueListener( log_queue_h.queue, startup_log_h, important_h, respect_handler_level=True )
+log_listener.start()
+logging.basicConfig( 
+    level=LOG_LEVEL,
+    handlers=[log_queue_h]
+)
+LOG = logging.getLogger( __name__ )
 
 PROGRESS_TO_FILE = False
+
+DEFAULT_SETTINGS = {
+    'workers': 1,
+    'worker_type': 'thread',
+    'max_per_host': 2,
+    'probe_workers': 1,
+    'prefetch': 2,
+    'batch_size': 1,
+    'batch_max_items': 5,
+    'probe_size': 30,
+    'len_max_age': 7,
+    'cache_ttl_hot': 3000,
+    'cache_ttl_dormant': 86400,
+    'cache_dormant_after': 14,
+    'cache_max_entries': 2000,
+    'remux_workers': 0,
+    'remux_timeout': 3600,
+    'audio_single_pass': True,
+    'metrics_textfile': '',
+    'daemon_poll_interval': 60,
+    'adaptive_polling': True,
+    'max_staleness': 86400,
+    'max_requests_per_second': 0.0,
+    'max_bandwidth': '0',
+    'bandwidth_schedule': '',
+    'dedup_mode': 'off',
+    'min_free_space': '1G',
+    'user_quota': '0',
+    'quota_rescan_interval': 7,
+    'progress_interval': 0.5,
+    'progress_format': 'line',
+    'log_level': 'debug',
+    'log_max_size': 5.0,
+    'log_max_age': 7.0,
+    'log_backup_count': 5,
+    'job_queue': '',
+    'lease_duration': 300,
+    'default_profile': '',
+    'profiles': {}
+}
+SETTINGS = dict(DEFAULT_SETTINGS)
+
+# Options of a tuning profile: section [Profile:<name>] of AutoYoutubeDL.ini (see `profile_ydl_opts`)
+DEFAULT_PROFILE = {
+    'concurrent_fragment_downloads': 1,
+    'http_chunk_size': '0',
+    'buffersize': '0',
+    'external_downloader': '',
+    'external_downloader_args': '-x 8 -s 8 -k 1M'
+}
     
 
 ############################## Common functions section ##############################
@@ -115,6 +195,9 @@ def parse_args() -> argparse.Namespace:
     ''' Get cli args '''
     parser = argparse.ArgumentParser()
     parser.add_argument('--log_progress', action='store_true', help="Intended for monitoring progress without tty")
+    parser.add_argument('--daemon', action='store_true', help="Keep running, checking each playlist/channel when it is due")
+    parser.add_argument('--runner', action='store_true', help="Share jobs with other runners through a job queue (see job_queue setting)")
+    parser.add_argument('--count_usage', action='store_true', help="Count the size of files of surveiled paths with a quota again (see quota_rescan_interval setting)")
     
     return parser.parse_args()
 
@@ -123,6 +206,7 @@ def parse_args() -> argparse.Namespace:
 def internet_available(host: str = 'http://google.com') -> bool:
     ''' from https://www.codespeedy.com/how-to-check-the-internet-connection-in-python/
     '''
+    import urllib.request
     try:
         urllib.request.urlopen(host)
         return True
@@ -143,6 +227,163 @@ def internet_available(host: str = 'http://google.com') -> bool:
 #     globals()['YTDLP_VERSION'] = _yt_dlp.version.__version__
 
 
+def import_yt_dlp() -> None:
+    ''' Imports yt-dlp (as globals), unless already imported. It takes seconds on low-power CPUs,
+    so it is only imported once we know there is something to do (see ``work_is_due``).
+    '''
+    global yt_dlp, YoutubeDL, YTDLP_VERSION, format_bytes
+    if 'yt_dlp' in globals():
+        return
+    try:
+        import yt_dlp
+        from yt_dlp import YoutubeDL
+        from yt_dlp.version import __version__ as YTDLP_VERSION
+        from yt_dlp.utils import format_bytes
+    except ModuleNotFoundError:
+        print("Couldn't load yt-dlp: Please run `pip install -r requirements.txt`")
+        raise
+    LOG.debug("Imported yt-dlp %s", YTDLP_VERSION)
+
+
+class RotatingLogHandler(logging.handlers.RotatingFileHandler):
+    ''' Log file handler rotating the file (keeping ``log_backup_count`` rotated files) when it
+    would exceed ``log_max_size`` MiB, and at the end of each period of ``log_max_age`` days.
+    Periods are counted from the epoch, so that a file only holds records of one period, however
+    long the process lives and however often it is started.
+    '''
+
+    def __init__( self, filename: Path ) -> None:
+        super().__init__( filename.as_posix(), mode='a', encoding='utf8', delay=True )
+        self.setFormatter( logging.Formatter(LOG_FORMAT) )
+        self.configure( SETTINGS )
+        if self.max_age and os.path.isfile( self.baseFilename ) and os.path.getmtime( self.baseFilename ) < self.period_end - self.max_age:
+            self.doRollover() # left by a run of a previous period
+
+    def configure( self, settings: dict ) -> None:
+        ''' Applies rotation settings '''
+        self.maxBytes = int( settings['log_max_size'] * 2**20 )
+        self.backupCount = settings['log_backup_count']
+        self.max_age = settings['log_max_age'] * 86400
+        self.period_end = self._period_end( time.time() )
+
+    def _period_end( self, t: float ) -> float:
+        return ( t // self.max_age + 1 ) * self.max_age if self.max_age else float('inf')
+
+    def shouldRollover( self, record: logging.LogRecord ) -> bool:
+        return record.created >= self.period_end or super().shouldRollover( record )
+
+    def doRollover( self ) -> None:
+        super().doRollover()
+        self.period_end = self._period_end( time.time() )
+
+
+class UserLogHandler(logging.Handler):
+    ''' Writes records logged on behalf of a surveiled path (see ``log_context``) to the
+    ``AutoYoutubeDL.log`` file of that path, rotated like the main log file '''
+
+    def __init__( self ) -> None:
+        super().__init__()
+        self.handlers: Dict[str,Optional[RotatingLogHandler]] = {}
+
+    def emit( self, record: logging.LogRecord ) -> None:
+        user = getattr( record, 'user', None )
+        if user is None:
+            return
+        if user not in self.handlers:
+            log_file = Path(user) / 'AutoYoutubeDL.log'
+            # a surveiled path may be the script directory, whose log file is the main one
+            self.handlers[user] = None if log_file==LOG_FILE else RotatingLogHandler( log_file )
+        if self.handlers[user] is not None:
+            self.handlers[user].handle( record )
+
+    def configure( self, settings: dict ) -> None:
+        ''' Applies rotation settings '''
+        for handler in self.handlers.values():
+            if handler is not None:
+                handler.configure( settings )
+
+    def close( self ) -> None:
+        for handler in self.handlers.values():
+            if handler is not None:
+                handler.close()
+        super().close()
+
+
+# Surveiled path the current thread works for (see `log_context`)
+LOG_CONTEXT = threading.local()
+
+
+@contextlib.contextmanager
+def log_context( user: Path ) -> Iterator[None]:
+    ''' Records logged meanwhile by this thread are also written to the log file of ``user``
+    (surveiled path, see ``UserLogHandler``) '''
+    previous = getattr( LOG_CONTEXT, 'user', None )
+    LOG_CONTEXT.user = user.as_posix()
+    try:
+        yield
+    finally:
+        LOG_CONTEXT.user = previous
+
+
+def stamp_log_context( record: logging.LogRecord ) -> bool:
+    ''' Log filter: tags records with the surveiled path of the logging thread (see ``log_context``),
+    as they are written by another thread '''
+    record.user = getattr( LOG_CONTEXT, 'user', None )
+    return True
+
+
+def run_as_user( user: Path, func: Callable[[Any],Any], arg: Any ) -> Any:
+    ''' Returns ``func(arg)``, run in ``log_context(user)`` '''
+    with log_context( user ):
+        return func( arg )
+
+
+def open_log_file( new_run: bool ) -> None:
+    ''' Replaces the startup log buffer with log files (main, per surveiled path and WARNING.log),
+    then writes buffered records to the main log file. The previous log file is rotated if
+    ``new_run`` (runs with something to do), appended to otherwise.
+    Does nothing if log files were already opened.
+    '''
+    if startup_log_h not in log_listener.handlers:
+        return
+    file_h = RotatingLogHandler( LOG_FILE )
+    if new_run and LOG_FILE.is_file() and LOG_FILE.stat().st_size > 0:
+        file_h.doRollover()
+    log_listener.stop() # writes records queued so far
+    log_listener.handlers = ( file_h, UserLogHandler(), important_h )
+    startup_log_h.setTarget( file_h )
+    startup_log_h.close() # flushes buffered records
+    log_queue_h.addFilter( stamp_log_context )
+    configure_logging( SETTINGS )
+    log_listener.start()
+    atexit.register( log_listener.stop ) # writes records left in the queue on exit
+
+
+def configure_logging( settings: dict ) -> None:
+    ''' Applies log settings: level, and rotation of log files '''
+    logging.getLogger().setLevel( settings['log_level'].upper() )
+    for handler in log_listener.handlers:
+        if isinstance( handler, (RotatingLogHandler, UserLogHandler) ):
+            handler.configure( settings )
+    important_h.maxBytes = int( settings['log_max_size'] * 2**20 )
+    important_h.backupCount = settings['log_backup_count']
+
+
+def share_log_queue() -> None:
+    ''' Switches the log queue to a multiprocessing queue, so that records of worker processes
+    started afterwards are written by the log listener of this process '''
+    import multiprocessing
+    if not isinstance( log_queue_h.queue, queue.SimpleQueue ):
+        return
+    old_queue = log_queue_h.queue
+    log_queue_h.queue = multiprocessing.Queue()
+    log_listener.stop() # writes records left in the old queue
+    log_listener.queue = log_queue_h.queue
+    log_listener.start()
+    while not old_queue.empty():
+        log_listener.handle( old_queue.get_nowait() )
+
+
 def make_default_config_file( destination_file: Path ) -> NoReturn:
     ''' Writes a default config file at given path '''
     assert not destination_file.exists()
@@ -152,6 +393,87 @@ def make_default_config_file( destination_file: Path ) -> NoReturn:
     cfg.add_section(ss)
     cfg.set( ss, 'surveiled_path_help', "Lists paths to scan for AutoYoutubeDL.ini file." )  
     cfg.set( ss, 'surveiled_path', json.dumps(["/example/path"]) )
+    cfg.set( ss, 'workers_help', "Number of playlists processed concurrently (1 means sequential)." )
+    cfg.set( ss, 'workers', str(DEFAULT_SETTINGS['workers']) )
+    cfg.set( ss, 'worker_type_help', "Type of worker pool: 'thread' or 'process'." )
+    cfg.set( ss, 'worker_type', DEFAULT_SETTINGS['worker_type'] )
+    cfg.set( ss, 'max_per_host_help', "Maximum number of playlists processed concurrently for a given host (eg: www.youtube.com)." )
+    cfg.set( ss, 'max_per_host', str(DEFAULT_SETTINGS['max_per_host']) )
+    cfg.set( ss, 'probe_workers_help', "Number of playlists/channels checked for new content concurrently, while others are downloading." )
+    cfg.set( ss, 'probe_workers', str(DEFAULT_SETTINGS['probe_workers']) )
+    cfg.set( ss, 'prefetch_help', "Maximum number of checked playlists/channels waiting for a download worker." )
+    cfg.set( ss, 'prefetch', str(DEFAULT_SETTINGS['prefetch']) )
+    cfg.set( ss, 'batch_size_help', "Maximum number of small playlists of a user downloaded by a single YoutubeDL invocation (1 means no batching)." )
+    cfg.set( ss, 'batch_size', str(DEFAULT_SETTINGS['batch_size']) )
+    cfg.set( ss, 'batch_max_items_help', "With batch_size: playlists with at most this many items left to download are considered small." )
+    cfg.set( ss, 'batch_max_items', str(DEFAULT_SETTINGS['batch_max_items']) )
+    cfg.set( ss, 'probe_size_help', "Number of latest channel videos looked at when checking a channel for new videos." )
+    cfg.set( ss, 'probe_size', str(DEFAULT_SETTINGS['probe_size']) )
+    cfg.set( ss, 'len_max_age_help', "Number of days after which the number of videos in a channel is counted again." )
+    cfg.set( ss, 'len_max_age', str(DEFAULT_SETTINGS['len_max_age']) )
+    cfg.set( ss, 'cache_ttl_help', "Seconds during which playlist/channel infos are reused instead of checking for new content; 'hot' for recently updated ones, 'dormant' for the others." )
+    cfg.set( ss, 'cache_ttl_hot', str(DEFAULT_SETTINGS['cache_ttl_hot']) )
+    cfg.set( ss, 'cache_ttl_dormant', str(DEFAULT_SETTINGS['cache_ttl_dormant']) )
+    cfg.set( ss, 'cache_dormant_after_help', "Number of days without new content after which a playlist/channel is considered dormant." )
+    cfg.set( ss, 'cache_dormant_after', str(DEFAULT_SETTINGS['cache_dormant_after']) )
+    cfg.set( ss, 'cache_max_entries_help', "Maximum number of playlists/channels kept in each user's cache." )
+    cfg.set( ss, 'cache_max_entries', str(DEFAULT_SETTINGS['cache_max_entries']) )
+    cfg.set( ss, 'remux_workers_help', "Number of FFmpeg processes muxing leftover video/audio files concurrently (0 means number of CPU cores)." )
+    cfg.set( ss, 'remux_workers', str(DEFAULT_SETTINGS['remux_workers']) )
+    cfg.set( ss, 'remux_timeout_help', "Seconds after which a muxing FFmpeg process is stopped (0 means no limit)." )
+    cfg.set( ss, 'remux_timeout', str(DEFAULT_SETTINGS['remux_timeout']) )
+    cfg.set( ss, 'audio_single_pass_help', "For [audio] playlists: copy the audio from downloaded videos instead of downloading it a second time." )
+    cfg.set( ss, 'audio_single_pass', str(DEFAULT_SETTINGS['audio_single_pass']) )
+    cfg.set( ss, 'metrics_textfile_help', "Path of the Prometheus metrics file written at the end of each run (for node_exporter's textfile collector); defaults to AutoYoutubeDL.prom next to this script." )
+    cfg.set( ss, 'metrics_textfile', DEFAULT_SETTINGS['metrics_textfile'] )
+    cfg.set( ss, 'daemon_poll_interval_help', "With --daemon: seconds between checks for edited config/playlist files; also the minimum delay between two runs." )
+    cfg.set( ss, 'daemon_poll_interval', str(DEFAULT_SETTINGS['daemon_poll_interval']) )
+    cfg.set( ss, 'adaptive_polling_help', "Check playlists/channels according to how often they get new content, instead of after a fixed delay (see cache_ttl)." )
+    cfg.set( ss, 'adaptive_polling', str(DEFAULT_SETTINGS['adaptive_polling']) )
+    cfg.set( ss, 'max_staleness_help', "With adaptive_polling: maximum number of seconds between two checks of a playlist/channel." )
+    cfg.set( ss, 'max_staleness', str(DEFAULT_SETTINGS['max_staleness']) )
+    cfg.set( ss, 'max_requests_per_second_help', "Maximum number of HTTP requests per second, for all downloads (0 means unlimited). Requests are paused anyway when the website signals too many requests (HTTP 429)." )
+    cfg.set( ss, 'max_requests_per_second', str(DEFAULT_SETTINGS['max_requests_per_second']) )
+    cfg.set( ss, 'max_bandwidth_help', "Maximum download speed in bytes per second, for all downloads; suffixes K, M, .. are accepted, eg: 2M (0 means unlimited)." )
+    cfg.set( ss, 'max_bandwidth', DEFAULT_SETTINGS['max_bandwidth'] )
+    cfg.set( ss, 'bandwidth_schedule_help', 'Overrides max_bandwidth depending on time of day, eg: {"08:00-23:00": "2M", "23:00-08:00": 0} for unlimited speed at night and 2MiB/s during the day.' )
+    cfg.set( ss, 'bandwidth_schedule', DEFAULT_SETTINGS['bandwidth_schedule'] )
+    cfg.set( ss, 'dedup_mode_help', "Videos already downloaded for another surveiled path on the same volume are linked instead of downloaded again: 'hardlink', 'reflink' (copy-on-write clone, on btrfs/xfs; falls back to hardlink) or 'off'." )
+    cfg.set( ss, 'dedup_mode', DEFAULT_SETTINGS['dedup_mode'] )
+    cfg.set( ss, 'min_free_space_help', "Disk space kept free on the volume of each surveiled path (eg: for muxing); videos that would use it are deferred to the next run. Suffixes K, M, G, .. are accepted." )
+    cfg.set( ss, 'min_free_space', DEFAULT_SETTINGS['min_free_space'] )
+    cfg.set( ss, 'user_quota_help', 'Maximum size of the files of each surveiled path (0 means unlimited), or per surveiled path, eg: {"C:/Users/Alice/Videos": "500G"}; videos that would exceed it are deferred to the next run.' )
+    cfg.set( ss, 'user_quota', DEFAULT_SETTINGS['user_quota'] )
+    cfg.set( ss, 'quota_rescan_interval_help', "Days between full counts of the size of the files of surveiled paths with a quota; in between, the size of downloaded files is added to the last count." )
+    cfg.set( ss, 'quota_rescan_interval', str(DEFAULT_SETTINGS['quota_rescan_interval']) )
+    cfg.set( ss, 'progress_interval_help', "Minimum number of seconds between two refreshes of download progress." )
+    cfg.set( ss, 'progress_interval', str(DEFAULT_SETTINGS['progress_interval']) )
+    cfg.set( ss, 'progress_format_help', "How download progress is shown: 'line' (one status line for all downloads) or 'json' (a JSON object per line on stdout, for headless runs)." )
+    cfg.set( ss, 'progress_format', DEFAULT_SETTINGS['progress_format'] )
+    cfg.set( ss, 'log_level_help', "Minimum level of logged messages: 'debug', 'info' or 'warning'." )
+    cfg.set( ss, 'log_level', DEFAULT_SETTINGS['log_level'] )
+    cfg.set( ss, 'log_rotation_help', "Log files are rotated when they would exceed log_max_size MiB, and every log_max_age days (0 means never); log_backup_count rotated files are kept." )
+    cfg.set( ss, 'log_max_size', str(DEFAULT_SETTINGS['log_max_size']) )
+    cfg.set( ss, 'log_max_age', str(DEFAULT_SETTINGS['log_max_age']) )
+    cfg.set( ss, 'log_backup_count', str(DEFAULT_SETTINGS['log_backup_count']) )
+    cfg.set( ss, 'job_queue_help', "With --runner: path of the job queue shared by runners, on a volume they all mount; defaults to AutoYoutubeDL.queue.sqlite next to this script." )
+    cfg.set( ss, 'job_queue', DEFAULT_SETTINGS['job_queue'] )
+    cfg.set( ss, 'lease_duration_help', "With --runner: seconds after which jobs of a runner that stopped responding are handed out to other runners." )
+    cfg.set( ss, 'lease_duration', str(DEFAULT_SETTINGS['lease_duration']) )
+    cfg.set( ss, 'default_profile_help', "Tuning profile used by playlists/channels without a [profile=<name>] tag; profiles are defined by [Profile:<name>] sections, like the one below (empty means yt-dlp defaults)." )
+    cfg.set( ss, 'default_profile', DEFAULT_SETTINGS['default_profile'] )
+    ps = 'Profile:fast'
+    cfg.add_section(ps)
+    cfg.set( ps, 'concurrent_fragment_downloads_help', "Number of fragments of a DASH/HLS video downloaded concurrently." )
+    cfg.set( ps, 'concurrent_fragment_downloads', '4' )
+    cfg.set( ps, 'http_chunk_size_help', "Videos are downloaded by chunks of this size, eg: 10M (0 means in one request); may avoid throttling of long downloads." )
+    cfg.set( ps, 'http_chunk_size', '10M' )
+    cfg.set( ps, 'buffersize_help', "Fixed download buffer size, eg: 64K (0 means adapted to download speed)." )
+    cfg.set( ps, 'buffersize', DEFAULT_PROFILE['buffersize'] )
+    cfg.set( ps, 'external_downloader_help', "Set to 'aria2c' to download with aria2c (if installed), over several connections per video." )
+    cfg.set( ps, 'external_downloader', DEFAULT_PROFILE['external_downloader'] )
+    cfg.set( ps, 'external_downloader_args_help', "Command line arguments passed to external_downloader, eg: -x 8 -s 8 -k 1M for 8 connections." )
+    cfg.set( ps, 'external_downloader_args', DEFAULT_PROFILE['external_downloader_args'] )
     with destination_file.open('w',encoding='utf8') as f:
         cfg.write(f)
     print(f"Please fill configuration file {destination_file} before running AutoYoutubeDL again!")
@@ -175,18 +497,64 @@ def load_config( _dir: Path = SCRIPT_DIR ) -> dict:
         Path(p_s).resolve()
         for p_s in json.loads(cfg.get(ss,'surveiled_path'))
     ]
+    res['workers'] = max( 1, cfg.getint(ss, 'workers', fallback=DEFAULT_SETTINGS['workers']) )
+    res['worker_type'] = cfg.get(ss, 'worker_type', fallback=DEFAULT_SETTINGS['worker_type']).strip().lower()
+    assert res['worker_type'] in ('thread','process'), f"Invalid worker_type '{res['worker_type']}' in {cfg_p}!"
+    res['max_per_host'] = max( 1, cfg.getint(ss, 'max_per_host', fallback=DEFAULT_SETTINGS['max_per_host']) )
+    res['probe_workers'] = max( 1, cfg.getint(ss, 'probe_workers', fallback=DEFAULT_SETTINGS['probe_workers']) )
+    res['prefetch'] = max( 0, cfg.getint(ss, 'prefetch', fallback=DEFAULT_SETTINGS['prefetch']) )
+    res['batch_size'] = max( 1, cfg.getint(ss, 'batch_size', fallback=DEFAULT_SETTINGS['batch_size']) )
+    res['batch_max_items'] = max( 0, cfg.getint(ss, 'batch_max_items', fallback=DEFAULT_SETTINGS['batch_max_items']) )
+    res['probe_size'] = max( 1, cfg.getint(ss, 'probe_size', fallback=DEFAULT_SETTINGS['probe_size']) )
+    res['len_max_age'] = cfg.getint(ss, 'len_max_age', fallback=DEFAULT_SETTINGS['len_max_age'])
+    for k in ('cache_ttl_hot', 'cache_ttl_dormant', 'cache_dormant_after', 'cache_max_entries', 'remux_workers', 'remux_timeout', 'daemon_poll_interval', 'max_staleness', 'quota_rescan_interval'):
+        res[k] = cfg.getint(ss, k, fallback=DEFAULT_SETTINGS[k])
+    for k in ('audio_single_pass', 'adaptive_polling'):
+        res[k] = cfg.getboolean(ss, k, fallback=DEFAULT_SETTINGS[k])
+    res['max_requests_per_second'] = max( 0.0, cfg.getfloat(ss, 'max_requests_per_second', fallback=DEFAULT_SETTINGS['max_requests_per_second']) )
+    for k in ('metrics_textfile', 'max_bandwidth', 'bandwidth_schedule', 'min_free_space', 'user_quota', 'job_queue'):
+        res[k] = cfg.get(ss, k, fallback=DEFAULT_SETTINGS[k]).strip()
+    res['dedup_mode'] = cfg.get(ss, 'dedup_mode', fallback=DEFAULT_SETTINGS['dedup_mode']).strip().lower()
+    assert res['dedup_mode'] in ('off','hardlink','reflink'), f"Invalid dedup_mode '{res['dedup_mode']}' in {cfg_p}!"
+    res['progress_interval'] = max( 0.0, cfg.getfloat(ss, 'progress_interval', fallback=DEFAULT_SETTINGS['progress_interval']) )
+    res['progress_format'] = cfg.get(ss, 'progress_format', fallback=DEFAULT_SETTINGS['progress_format']).strip().lower()
+    assert res['progress_format'] in ('line','json'), f"Invalid progress_format '{res['progress_format']}' in {cfg_p}!"
+    res['log_level'] = cfg.get(ss, 'log_level', fallback=DEFAULT_SETTINGS['log_level']).strip().lower()
+    assert res['log_level'] in ('debug','info','warning'), f"Invalid log_level '{res['log_level']}' in {cfg_p}!"
+    for k in ('log_max_size', 'log_max_age'):
+        res[k] = max( 0.0, cfg.getfloat(ss, k, fallback=DEFAULT_SETTINGS[k]) )
+    res['log_backup_count'] = max( 1, cfg.getint(ss, 'log_backup_count', fallback=DEFAULT_SETTINGS['log_backup_count']) )
+    res['lease_duration'] = max( 10, cfg.getint(ss, 'lease_duration', fallback=DEFAULT_SETTINGS['lease_duration']) )
+    res['profiles'] = {
+        section.partition(':')[2].strip(): load_profile( cfg, section )
+        for section in cfg.sections()
+        if section.lower().startswith('profile:')
+    }
+    res['default_profile'] = cfg.get(ss, 'default_profile', fallback=DEFAULT_SETTINGS['default_profile']).strip()
+    assert not res['default_profile'] or res['default_profile'] in res['profiles'], f"Unknown default_profile '{res['default_profile']}' in {cfg_p}!"
 
     return res
 
 
+def load_profile( cfg: configparser.ConfigParser, section: str ) -> dict:
+    ''' Reads tuning profile from given section of config; options default to ``DEFAULT_PROFILE`` '''
+    res = { k: cfg.get(section, k, fallback=v).strip() for k, v in DEFAULT_PROFILE.items() if isinstance(v, str) }
+    res['concurrent_fragment_downloads'] = max( 1, cfg.getint(section, 'concurrent_fragment_downloads', fallback=DEFAULT_PROFILE['concurrent_fragment_downloads']) )
+    res['external_downloader'] = res['external_downloader'].lower()
+    assert res['external_downloader'] in ('', 'aria2c'), f"Invalid external_downloader '{res['external_downloader']}' in section [{section}]!"
+    if res['external_downloader'] and shutil.which(res['external_downloader']) is None:
+        LOG.warning("%s isn't installed: profile of section [%s] uses yt-dlp's downloader instead", res['external_downloader'], section)
+    return res
+
+
 def make_default_playlist_file( file_p: Path ) -> None:
     ''' Writes default playlist file '''
     file_p.write_text(DEFAULT_PLAYLIST_TEXT, encoding='utf8')
 
 
-def surveiled_playlist_files( cfg: dict ) -> Tuple[Path,Path,Path]:
+def surveiled_playlist_files( cfg: dict ) -> Tuple[Path,Path]:
     ''' Makes sure surveiled directories and files exist, then returns 
-    tuple: ( <surveiled_path:Path>, <surveiled_playlist_file:Path>, <surveiled_playlist_db:Path> )
+    tuple: ( <surveiled_path:Path>, <surveiled_playlist_file:Path> )
     '''
     for p in cfg['surveiled_path']:
         # Make sure p exists
@@ -203,18 +571,16 @@ def surveiled_playlist_files( cfg: dict ) -> Tuple[Path,Path,Path]:
             make_default_playlist_file( playlist_file_p )
             continue 
 
-        # Makes sure playlist DB file exists
-        playlist_db_p = p / "AutoYoutubeDL.json"
-        if not playlist_db_p.is_file():
-            playlist_db_p.write_text('{}', encoding='utf8')
+        yield p, playlist_file_p
 
-        yield p, playlist_file_p, playlist_db_p
 
-
-def playlists_from_file( playlist_f: Path ) -> Tuple[str,bool]:
-    ''' Yields ( <playlist_url:str>, <do_extract_audio:bool> ) from playlist file
+def playlists_from_file( playlist_f: Path ) -> Iterator[Tuple[str,Optional[str],Optional[str]]]:
+    ''' Yields ( <playlist_url:str>, <do_extract_audio:str|None>, <profile:str|None> ) from playlist file.
+    Tags may follow the URL, in any order: ``[audio]`` or ``[audio only]`` (``do_extract_audio`` is
+    the tag's letters, eg: ``'audioonly'``) and ``[profile=<name>]`` (tuning profile, see ``tuning_profile``).
     '''
-    _pattern = re.compile(r"(http\S+)(\s\[.+\])?")
+    _pattern = re.compile(r"(http\S+)((?:\s*\[[^\]]+\])*)")
+    _tag_pattern = re.compile(r"\[([^\]]+)\]")
     for line in playlist_f.read_text().splitlines():
         rpos = line.find('#')
         _line = line[:rpos].strip() if rpos!=-1 else line.strip()
@@ -228,20 +594,333 @@ def playlists_from_file( playlist_f: Path ) -> Tuple[str,bool]:
         res = re.match( _pattern, _line )
         if not res:
             LOG.warning("Line '%s' did not match pattern!", _line)
-        yield res.group(1), simplify_str(res.group(2))
+            continue
+        do_extract_audio, profile = None, None
+        for tag in _tag_pattern.findall( res.group(2) ):
+            key, is_option, value = tag.partition('=')
+            if is_option and key.strip().lower()=='profile':
+                profile = value.strip()
+            else:
+                do_extract_audio = simplify_str(tag)
+        yield res.group(1), do_extract_audio, profile
 
 
-def end() -> NoReturn:
+LOCK_FILE = None
+
+
+def acquire_lock( shared: bool = False ) -> bool:
+    ''' Takes an exclusive lock on ``LOCK``, held until the process exits: as the OS releases it
+    even if the process crashes, a leftover lock file can't block later runs.
+    Runners (see ``JobQueue``) take a ``shared`` lock instead: they run alongside each other,
+    but not alongside an instance that isn't a runner. Windows has no shared locks: runners don't lock.
+    Returns False if another instance holds the lock.
+    '''
+    global LOCK_FILE
+    if shared and fcntl is None:
+        return True
+    lock_f = LOCK.open('a+', encoding='utf8')
+    try:
+        if fcntl is not None:
+            fcntl.flock( lock_f.fileno(), ( fcntl.LOCK_SH if shared else fcntl.LOCK_EX ) | fcntl.LOCK_NB )
+        else:
+            lock_f.seek(0)
+            msvcrt.locking( lock_f.fileno(), msvcrt.LK_NBLCK, 1 )
+    except OSError:
+        lock_f.seek(0)
+        LOG.debug("Lock held by process %s", lock_f.read().strip() or '?')
+        lock_f.close()
+        return False
+    # For information only
+    lock_f.seek(0)
+    lock_f.truncate()
+    lock_f.write(f"{os.getpid()}\n")
+    lock_f.flush()
+    LOCK_FILE = lock_f
+    return True
+
+
+def release_lock() -> None:
+    ''' Releases lock taken by ``acquire_lock`` (the lock file itself is kept: deleting
+    it could let two instances lock different files) '''
+    global LOCK_FILE
+    if LOCK_FILE is not None:
+        LOCK_FILE.close()
+        LOCK_FILE = None
+
+
+def export_metrics() -> None:
+    ''' Writes metrics files (see ``Metrics.export``) '''
+    try:
+        METRICS.export(
+            textfile=Path(SETTINGS['metrics_textfile']) if SETTINGS['metrics_textfile'] else SCRIPT_DIR / 'AutoYoutubeDL.prom',
+            summary_file=SCRIPT_DIR / 'AutoYoutubeDL.summary.json'
+        )
+    except OSError as e:
+        LOG.error("Could not export metrics: %s", e)
+
+
+def end( exit_code: int = 0 ) -> NoReturn:
     ''' Ends program '''
-    # Release Lock
-    LOCK.unlink(missing_ok=True)
+    open_log_file( new_run=False )
+    export_metrics()
+    YDL_FACTORY.close()
+    release_lock()
     print("END OF PROGRAM")
-    sys.exit(0)
+    sys.exit(exit_code)
+
+############################## Metrics section ##############################
+
+class Metrics:
+    ''' Thread-safe run metrics: per-phase timers and counters, keyed by labels
+    (typically ``path``: surveiled path and ``playlist``: playlist URL).
+    Exported at the end of the run (see ``end``) as a Prometheus textfile-collector
+    file and a JSON run summary.
+    '''
+
+    PREFIX = 'autoyoutubedl'
+
+    def __init__( self ) -> None:
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self.timers: Dict[tuple,List[float]] = defaultdict(lambda: [0, 0.0]) # (phase, labels) -> [count, seconds]
+        self.counters: Dict[tuple,float] = defaultdict(float) # (name, labels) -> value
+
+    @staticmethod
+    def _key( name: str, labels: dict ) -> tuple:
+        return ( name, tuple(sorted( (k, str(v)) for k, v in labels.items() if v is not None )) )
+
+    @contextlib.contextmanager
+    def timer( self, phase: str, **labels ) -> Iterator[None]:
+        ''' Context manager timing a phase '''
+        t_start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time( phase, time.perf_counter() - t_start, **labels )
+
+    def add_time( self, phase: str, seconds: float, **labels ) -> None:
+        ''' Records a phase that took ``seconds`` '''
+        key = Metrics._key( phase, labels )
+        with self._lock:
+            timer = self.timers[key]
+            timer[0] += 1
+            timer[1] += seconds
+
+    def inc( self, name: str, value: float = 1, **labels ) -> None:
+        ''' Increments counter '''
+        with self._lock:
+            self.counters[Metrics._key( name, labels )] += value
+
+    def drain( self ) -> dict:
+        ''' Returns (picklable) metrics recorded so far, and forgets them.
+        Used to send metrics recorded in a worker process back to the main process. '''
+        with self._lock:
+            snapshot = { 'timers': list(self.timers.items()), 'counters': list(self.counters.items()) }
+            self.timers.clear()
+            self.counters.clear()
+        return snapshot
+
+    def reset( self ) -> None:
+        ''' Forgets metrics recorded so far and restarts run clock (daemon mode: one run = one cycle) '''
+        self.drain()
+        self.started = time.time()
+
+    def merge( self, snapshot: dict ) -> None:
+        ''' Adds metrics from ``drain`` '''
+        with self._lock:
+            for key, (count, seconds) in snapshot['timers']:
+                self.timers[key][0] += count
+                self.timers[key][1] += seconds
+            for key, value in snapshot['counters']:
+                self.counters[key] += value
+
+    def to_prometheus( self ) -> str:
+        ''' Returns metrics in Prometheus text exposition format '''
+        def fmt_labels( labels: tuple, **extra_labels ) -> str:
+            all_labels = sorted( labels + tuple(extra_labels.items()) )
+            if not all_labels:
+                return ''
+            escape = lambda v: v.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+            return '{' + ','.join( f'{k}="{escape(v)}"' for k, v in all_labels ) + '}'
+
+        p = Metrics.PREFIX
+        lines = [
+            f"# HELP {p}_last_run_timestamp_seconds Start time of last run",
+            f"# TYPE {p}_last_run_timestamp_seconds gauge",
+            f"{p}_last_run_timestamp_seconds {self.started:.3f}",
+            f"# HELP {p}_run_duration_seconds Duration of last run",
+            f"# TYPE {p}_run_duration_seconds gauge",
+            f"{p}_run_duration_seconds {time.time() - self.started:.3f}",
+            f"# HELP {p}_phase_seconds_total Time spent per phase",
+            f"# TYPE {p}_phase_seconds_total counter"
+        ]
+        with self._lock:
+            timers = sorted( self.timers.items() )
+            counters = sorted( self.counters.items() )
+        lines.extend( f"{p}_phase_seconds_total{fmt_labels(labels, phase=phase)} {seconds:.6f}" for (phase, labels), (_, seconds) in timers )
+        lines.extend([
+            f"# HELP {p}_phase_runs_total Number of times each phase ran",
+            f"# TYPE {p}_phase_runs_total counter"
+        ])
+        lines.extend( f"{p}_phase_runs_total{fmt_labels(labels, phase=phase)} {count}" for (phase, labels), (count, _) in timers )
+        for name in sorted({ name for (name, _), _ in counters }):
+            lines.extend([ f"# TYPE {p}_{name}_total counter" ])
+            lines.extend( f"{p}_{name}_total{fmt_labels(labels)} {value:g}" for (_name, labels), value in counters if _name==name )
+        return '\n'.join(lines) + '\n'
+
+    def summary( self ) -> dict:
+        ''' Returns run summary: totals per phase, per surveiled path and per counter '''
+        phases = defaultdict(lambda: { 'count': 0, 'seconds': 0.0 })
+        per_path = defaultdict(lambda: defaultdict(float))
+        counters = defaultdict(float)
+        with self._lock:
+            for (phase, labels), (count, seconds) in self.timers.items():
+                phases[phase]['count'] += count
+                phases[phase]['seconds'] += seconds
+                path = dict(labels).get('path')
+                if path is not None:
+                    per_path[path][phase] += seconds
+            for (name, _), value in self.counters.items():
+                counters[name] += value
+        download_seconds = counters.get('download_seconds', 0)
+        return {
+            'started': datetime.datetime.fromtimestamp(self.started).isoformat(timespec='seconds'),
+            'duration_seconds': round( time.time() - self.started, 3 ),
+            'phases': dict(phases),
+            'per_path': { path: dict(phases) for path, phases in per_path.items() },
+            'counters': dict(counters),
+            'average_speed_bytes_per_second': counters.get('downloaded_bytes', 0) / download_seconds if download_seconds else None
+        }
+
+    def export( self, textfile: Path, summary_file: Path ) -> None:
+        ''' Writes Prometheus textfile and JSON summary (atomically, so readers never see partial files) '''
+        for file_p, content in ( (textfile, self.to_prometheus()), (summary_file, json.dumps(self.summary(), indent=2)) ):
+            tmp_p = file_p.with_name( file_p.name + '.tmp' )
+            tmp_p.write_text( content, encoding='utf8' )
+            os.replace( tmp_p, file_p )
+
+
+METRICS = Metrics()
+
+
+def run_job_with_metrics( worker: Callable[[Any],Any], job: Any ) -> Tuple[Any,dict]:
+    ''' For worker processes: runs ``worker(job)``, then returns ( <result>, <metrics recorded meanwhile> ) '''
+    result = worker(job)
+    return result, METRICS.drain()
+
 
 ############################## Playlist downloader section ##############################
 
+class DownloadProgress:
+    ''' State of a download (or FFmpeg job) shown by ``ProgressBoard``; progress hooks only set its fields '''
+    __slots__ = ( 'name', 'category', 'downloaded', 'total', 'speed', 'eta', 'percent' )
+
+    def __init__( self, name: str, category: str ) -> None:
+        self.name = name
+        self.category = category
+        self.downloaded = None # bytes
+        self.total = None # bytes
+        self.speed = None # bytes per second, or FFmpeg speed (eg: '2.5x')
+        self.eta = None # seconds
+        self.percent = None # if not computed from downloaded/total
+
+    def get_percent( self ) -> Optional[float]:
+        ''' Progress in percent, if known '''
+        if self.percent is not None:
+            return self.percent
+        return 100 * self.downloaded / self.total if self.downloaded is not None and self.total else None
+
+    def as_dict( self ) -> dict:
+        ''' For JSON progress feed '''
+        res = { k: getattr(self, k) for k in DownloadProgress.__slots__ }
+        res['percent'] = self.get_percent()
+        return res
+
+    def describe( self ) -> str:
+        ''' For status line '''
+        percent = self.get_percent()
+        speed = self.speed if isinstance(self.speed, str) or self.speed is None else format_bytes(self.speed) + '/s'
+        return "{} ({}): {} of {} at {} ETA {}".format(
+            self.name,
+            self.category,
+            '?' if percent is None else f"{percent:.1f}%",
+            '?' if self.total is None else format_bytes(self.total),
+            speed or '?',
+            '?' if self.eta is None else datetime.timedelta(seconds=int(self.eta))
+        )
+
+
+class ProgressBoard:
+    ''' Shows progress of all running downloads (and FFmpeg jobs) of the process.
+    Progress hooks are called many times per second: they only update a ``DownloadProgress``
+    record and call ``refresh``, which renders at most every ``progress_interval`` seconds:
+    - ``line`` format: a single status line for all running downloads;
+    - ``json`` format: a JSON object per line on stdout, for headless runs.
+    Finished downloads are reported right away.
+    '''
+
+    def __init__( self ) -> None:
+        self._lock = threading.Lock()
+        self.interval = DEFAULT_SETTINGS['progress_interval']
+        self.fmt = DEFAULT_SETTINGS['progress_format']
+        self.running: Dict[int,DownloadProgress] = {}
+        self._next_render = 0.0
+        self._spinner = None
+
+    def configure( self, settings: dict ) -> None:
+        ''' Applies settings '''
+        self.interval = settings['progress_interval']
+        self.fmt = settings['progress_format']
+
+    @property
+    def spinner( self ) -> MySpinner:
+        ''' Shared by all downloads, created on first use (it looks up terminal size) '''
+        if self._spinner is None:
+            self._spinner = MySpinner()
+        return self._spinner
+
+    def start( self, name: str, category: str ) -> DownloadProgress:
+        ''' Returns record to update for a new download '''
+        progress = DownloadProgress( name, category )
+        with self._lock:
+            self.running[id(progress)] = progress
+        return progress
+
+    def refresh( self ) -> None:
+        ''' Will be called after a record was updated: renders if due, unless another thread is rendering '''
+        now = time.monotonic()
+        if now < self._next_render or not self._lock.acquire( blocking=False ):
+            return
+        try:
+            self._next_render = now + self.interval
+            if self.fmt=='json':
+                self._write_json({ 'running': [ progress.as_dict() for progress in self.running.values() ] })
+            else:
+                self.spinner.animation( text=' | '.join( progress.describe() for progress in self.running.values() ) )
+        finally:
+            self._lock.release()
+
+    def finish( self, progress: DownloadProgress, status: str ) -> None:
+        ''' Will be called when a download ended; ``status`` is 'finished' or 'error' '''
+        with self._lock:
+            self.running.pop( id(progress), None )
+            if self.fmt=='json':
+                self._write_json({ 'event': status, **progress.as_dict() })
+            else:
+                self.spinner.animation( text=f"{progress.name} ({progress.category}): {'DONE!' if status=='finished' else 'ERROR!'} \n", no_spinner=True )
+            self._next_render = 0.0
+
+    @staticmethod
+    def _write_json( record: dict ) -> None:
+        sys.stdout.write( json.dumps( { 'time': round(time.time(), 3), **record } ) + '\n' )
+        sys.stdout.flush()
+
+
+PROGRESS_BOARD = ProgressBoard()
+
+
 class YDLDownloadMonitor:
-    ''' Used to monitor downloading progress
+    ''' Used to monitor downloading progress (shown by ``PROGRESS_BOARD``)
     '''
 
     PART_TYPES = {
@@ -250,42 +929,52 @@ class YDLDownloadMonitor:
         '.m4a' : 'audio',
         'UNKNOWN_TYPE': 'UNKNOWS_STREAM'
     }
-    CATEGORY = lambda f_name: YDLDownloadMonitor.PART_TYPES[ 
-        next( (
-            ext for ext in YDLDownloadMonitor.PART_TYPES if ext in f_name),
-            'UNKNOWN_TYPE' # default
-        ) ]
 
-    def __init__( self ):
+    @staticmethod
+    def category( filename: str ) -> str:
+        ''' Stream type, from file extension (ignoring suffix of temporary files, eg: ``.mp4.part``) '''
+        root, ext = os.path.splitext( filename )
+        if ext in ('.part', '.ytdl'):
+            ext = os.path.splitext( root )[1]
+        return YDLDownloadMonitor.PART_TYPES.get( ext, YDLDownloadMonitor.PART_TYPES['UNKNOWN_TYPE'] )
+
+    def __init__( self, metrics_labels: Optional[dict] = None, journal: Optional[Callable[...,None]] = None ):
         self.seen = set()
-        self.spinner = MySpinner()
-        self.curr_category = None
-        self.curr_id = None
+        self.touched_dirs = set()
+        self.metrics_labels = metrics_labels or {}
+        self.journal = journal
+        self.progress: Optional[DownloadProgress] = None
 
     def hook( self, d ):
         ''' Will be called on downloading progress '''
-
-        if self.curr_category is None:
-            self.curr_category = YDLDownloadMonitor.CATEGORY( d['filename'] )
-            self.curr_id = Path(d['info_dict']['_filename']).stem
-
-        self.spinner.animation( 
-            text="{} ({}): SPD {} - TOT {} - ETA {} {}".format(
-                self.curr_id,
-                self.curr_category,
-                d.get('_speed_str','?'),
-                d.get('_total_bytes_str','?'),
-                d.get('_eta_str','?'),
-                d.get('_percent_str','?'),
-            )
-        )
-
-        if d.get('status',None)=='error':
-            LOG.warning("Download error on %s", self.curr_id)
-        if d.get('status',None)=='finished':
-            self.seen.add( self.curr_id )
-            self.spinner.animation( text=f"{self.curr_id} ({self.curr_category}): DONE! \n", no_spinner=True )
-            self.curr_category, self.curr_id = None, None
+        progress = self.progress
+        if progress is None:
+            progress = self.progress = PROGRESS_BOARD.start( Path(d['info_dict']['_filename']).stem, YDLDownloadMonitor.category( d['filename'] ) )
+            self.touched_dirs.add( Path(d['filename']).parent )
+            if self.journal is not None:
+                self.journal( 'downloading', index=d['info_dict'].get('playlist_index'), id=d['info_dict'].get('id'), filename=d['filename'] )
+
+        status = d.get('status')
+        if status=='downloading':
+            progress.downloaded = d.get('downloaded_bytes')
+            progress.total = d.get('total_bytes') or d.get('total_bytes_estimate')
+            progress.speed = d.get('speed')
+            progress.eta = d.get('eta')
+            PROGRESS_BOARD.refresh()
+            return
+
+        if status=='error':
+            LOG.warning("Download error on %s", progress.name)
+            METRICS.inc( 'download_errors', **self.metrics_labels )
+        if status=='finished':
+            METRICS.inc( 'downloaded_bytes', d.get('total_bytes') or d.get('downloaded_bytes') or 0, **self.metrics_labels )
+            METRICS.inc( 'download_seconds', d.get('elapsed') or 0, **self.metrics_labels )
+            self.seen.add( progress.name )
+            progress.downloaded = progress.total = d.get('total_bytes') or d.get('downloaded_bytes') or progress.downloaded
+            progress.eta = 0
+        if status in ('finished', 'error'):
+            PROGRESS_BOARD.finish( progress, status )
+            self.progress = None
 
 class FakeLogger(logging.Logger):
     ''' Interface for ProgressMonitor
@@ -309,23 +998,32 @@ class FakeLogger(logging.Logger):
 
 class ProgressMonitor(FakeLogger):
     ''' Hacky way of monitoring playlist/channel download progress with a Logger '''
-    def __init__(self) -> None:
-        super().__init__()
-        self.pattern = re.compile(r"\[download\] Downloading video ([0-9]+) of ([0-9]+)")
+
+    PREFIX = "[download] Downloading "
+    PATTERN = re.compile(r"\[download\] Downloading (?:video|item) ([0-9]+) of ([0-9]+)")
 
     def debug( self, *args, **kwargs ) -> None:
         msg = args[0]
-        res = re.match(self.pattern, msg)
+        # most messages are download progress: a prefix check is cheaper than the regex
+        if not msg.startswith( ProgressMonitor.PREFIX ):
+            return
+        res = ProgressMonitor.PATTERN.match( msg )
         if res:
             LOG.info("[%s/%s]", res.group(1), res.group(2))
 
 class YDLPostProcessMonitor:
     ''' Used to monitor post-downloading progress '''
     
-    def __init__(self):
+    def __init__(self, metrics_labels: Optional[dict] = None, journal: Optional[Callable[...,None]] = None, download_dir: Optional[Path] = None):
+        self.journal = journal
+        self.download_dir = download_dir
         self._merged = set()
         self._successful_downloads = set()
         self._audio_only = False
+        self.final_files = []
+        self.added_bytes = 0
+        self.metrics_labels = metrics_labels or {}
+        self._started = {}
 
     @property
     def successful_downloads( self ) -> List[int]:
@@ -334,6 +1032,13 @@ class YDLPostProcessMonitor:
 
     def hook( self, d: dict ):
         ''' Will be called on post-downloading progress '''
+        timer_key = ( d['postprocessor'], d['info_dict'].get('id') )
+        if d['status']=='started':
+            self._started[timer_key] = time.perf_counter()
+        elif timer_key in self._started and d['status']=='finished':
+            METRICS.add_time( 'postprocess', time.perf_counter() - self._started.pop(timer_key), postprocessor=d['postprocessor'], **self.metrics_labels )
+        if d['status']=='finished' and self.journal is not None and d['postprocessor'] in ('Merger', 'MoveFiles'):
+            self.journal( 'merged' if d['postprocessor']=='Merger' else 'moved', index=d['info_dict'].get('playlist_index'), id=d['info_dict'].get('id') )
         if d['status']=='finished':
             if d['postprocessor']=='MoveFiles' and self._audio_only:
                 self._successful_downloads.add( d['info_dict']['playlist_index'] )
@@ -342,6 +1047,25 @@ class YDLPostProcessMonitor:
             elif d['postprocessor']=='MoveFiles' and d['info_dict']['playlist_index'] in self._merged:
                 self._successful_downloads.add( d['info_dict']['playlist_index'] )
 
+    def post_hook( self, filename: str ):
+        ''' Will be called with final file path once all postprocessors are done '''
+        self.final_files.append( Path(filename) )
+        self.count( Path(filename) )
+
+    def count( self, path: Path ) -> None:
+        ''' Counts size of created file ``path`` toward the quota of ``download_dir`` (see ``DiskBudget``) '''
+        size = path.stat().st_size if path.is_file() else 0
+        self.added_bytes += size
+        if self.download_dir is not None:
+            DISK_BUDGET.downloaded( self.download_dir, size )
+
+    def linked( self, info_dict: dict, filename: Path ) -> None:
+        ''' Will be called when a video was linked from an existing copy instead of downloaded '''
+        if self.journal is not None:
+            self.journal( 'moved', index=info_dict.get('playlist_index'), id=info_dict.get('id') )
+        self._successful_downloads.add( info_dict['playlist_index'] )
+        self.post_hook( filename )
+
 
 def output_template( playlist: dict, audio: bool = False ) -> str:
     ''' Returns appropriate naming format, applies ``YDL_FORMAT`` formatter.
@@ -351,23 +1075,743 @@ def output_template( playlist: dict, audio: bool = False ) -> str:
     return formatter( playlist['infos'] )
 
 
-def download_playlist( playlist: dict, download_dir: Path ) -> List[int]:
-    ''' Downloads playlist, then returns list of successful download indexes '''
+class TokenBucket:
+    ''' Thread-safe token bucket: ``rate`` tokens per second, up to ``burst`` tokens (rate 0 means unlimited).
+    Callers take tokens in advance, possibly putting the bucket in debt, then sleep their turn:
+    concurrent callers are served in order and share the rate.
+    '''
+
+    def __init__( self, rate: float = 0, burst: Optional[float] = None ) -> None:
+        self._lock = threading.Lock()
+        self.rate, self.burst = 0, 0
+        self.tokens = 0.0
+        self.updated = time.monotonic()
+        self.set_rate( rate, burst )
+
+    def set_rate( self, rate: float, burst: Optional[float] = None ) -> None:
+        ''' Changes rate; ``burst`` defaults to one second worth of tokens '''
+        with self._lock:
+            self.rate = rate
+            self.burst = burst or max( rate, 1 )
+            self.tokens = min( self.tokens, self.burst )
+
+    def consume( self, amount: float ) -> float:
+        ''' Takes ``amount`` tokens, sleeping as needed; returns time slept (seconds) '''
+        with self._lock:
+            now = time.monotonic()
+            if not self.rate:
+                self.tokens, self.updated = self.burst, now
+                return 0.0
+            self.tokens = min( self.burst, self.tokens + (now - self.updated) * self.rate ) - amount
+            self.updated = now
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+def parse_bandwidth_schedule( schedule_s: str ) -> List[Tuple[datetime.time,datetime.time,int]]:
+    ''' Parses ``bandwidth_schedule`` setting: JSON object mapping time windows to bandwidth
+    (bytes per second, with optional suffix; 0 means unlimited), eg: ``{"08:00-23:00": "2M"}``.
+    Returns list of ( <start>, <end>, <bytes per second> ); windows may span midnight.
+    '''
+    if not schedule_s:
+        return []
+    res = []
+    for window, bandwidth in json.loads(schedule_s).items():
+        start, end = ( datetime.datetime.strptime(t.strip(), "%H:%M").time() for t in window.split('-') )
+        res.append( (start, end, yt_dlp.utils.parse_bytes(str(bandwidth)) or 0) )
+    return res
+
+
+class Governor:
+    ''' Limits request rate and download bandwidth of all downloads of the process:
+    - every HTTP request of YoutubeDL instances (see ``install``) takes a token
+      from the request bucket (``max_requests_per_second``);
+    - downloaded bytes are reported by a progress hook (see ``progress_hook``), which
+      sleeps to keep to the bandwidth of the current time of day (``max_bandwidth``,
+      overridden by ``bandwidth_schedule``);
+    - when a request is throttled (HTTP 429), all requests are paused, with exponential backoff.
+    With process workers, each process gets an equal share of limits.
+    '''
+
+    BACKOFF_MIN, BACKOFF_MAX = 30, 900
+
+    def __init__( self ) -> None:
+        self._lock = threading.Lock()
+        self.requests = TokenBucket()
+        self.bandwidth = TokenBucket()
+        self.max_bandwidth = 0
+        self.schedule = []
+        self.share = 1.0
+        self.paused_until = 0.0
+        self.backoff = 0
+        self._downloaded: Dict[str,int] = {}
+
+    def configure( self, settings: dict, share: float = 1.0 ) -> None:
+        ''' Applies settings; ``share`` is the fraction of limits this process gets '''
+        self.share = share
+        self.requests.set_rate( settings['max_requests_per_second'] * share )
+        self.max_bandwidth = yt_dlp.utils.parse_bytes( str(settings['max_bandwidth']) ) or 0
+        self.schedule = parse_bandwidth_schedule( settings['bandwidth_schedule'] )
+        self._update_bandwidth()
+
+    def current_bandwidth( self ) -> int:
+        ''' Returns bandwidth limit (bytes per second) for current time of day; 0 means unlimited '''
+        now = datetime.datetime.now().time()
+        for start, end, bandwidth in self.schedule:
+            if (start <= now < end) if start <= end else (now >= start or now < end):
+                return bandwidth
+        return self.max_bandwidth
+
+    def _update_bandwidth( self ) -> None:
+        rate = self.current_bandwidth() * self.share
+        if rate!=self.bandwidth.rate:
+            LOG.debug("Bandwidth limit: %s", f"{rate/1024:.0f}KiB/s" if rate else 'none')
+            self.bandwidth.set_rate( rate )
+
+    def wait_for_request( self ) -> None:
+        ''' Waits until a request can be made '''
+        pause = self.paused_until - time.time()
+        if pause > 0:
+            time.sleep( pause )
+        waited = self.requests.consume( 1 )
+        if waited or pause > 0:
+            METRICS.inc( 'governor_wait_seconds', waited + max( pause, 0 ), kind='requests' )
+
+    def throttled( self, url: str ) -> None:
+        ''' Pauses all requests after a throttling error '''
+        with self._lock:
+            self.backoff = min( max( 2 * self.backoff, Governor.BACKOFF_MIN ), Governor.BACKOFF_MAX )
+            self.paused_until = max( self.paused_until, time.time() + self.backoff )
+        LOG.warning("Throttled on %s: pausing requests for %ds", url, self.backoff)
+        METRICS.inc( 'throttling_errors' )
+
+    def request_succeeded( self ) -> None:
+        ''' Resets backoff once requests succeed for a while after a pause '''
+        if self.backoff and time.time() > self.paused_until + self.backoff:
+            with self._lock:
+                self.backoff = 0
+
+    def install( self, ydl: 'YoutubeDL' ) -> None:
+        ''' Routes HTTP requests of ``ydl`` through governor '''
+        urlopen = ydl.urlopen
+
+        def governed_urlopen( req ):
+            self.wait_for_request()
+            try:
+                res = urlopen( req )
+            except Exception as e:
+                if getattr(e, 'status', None)==429:
+                    self.throttled( getattr(req, 'url', req) )
+                raise
+            self.request_succeeded()
+            return res
+
+        ydl.urlopen = governed_urlopen
+
+    def progress_hook( self, d: dict ) -> None:
+        ''' YoutubeDL progress hook: sleeps to keep downloads within bandwidth limit '''
+        filename = d.get('filename')
+        downloaded = d.get('downloaded_bytes') or 0
+        with self._lock:
+            new_bytes = downloaded - self._downloaded.get(filename, 0)
+            if d.get('status')=='downloading':
+                self._downloaded[filename] = downloaded
+            else:
+                self._downloaded.pop(filename, None)
+        self._update_bandwidth()
+        if new_bytes > 0:
+            waited = self.bandwidth.consume( new_bytes )
+            if waited:
+                METRICS.inc( 'governor_wait_seconds', waited, kind='bandwidth' )
+
+    @staticmethod
+    def retry_sleep( n: int ) -> float:
+        ''' Exponential backoff between retries of a failed download/extraction (seconds) '''
+        return min( 2 ** n, 60 )
+
+
+GOVERNOR = Governor()
+
+
+def parse_user_quota( quota_s: str ) -> Dict[Optional[str],int]:
+    ''' Parses ``user_quota`` setting: a size in bytes (with optional suffix; 0 means unlimited) for
+    every surveiled path, or a JSON object mapping surveiled paths to sizes, eg: ``{"/data/alice": "500G"}``.
+    Returns ``{ <surveiled path, as posix string|None for others>: <bytes> }``.
+    '''
+    quota_s = quota_s.strip()
+    if not quota_s.startswith('{'):
+        return { None: yt_dlp.utils.parse_bytes(quota_s or '0') or 0 }
+    return {
+        Path(p_s).resolve().as_posix(): yt_dlp.utils.parse_bytes(str(quota)) or 0
+        for p_s, quota in json.loads(quota_s).items()
+    }
+
+
+def item_size_estimate( info_dict: dict ) -> Optional[int]:
+    ''' Returns disk space needed to download a video whose formats are selected (complete ``info_dict``):
+    sum of ``filesize`` (or ``filesize_approx``) of requested formats, doubled when they are merged,
+    as format files and merged file exist together until the end of the merge. None if unknown.
+    '''
+    formats = info_dict.get('requested_formats') or [ info_dict ]
+    sizes = [ fmt.get('filesize') or fmt.get('filesize_approx') for fmt in formats ]
+    if not all(sizes):
+        return None
+    return int( sum(sizes) * (2 if len(formats) > 1 else 1) )
+
+
+class DiskBudget:
+    ''' Admission control of downloads by disk space. Just before a video is downloaded, its
+    estimated size (see ``item_size_estimate``) must fit in:
+    - the free space of the volume of its surveiled path, minus ``min_free_space`` and the space
+      reserved for videos being downloaded to that volume;
+    - the quota of its surveiled path (``user_quota``), minus the size of its files and of videos
+      being downloaded there. The size of its files is stored in its state store (see ``load_usage``),
+      and kept up to date as files are downloaded (see ``downloaded``).
+    Videos that don't fit are deferred: skipped and recorded in the state store, so that the next
+    run downloads them first (see ``PlaylistStateStore.deferred``). Once a surveiled path is
+    out of space, remaining entries are deferred before they are even extracted.
+    Each YoutubeDL invocation (``owner``) holds one reservation, for the video it downloads:
+    it is replaced by the next admitted video, and released by ``release``. Videos of unknown size
+    are admitted as long as ``min_free_space`` is left.
+    With process workers, each process only knows of its own reservations.
+    '''
+
+    def __init__( self ) -> None:
+        self._lock = threading.Lock()
+        self.min_free = 0
+        self.quotas: Dict[Optional[str],int] = {}
+        self.rescan_interval = DEFAULT_SETTINGS['quota_rescan_interval']
+        self.rescan = False # count files of the next surveiled paths loaded (see `load_usage`) again
+        self._used: Dict[str,int] = {}
+        self._reserved: Dict[Any,Tuple[str,int,int]] = {}
+
+    def configure( self, settings: dict ) -> None:
+        ''' Applies settings '''
+        with self._lock:
+            self.min_free = yt_dlp.utils.parse_bytes( str(settings['min_free_space']) ) or 0
+            self.quotas = parse_user_quota( settings['user_quota'] )
+            self.rescan_interval = settings['quota_rescan_interval']
+            self._used.clear()
+
+    def quota( self, user: str ) -> int:
+        ''' Returns quota of surveiled path ``user`` in bytes; 0 means unlimited '''
+        return self.quotas.get( user, self.quotas.get(None, 0) )
+
+    @staticmethod
+    def count_usage( user: Path ) -> int:
+        ''' Returns the size of the files of surveiled path ``user``, by going through all of them '''
+        return sum(
+            f.stat().st_size
+            for f in user.rglob('*')
+            if f.is_file() and not f.is_symlink()
+        )
+
+    def load_usage( self, user: Path, store: 'PlaylistStateStore' ) -> None:
+        ''' Loads the size of the files of surveiled path ``user``, if it has a quota, from its state
+        store. Files are counted again (and the count stored) when they weren't for ``quota_rescan_interval``
+        days, or when ``rescan`` is set (eg: files were deleted since). '''
+        user_s = user.as_posix()
+        if not self.quota( user_s ):
+            return
+        stored = store.disk_usage()
+        if self.rescan or stored is None or time.time() - stored[1] > self.rescan_interval * 86400:
+            LOG.info("Counting the size of files in %s ..", user)
+            with METRICS.timer( 'quota_scan', path=user_s ):
+                size = DiskBudget.count_usage( user )
+            store.set_disk_usage( size )
+        else:
+            size = stored[0]
+        with self._lock:
+            self._used[user_s] = size
+
+    def usage( self ) -> Dict[str,int]:
+        ''' Returns the size of the files of surveiled paths with a quota, as far as it is known '''
+        with self._lock:
+            return dict(self._used)
+
+    def set_usage( self, usage: Dict[str,int] ) -> None:
+        ''' Sets the size of the files of surveiled paths, as returned by ``usage`` (eg: of another process) '''
+        with self._lock:
+            self._used.update(usage)
+
+    def downloaded( self, user: Path, size: int ) -> None:
+        ''' Counts a file of ``size`` bytes downloaded to surveiled path ``user`` toward its quota '''
+        with self._lock:
+            if user.as_posix() in self._used:
+                self._used[user.as_posix()] += size
+
+    def _count_if_unknown( self, user: str ) -> None:
+        # counts files of surveiled path with a quota on first use, unless loaded (see `load_usage`):
+        # without holding the lock, so that other workers aren't held up by the count
+        if self.quota(user) and user not in self._used:
+            size = DiskBudget.count_usage( Path(user) )
+            with self._lock:
+                self._used.setdefault( user, size )
+
+    def _available( self, user: str ) -> Tuple[int,str]:
+        # bytes that can be admitted for `user`, and what limits them
+        dev = os.stat(user).st_dev
+        free = shutil.disk_usage(user).free - self.min_free - sum( size for _, _dev, size in self._reserved.values() if _dev==dev )
+        res = ( free, 'free disk space' )
+        quota = self.quota(user)
+        if quota:
+            # (0 if settings were applied again since `_count_if_unknown`)
+            left = quota - self._used.get(user, 0) - sum( size for _user, _, size in self._reserved.values() if _user==user )
+            res = min( res, ( left, 'quota' ) )
+        return res
+
+    def admit( self, owner: Any, user: Path, size: Optional[int] ) -> Optional[str]:
+        ''' Replaces reservation of ``owner`` with ``size`` bytes (None if unknown) for a
+        download to surveiled path ``user``; returns why it doesn't fit, or None '''
+        user_s = user.as_posix()
+        self._count_if_unknown( user_s )
+        with self._lock:
+            self._release( owner )
+            available, limit = self._available( user_s )
+            if available < (size or 0) or available < 0:
+                return f"needs {yt_dlp.utils.format_bytes(size) if size else 'unknown size'}, {yt_dlp.utils.format_bytes(max(0, available))} left ({limit})"
+            self._reserved[owner] = ( user_s, os.stat(user_s).st_dev, size or 0 )
+        return None
+
+    def exhausted( self, user: Path ) -> Optional[str]:
+        ''' Returns why nothing more can be downloaded to surveiled path ``user``, or None '''
+        self._count_if_unknown( user.as_posix() )
+        with self._lock:
+            available, limit = self._available( user.as_posix() )
+        return f"no {limit} left" if available <= 0 else None
+
+    def release( self, owner: Any ) -> None:
+        ''' Releases reservation of ``owner``: its video was downloaded (see ``downloaded``) or given up '''
+        with self._lock:
+            self._release( owner )
+
+    def _release( self, owner: Any ) -> None:
+        self._reserved.pop( owner, None )
+
+
+DISK_BUDGET = DiskBudget()
+
+
+class YDLNetworkLogger:
+    ''' Logger of request handlers shared by YoutubeDL instances (see ``YDLFactory``): messages go
+    to the log file, as they don't belong to the instance that happened to create the handlers '''
+
+    def debug( self, message: str, *args, **kwargs ) -> None:
+        LOG.debug( "%s", message )
+
+    def info( self, message: str, *args, **kwargs ) -> None:
+        LOG.info( "%s", message )
+
+    def warning( self, message: str, *args, **kwargs ) -> None:
+        LOG.warning( "%s", message )
+
+    def error( self, message: str, *args, **kwargs ) -> None:
+        LOG.error( "%s", message )
+
+    stdout = debug
+    stderr = error
+
+
+class YDLFactory:
+    ''' Makes a new YoutubeDL instance for each job, so that no state of a job (options, counters,
+    postprocessors, ..) leaks into the next. What is costly to set up and safe to share is made
+    once and shared by all instances:
+    - the registry of extractor classes, whose setup (ordering of all extractors) takes most of the
+      time of ``YoutubeDL.__init__``; each instance still creates its own extractor instances;
+    - the cookie jar (thread safe), so that cookies set by a site carry over between jobs, unless
+      a job loads its own cookies;
+    - the request director (request handlers, with their HTTP sessions), by instances with the
+      same network options (proxy, headers, timeouts, ..; see ``NETWORK_PARAMS``): with yt-dlp's
+      requests handler (if requests is installed), connections to a host (and their TCP/TLS
+      handshakes) are reused by the next jobs for the whole run, which ``report`` sums up from
+      its connection pools. yt-dlp's own urllib handler opens a connection per request.
+    Request directors are closed by ``close``; a forked process drops those of its parent.
+    '''
+
+    NETWORK_PARAMS = (
+        'http_headers', 'proxy', 'socket_timeout', 'source_address', 'nocheckcertificate', 'legacyserverconnect', 'enable_file_urls',
+        'impersonate', 'client_certificate', 'client_certificate_key', 'client_certificate_password', 'debug_printtraffic', 'compat_opts'
+    )
+
+    def __init__( self ) -> None:
+        self._lock = threading.Lock()
+        self._ies: Optional[Dict[str,Any]] = None
+        self._cookiejar = None
+        self._directors: Dict[str,Any] = {}
+        self.created = 0
+        self.setup_seconds = 0.0
+        self.directors_reused = 0
+        self.requests_sent = 0
+        self.connections_opened = 0
+        self._pool_counts = weakref.WeakKeyDictionary()
+        if hasattr(os, 'register_at_fork'):
+            # sockets of the parent's connections must not be used by both processes
+            os.register_at_fork( after_in_child=self._drop_directors )
+
+    def _new( self, params: dict ) -> 'YoutubeDL':
+        if self._ies is None:
+            ydl = YoutubeDL( params )
+            with self._lock:
+                if self._ies is None:
+                    self._ies, self._cookiejar = dict(ydl._ies), ydl.cookiejar
+        else:
+            ydl = YoutubeDL( params, auto_init=False )
+            for ie in self._ies.values():
+                # extractor instances (eg: the fallback for unsupported URLs) are bound to their YoutubeDL
+                ydl.add_info_extractor( ie if isinstance(ie, type) else type(ie)() )
+        if not ( params.get('cookiefile') or params.get('cookiesfrombrowser') ):
+            if 'cookiejar' not in ydl.__dict__:
+                ydl.__dict__['cookiejar'] = self._cookiejar # sets `functools.cached_property`
+            if ydl.cookiejar is self._cookiejar:
+                # handlers hold the cookie jar
+                self._share_director( ydl )
+        return ydl
+
+    def _share_director( self, ydl: 'YoutubeDL' ) -> None:
+        # gives `ydl` the request director of earlier instances with the same network options, or shares its own
+        key = repr( [ ydl.proxies ] + [
+            sorted(value) if isinstance(value, (set, frozenset)) else value
+            for value in ( ydl.params.get(k) for k in YDLFactory.NETWORK_PARAMS )
+        ] )
+        with self._lock:
+            director = self._directors.get(key)
+            if director is not None:
+                self.directors_reused += 1
+        if director is not None:
+            own = ydl.__dict__.pop( '_request_director', None )
+            if own is not None:
+                own.close()
+            ydl.__dict__['_request_director'] = director # sets `functools.cached_property`
+            METRICS.inc( 'ydl_directors_reused' )
+            return
+        director = ydl._request_director
+        director.logger = YDLNetworkLogger()
+        for handler in director.handlers.values():
+            handler._logger = director.logger
+        with self._lock:
+            self._directors[key] = director
+
+    @staticmethod
+    def _connection_pools( director: Any ) -> List[Any]:
+        # urllib3 connection pools of the HTTP sessions of requests' handler (urllib's has none)
+        handler = director.handlers.get('Requests')
+        adapters = {
+            id(adapter): adapter
+            for _, session in getattr( handler, '_InstanceStoreMixin__instances', () )
+            for adapter in session.adapters.values()
+        }
+        pools = [ adapter.poolmanager.pools for adapter in adapters.values() ]
+        return [ pool for container in pools for pool in ( container.get(key) for key in container.keys() ) if pool is not None ]
+
+    def _count_connections( self, director: Any ) -> None:
+        # adds requests sent and connections opened by connection pools of `director` since last count;
+        # pools dropped by their pool manager (least recently used, past 10 hosts) in between are missed
+        saved = 0
+        with self._lock:
+            for pool in YDLFactory._connection_pools( director ):
+                requests_sent, connections_opened = self._pool_counts.get( pool, (0, 0) )
+                self.requests_sent += pool.num_requests - requests_sent
+                self.connections_opened += pool.num_connections - connections_opened
+                saved += ( pool.num_requests - requests_sent ) - ( pool.num_connections - connections_opened )
+                self._pool_counts[pool] = ( pool.num_requests, pool.num_connections )
+        if saved:
+            METRICS.inc( 'http_connections_saved', saved )
+
+    @contextlib.contextmanager
+    def make( self, params: dict ) -> Iterator['YoutubeDL']:
+        ''' Yields a new YoutubeDL instance with options ``params``, governed by ``GOVERNOR``
+        (request rate and download bandwidth); it is closed afterwards '''
+        t_start = time.perf_counter()
+        ydl = self._new( params )
+        GOVERNOR.install(ydl)
+        ydl.add_progress_hook( GOVERNOR.progress_hook )
+        setup_seconds = time.perf_counter() - t_start
+        with self._lock:
+            self.created += 1
+            self.setup_seconds += setup_seconds
+        METRICS.add_time( 'ydl_setup', setup_seconds )
+        try:
+            yield ydl
+        finally:
+            director = ydl.__dict__.get('_request_director')
+            if director is not None and any( director is shared for shared in self._directors.values() ):
+                del ydl.__dict__['_request_director'] # not closed by `ydl.close`
+                self._count_connections( director )
+            ydl.close()
+
+    def report( self ) -> None:
+        ''' Logs how many instances were made so far and the time it took, how many of them reused the
+        request handlers of an earlier one, and how many connection setups kept-alive connections saved '''
+        with self._lock:
+            requests_sent, connections_opened = self.requests_sent, self.connections_opened
+        if requests_sent:
+            connections = f"{requests_sent} HTTP request(s) over {connections_opened} connection(s): {requests_sent - connections_opened} connection setup(s) saved"
+        else:
+            connections = "connections aren't kept alive (yt-dlp does so if requests is installed)"
+        LOG.info(
+            "YoutubeDL: %d instance(s) made in %.2fs; %d reused the request handlers of an earlier one; %s",
+            self.created, self.setup_seconds, self.directors_reused, connections
+        )
+
+    def close( self ) -> None:
+        ''' Drops shared extractor registry and cookie jar, closes shared request directors '''
+        with self._lock:
+            self._ies, self._cookiejar = None, None
+            directors, self._directors = list( self._directors.values() ), {}
+        for director in directors:
+            director.close()
+
+    def _drop_directors( self ) -> None:
+        # in a forked process: directors (and their connections) belong to the parent
+        self._lock = threading.Lock()
+        self._directors = {}
+
+
+YDL_FACTORY = YDLFactory()
+
+
+def backfill_download_archive( archive: 'DownloadArchive', playlist: dict, kinds: Iterable[str] ) -> bool:
+    ''' Migrates a playlist downloaded before download archives existed, whose completed items are
+    only known by index: records their IDs, as listed by a flat extraction of the playlist (one
+    request per page of entries, no per-video extraction). Returns False if that failed. '''
+    try:
+        with YDL_FACTORY.make( { 'quiet': True, 'ignoreerrors': True, 'extract_flat': 'in_playlist' } ) as ydl:
+            infos = ydl.extract_info( playlist['url'], download=False, process=False )
+            archive_ids = [
+                ydl._make_archive_id(entry)
+                for index, entry in enumerate( (infos or {}).get('entries') or (), start=1 )
+                if entry and index in playlist['items_completed']
+            ]
+    except Exception as e:
+        LOG.warning("Could not list items of '%s' to fill its download archive: %s", playlist['url'], e)
+        return False
+    archive_ids = [ archive_id for archive_id in archive_ids if archive_id ]
+    for kind in kinds:
+        archive.add( kind, archive_ids, playlist['url'] )
+    LOG.info("Recorded %d previously downloaded item(s) of '%s' in download archive", len(archive_ids), playlist['title'])
+    return bool(archive_ids)
+
+
+def tuning_profile( name: Optional[str] ) -> dict:
+    ''' Returns tuning profile ``name`` (see ``load_profile``), ``default_profile`` setting if None;
+    empty if unknown (yt-dlp defaults) '''
+    if name is None:
+        name = SETTINGS['default_profile'] or None
+    if name is None:
+        return {}
+    return SETTINGS['profiles'].get( name, {} )
+
+
+def profile_ydl_opts( profile: dict ) -> dict:
+    ''' Converts tuning profile into YoutubeDL options; an empty profile adds none '''
+    if not profile:
+        return {}
+    res = { 'concurrent_fragment_downloads': profile['concurrent_fragment_downloads'] }
+    http_chunk_size = yt_dlp.utils.parse_bytes( profile['http_chunk_size'] ) or 0
+    if http_chunk_size > 0:
+        # download in ranged requests: servers throttling long-lived connections don't slow them down
+        res['http_chunk_size'] = http_chunk_size
+    buffersize = yt_dlp.utils.parse_bytes( profile['buffersize'] ) or 0
+    if buffersize > 0:
+        res.update( buffersize=buffersize, noresizebuffer=True )
+    downloader = profile['external_downloader']
+    if downloader and shutil.which(downloader) is not None:
+        res['external_downloader'] = { 'default': downloader }
+        if profile['external_downloader_args']:
+            res['external_downloader_args'] = { downloader: shlex.split( profile['external_downloader_args'] ) }
+    return res
+
+
+class PlaylistDownload:
+    ''' State of the download of a playlist/channel by ``download_playlists``: monitors,
+    content deduplication, output templates, item selection options and items deferred for
+    lack of disk space (see ``DiskBudget``).
+    '''
 
-    LOG.info("Processing playlist '%s' ..", playlist['title'])
+    def __init__( self, playlist: dict, download_dir: Path ) -> None:
+        self.playlist = playlist
+        self.url = playlist['url']
+        self.download_dir = download_dir
+        self.metrics_labels = { 'path': download_dir.as_posix(), 'playlist': playlist['url'] }
+        self.journal = lambda event, **data: journal_for(download_dir).record( playlist['url'], event, **data )
+        self.down_monitor = YDLDownloadMonitor( self.metrics_labels, self.journal )
+        self.postp_monitor = YDLPostProcessMonitor( self.metrics_labels, self.journal, download_dir )
+        self.skip_video_download = playlist['do_extract_audio'] is not None and 'audio' in playlist['do_extract_audio'] and 'only' in playlist['do_extract_audio']
+        if self.skip_video_download:
+            # Progress tracking requires at least a postprocessor hook on audio downloading
+            self.postp_monitor._audio_only = True
+        # Keyed by "audio pass"
+        self.templates = { False: output_template( playlist ), True: output_template( playlist, audio=True ) }
+        self.dedup = {
+            False: ContentDeduplicator( YDL_FORMAT['format'], download_dir, self.postp_monitor, self.metrics_labels ),
+            # linked audio files count as downloaded only for audio-only playlists
+            True: ContentDeduplicator( YDL_FORMAT['format_audio_only'], download_dir, self.postp_monitor if self.skip_video_download else None, self.metrics_labels )
+        }
+        # single pass: audio is copied from downloaded videos, which is only possible if
+        # audio files are named like videos, in the audio folder
+        self.single_pass_audio = (
+            playlist['do_extract_audio'] is not None
+            and not self.skip_video_download
+            and SETTINGS['audio_single_pass']
+            and self.templates[False].startswith('./')
+            and self.templates[True]=='./Audio/' + self.templates[False][2:]
+        )
+        self.audio_pass = playlist['do_extract_audio'] is not None and not self.single_pass_audio
+        self.selection = {}
+        self.deferred: Dict[str,Tuple[Optional[int],str]] = {} # { <video id>: ( <estimated size|None>, <reason> ) }
+        self.archived = set() # indexes of items skipped as already in download archive (see `PlaylistRouter.in_download_archive`)
+
+    def select_items( self, archive: 'DownloadArchive' ) -> bool:
+        ''' Sets item selection options and journals them; returns False if there is nothing to download '''
+        playlist = self.playlist
+        # What items to download: all, except those in download archive
+        if playlist['items_completed'] and not playlist['is_channel']:
+            indexes_to_process = playlist['items_completed'].complement( 1, playlist['len'] )
+            if not indexes_to_process:
+                LOG.info("Nothing to download!")
+                METRICS.inc( 'playlists_skipped', reason='nothing_to_download', **self.metrics_labels )
+                return False
+            archive_kinds = ( [] if self.skip_video_download else ['video'] ) + ( ['audio'] if self.audio_pass else [] )
+            if not archive.has_playlist( self.url ) and not backfill_download_archive( archive, playlist, archive_kinds ):
+                # Items downloaded before download archives existed are only known by index
+                self.selection['playlist_items'] = str(indexes_to_process)
+        elif playlist['is_channel'] and playlist.get('new_items'):
+            # Probe found where new videos end: no need to go through the whole channel
+            self.selection['playlistend'] = playlist['new_items']
+            LOG.debug("Download %d latest items", playlist['new_items'])
+        else:
+            self.selection['playliststart'] = 1
+
+        self.journal(
+            'planned',
+            format=YDL_FORMAT['format'],
+            audio=playlist['do_extract_audio'],
+            profile=playlist.get('profile'),
+            **self.selection
+        )
+        return True
+
+    def admit( self, info_dict: dict, incomplete: bool, owner: Any ) -> Optional[str]:
+        ''' Disk space admission control of an entry (see ``DiskBudget``), for match filters:
+        returns a reason to skip it if it is deferred, after recording it '''
+        if incomplete:
+            size, reason = None, DISK_BUDGET.exhausted( self.download_dir )
+        else:
+            size = item_size_estimate( info_dict )
+            reason = DISK_BUDGET.admit( owner, self.download_dir, size )
+        if reason is None:
+            return None
+        video_id = info_dict.get('id')
+        if video_id and video_id not in self.deferred:
+            LOG.info("Deferring %s of '%s': %s", video_id, self.playlist['title'], reason)
+            self.deferred[video_id] = ( size, reason )
+            METRICS.inc( 'items_deferred', **self.metrics_labels )
+            METRICS.inc( 'deferred_bytes', size or 0, **self.metrics_labels )
+        return f"{video_id}: deferred, {reason}"
+
+
+class PlaylistRouter:
+    ''' Dispatches callbacks of a YoutubeDL invocation downloading several playlists (see
+    ``download_playlists``) to the ``PlaylistDownload`` each entry belongs to, found by its
+    ``playlist_id``; output template and download archive view are switched accordingly.
+    YoutubeDL processes entries one at a time, so hooks called after an entry was routed
+    (by ``match_filter``, called on each entry before extraction and download) belong to it.
+    ``install`` must be called with the YoutubeDL instance running the download.
+    '''
+
+    def __init__( self, downloads: List[PlaylistDownload], audio: bool, archive_view: 'DownloadArchive.View' ) -> None:
+        self.by_id = { download.playlist['infos'].get('id'): download for download in downloads }
+        self.by_url = { download.url: download for download in downloads }
+        self.current = downloads[0]
+        self.audio = audio
+        self.archive_view = archive_view
+        self.ydl = None
+        self._in_download_archive = None
+
+    def install( self, ydl: 'YoutubeDL' ) -> None:
+        ''' Sets ``ydl`` as the YoutubeDL instance running the download, and routes its
+        download archive lookups through ``in_download_archive`` '''
+        self.ydl = ydl
+        self._in_download_archive = ydl.in_download_archive
+        ydl.in_download_archive = self.in_download_archive
+
+    def in_download_archive( self, info_dict: dict ) -> bool:
+        ''' Download archive lookup of YoutubeDL, which skips entries found in the archive before
+        ``match_filter``: their index counts as completed for the playlist they belong to, so that
+        items that moved within a playlist (eg: after an insertion at its head) aren't left due '''
+        found = self._in_download_archive( info_dict )
+        if found and info_dict.get('playlist_index') and ( not self.audio or self.current.skip_video_download ):
+            download = self.route( info_dict )
+            if download is not None:
+                download.archived.add( info_dict['playlist_index'] )
+        return found
+
+    def route( self, info_dict: dict ) -> Optional[PlaylistDownload]:
+        ''' Switches to the playlist ``info_dict`` belongs to; returns it (None if unknown) '''
+        if len(self.by_url) > 1:
+            download = self.by_id.get( info_dict.get('playlist_id') ) or next(
+                # single videos have no playlist fields: they are identified by their own URL
+                ( self.by_url[url] for url in ( info_dict.get(k) for k in ('playlist_webpage_url', 'original_url', 'webpage_url') ) if url in self.by_url ),
+                None
+            )
+            if download is None:
+                return None
+            self.current = download
+        self.ydl.params['outtmpl']['default'] = self.current.templates[self.audio]
+        self.archive_view.playlist = self.current.url
+        self.current.dedup[self.audio].ydl = self.ydl
+        return self.current
+
+    def match_filter( self, info_dict: dict, incomplete: bool = False ) -> Optional[str]:
+        ''' YoutubeDL match filter: routes entry, then applies content deduplication and
+        disk space admission control '''
+        download = self.route( info_dict )
+        if download is None:
+            return f"{info_dict.get('id')}: couldn't tell which playlist this entry belongs to"
+        reason = download.dedup[self.audio].match_filter( info_dict, incomplete )
+        if reason is None:
+            reason = download.admit( info_dict, incomplete, owner=self )
+        return reason
+
+    def progress_hook( self, d: dict ) -> None:
+        ''' Will be called on downloading progress '''
+        self.current.down_monitor.hook( d )
+
+    def postprocessor_hook( self, d: dict ) -> None:
+        ''' Will be called on post-downloading progress '''
+        if not self.audio or self.current.skip_video_download:
+            self.current.postp_monitor.hook( d )
+        self.current.dedup[self.audio].postprocessor_hook( d )
+
+    def post_hook( self, filename: str ) -> None:
+        ''' Will be called with final file path once all postprocessors are done '''
+        if self.audio and not self.current.skip_video_download:
+            self.current.postp_monitor.count( Path(filename) )
+        else:
+            self.current.postp_monitor.post_hook( filename )
+
+
+def download_playlists( playlists: List[dict], download_dir: Path ) -> List[dict]:
+    ''' Downloads playlists, then returns for each of them ``{ 'successful_downloads': <list of successful download indexes|None>,
+    'touched_dirs': <directories files were downloaded to>, 'deferred': <deferred items>, 'archived': <indexes of items found in download archive>,
+    'added_bytes': <size of created files> }``, deferred items being ``{ <video id>: ( <estimated size|None>, <reason> ) }`` (see ``DiskBudget``).
+    Playlists downloading all their items (except those in download archive) are downloaded by
+    a single YoutubeDL invocation per tuning profile (see ``PlaylistRouter``); the others get their own.
+    '''
+    downloads = []
+    for playlist in playlists:
+        LOG.info("Processing playlist '%s' ..", playlist['title'])
+        downloads.append( PlaylistDownload( playlist, download_dir ) )
+    archive = archive_for(download_dir)
+    pending = [ download for download in downloads if download.select_items(archive) ]
+    shared = [ download for download in pending if download.selection.get('playliststart', 1)==1 and not download.selection.keys() & { 'playlist_items', 'playlistend' } ]
+    shared_by_profile = {}
+    for download in shared:
+        shared_by_profile.setdefault( download.playlist.get('profile'), [] ).append( download )
+    groups = [ [download] for download in pending if download not in shared ] + list( shared_by_profile.values() )
 
-    down_monitor = YDLDownloadMonitor()
-    postp_monitor = YDLPostProcessMonitor()
-    ydl_opts = { 
-        'format'  : YDL_FORMAT['format'],
-        'outtmpl' : { 'default': output_template(playlist) },
-        'ignoreerrors' : True,
-        'progress_hooks': [down_monitor.hook],
-        'postprocessor_hooks': [postp_monitor.hook],
-        'paths': { 'home': download_dir.as_posix() },
-        'simulate': False,
-        'logger': ProgressMonitor() if PROGRESS_TO_FILE else None
-    } # 'verbose': True, 'logger': LOG, 'quiet': True
     # 'postprocessors': [{
     #         # Embed metadata in video using ffmpeg.
     #         'key': 'FFmpegEmbedSubtitle'
@@ -378,24 +1822,6 @@ def download_playlist( playlist: dict, download_dir: Path ) -> List[int]:
     #         'add_chapters': True,
     #         'add_metadata': True,
     #     }],
-    
-
-    # What items to download: specific or all
-    if playlist['items_completed'] and not playlist['is_channel']:
-        indexes_to_process = [
-            str(x+1)
-            for x in range(playlist['len'])
-            if x+1 not in playlist['items_completed']
-        ]
-        if len(indexes_to_process) < 1:
-            LOG.info("Nothing to download!")
-            return None
-        ydl_opts['playlist_items'] = ','.join(indexes_to_process)
-    elif playlist['is_channel'] and 'last_scan' in playlist:
-        ydl_opts['dateafter'] = DateRange( start=playlist['last_scan'] )
-        LOG.debug("Download items on dates: %s", ydl_opts['dateafter'])
-    else:
-        ydl_opts['playliststart'] = 1
 
     # Cookies
     # cookies_file_absolute_path = SCRIPT_DIR / "youtube.com_cookies.txt"
@@ -403,50 +1829,115 @@ def download_playlist( playlist: dict, download_dir: Path ) -> List[int]:
     #     LOG.debug("Setting cookie file=%s", cookies_file_absolute_path)
     #     ydl_opts['cookiefile'] = str(cookies_file_absolute_path)
 
-    def run_YDL( options: dict, url: str ) -> None:    
-        # run YoutubeDL on utl
+    def run_YDL( group: List[PlaylistDownload], audio: bool ) -> None:
+        # run YoutubeDL on playlists of group
+        archive_view = archive.view( 'audio' if audio else 'video', group[0].url )
+        router = PlaylistRouter( group, audio, archive_view )
+        ydl_opts = { 
+            'format'  : YDL_FORMAT['format_audio_only' if audio else 'format'],
+            'outtmpl' : { 'default': group[0].templates[audio] },
+            'ignoreerrors' : True,
+            'match_filter': router.match_filter,
+            'download_archive': archive_view, # already downloaded items are skipped before extraction
+            'postprocessor_hooks': [router.postprocessor_hook],
+            'post_hooks': [router.post_hook],
+            'paths': { 'home': download_dir.as_posix() },
+            'simulate': False,
+            'continuedl': True, # resume .part files left by an interrupted run
+            'retry_sleep_functions': { k: Governor.retry_sleep for k in ('http', 'fragment', 'extractor') },
+            'logger': ProgressMonitor() if PROGRESS_TO_FILE else None,
+            'progress_delta': PROGRESS_BOARD.interval, # throttles YoutubeDL's own progress output
+            **profile_ydl_opts( tuning_profile( group[0].playlist.get('profile') ) ),
+            **group[0].selection
+        } # 'verbose': True, 'logger': LOG, 'quiet': True
+        if PROGRESS_BOARD.fmt=='json' and not PROGRESS_TO_FILE:
+            # keep stdout for the progress feed
+            ydl_opts.update( quiet=True, noprogress=True )
+        if not audio:
+            ydl_opts['progress_hooks'] = [router.progress_hook]
+        metrics_labels = group[0].metrics_labels if len(group)==1 else { 'path': download_dir.as_posix() }
+        urls = [ download.url for download in group ]
         try:
-            LOG.debug("Running YoutubeDL with parameters: %s", pformat(options))
-            with YoutubeDL(options) as ydl:
-                ydl.download( [ url ] )
+            if LOG.isEnabledFor( logging.DEBUG ):
+                LOG.debug("Running YoutubeDL on %d playlist(s) with parameters: %s", len(urls), pformat(ydl_opts))
+            with METRICS.timer( 'download', **metrics_labels ), YDL_FACTORY.make(ydl_opts) as ydl:
+                router.install( ydl )
+                ydl.download( urls )
         except Exception as e:
-            LOG.error("YoutubeDL failed on '%s'; check error message.\ne=%s", url, e)
+            LOG.error("YoutubeDL failed on %s; check error message.\ne=%s", urls, e)
+            METRICS.inc( 'download_failures', **metrics_labels )
             raise
+        finally:
+            DISK_BUDGET.release( router )
+        METRICS.inc( 'ydl_invocations', **metrics_labels )
+
+    for group in groups:
+        # normal download
+        videos = [ download for download in group if not download.skip_video_download ]
+        if videos:
+            run_YDL( videos, audio=False )
+        for download in group:
+            if download.single_pass_audio:
+                with METRICS.timer( 'audio_extraction', **download.metrics_labels ):
+                    for audio_file in extract_audio_tracks( download.postp_monitor.final_files, download_dir ):
+                        download.postp_monitor.count( audio_file )
+        # audio-only download
+        audios = [ download for download in group if download.audio_pass ]
+        if audios:
+            run_YDL( audios, audio=True )
+
+    res = []
+    for download in downloads:
+        if download not in pending:
+            res.append( { 'successful_downloads': None, 'touched_dirs': [], 'deferred': {}, 'archived': [], 'added_bytes': 0 } )
+            continue
+        successful_downloads = download.postp_monitor.successful_downloads
+        LOG.info("Downloaded %s videos for '%s' !", len(successful_downloads), download.playlist['title'])
+        METRICS.inc( 'videos_downloaded', len(successful_downloads), **download.metrics_labels )
+        if download.deferred:
+            LOG.warning("Deferred %d videos of '%s' for lack of disk space", len(download.deferred), download.playlist['title'])
+        res.append( {
+            'successful_downloads': successful_downloads,
+            'touched_dirs': sorted(download.down_monitor.touched_dirs),
+            'deferred': download.deferred,
+            'archived': sorted(download.archived),
+            'added_bytes': download.postp_monitor.added_bytes
+        } )
+    return res
 
-    # normal download
-    skip_video_download = playlist['do_extract_audio'] is not None and 'audio' in playlist['do_extract_audio'] and 'only' in playlist['do_extract_audio']
-    if not skip_video_download:
-        run_YDL( ydl_opts, playlist['url'] )
-
-    # audio-only download
-    if playlist['do_extract_audio'] is not None:
-        # We need to edit options quite a bit
-        for k in ('progress_hooks', 'postprocessor_hooks'):
-            if k in ydl_opts:
-                del ydl_opts[k]
-        if skip_video_download:
-            # Progress tracking requires at least a postprocessor hook on audio downloading
-            postp_monitor._audio_only = True
-            ydl_opts['postprocessor_hooks'] = [postp_monitor.hook]
-        ydl_opts['format'] = YDL_FORMAT['format_audio_only']
-        ydl_opts['outtmpl'] = { 'default': output_template( playlist, audio=True ) }
-        # Run Ydl again
-        run_YDL( ydl_opts, playlist['url'] )
 
-    successful_downloads = postp_monitor.successful_downloads
-    LOG.info("Downloaded %s videos for '%s' !", len(successful_downloads), playlist['title'])
-    return successful_downloads
+def download_playlist( playlist: dict, download_dir: Path ) -> dict:
+    ''' Downloads playlist, then returns its result (see ``download_playlists``) '''
+    return download_playlists( [playlist], download_dir )[0]
+
+
+def stored_len_is_fresh( db_entry: dict, len_max_age: int ) -> bool:
+    ''' Returns True if playlist size stored in DB entry was counted less than ``len_max_age`` days ago '''
+    if db_entry.get('len') is None or db_entry.get('len_checked') is None:
+        return False
+    len_checked = datetime.datetime.strptime(db_entry['len_checked'], "%Y%m%d").date()
+    return (datetime.date.today() - len_checked).days < len_max_age
 
 
 # Deprecated because reading titles breaks too much and it is good enough to for the
 # user to set it up
-def get_playlist_infos( url: str = None ) -> tuple:
+def get_playlist_infos( url: str = None, known: Optional[dict] = None, probe_size: int = DEFAULT_SETTINGS['probe_size'], len_max_age: int = DEFAULT_SETTINGS['len_max_age'] ) -> tuple:
     ''' Tries to obtain playlist title and size
-    Returns: ( <infos:dict>, <title:str>, <size:int>, <is_channel:bool>, <latest_video_id:str> )
+    Returns: ( <infos:dict>, <title:str>, <size:int>, <is_channel:bool>, <latest_video_id:str>, <new_items:int|None> )
+
+    ``known`` is the playlist's DB entry (if any); it allows a cheap incremental probe:
+    - channels: only the first ``probe_size`` entries are pulled (flat), stopping at the
+      known ``last_video_id``; ``new_items`` is the number of entries uploaded since.
+      The full count is only computed when the stored ``len`` is older than ``len_max_age`` days;
+    - playlists: the size advertised by the playlist header is used when available,
+      otherwise entries are counted.
+    ``new_items`` is None when it couldn't be determined (first scan, or more than ``probe_size`` new items).
     '''
+    known = known or {}
+    len_is_fresh = stored_len_is_fresh( known, len_max_age )
     try:
         LOG.info("Fetching playlist infos for '%s'. This could take a moment ..", url)
-        with YoutubeDL( { 'quiet':True,'ignoreerrors':True } ) as ydl:
+        with YDL_FACTORY.make( { 'quiet':True,'ignoreerrors':True } ) as ydl:
             # The following alternative is a butchered code rip from `YoutubeDL.py` (faster for simple info)
             for ie_key, ie in ydl._ies.items():
                 if not ie.suitable(url):
@@ -455,13 +1946,37 @@ def get_playlist_infos( url: str = None ) -> tuple:
                 if 'title' not in tmp or tmp['title']==tmp['id']:
                     LOG.warning("Could not resolve title; utl=`%s`;data=`%s`", url,tmp)
 
-                # Channel
+                # Channel: entries are lazily fetched newest first, so only pull the head
                 if tmp['title']==f"{tmp['channel']} - Videos" or url==tmp['channel_url']:
-                    entries = list( tmp['entries'] )
-                    return tmp, tmp['channel'], len(entries), True, entries[0]['id']
+                    entries = iter( tmp['entries'] )
+                    head = []
+                    new_items = None
+                    for entry in itertools.islice(entries, probe_size):
+                        if entry['id']==known.get('last_video_id'):
+                            new_items = len(head)
+                            break
+                        head.append(entry['id'])
+                    latest_video_id = head[0] if head else known.get('last_video_id')
+                    if latest_video_id is None:
+                        LOG.warning("Channel '%s' has no video!", tmp['channel'])
+                    if len_is_fresh and new_items is not None:
+                        size = known['len'] + new_items
+                    elif new_items is None:
+                        # No known video in head (first scan, or many new videos): count the rest
+                        size = len(head) + sum(1 for _ in entries)
+                    else:
+                        # Stored size is stale: count entries after the known video
+                        LOG.debug("Stored size for channel '%s' is stale, counting entries", tmp['channel'])
+                        size = len(head) + 1 + sum(1 for _ in entries)
+                    return tmp, tmp['channel'], size, True, latest_video_id, new_items
+
                 # Playlist
                 fulltitle = f"{tmp['channel'][0].upper()}{tmp['channel'][1:]} - {tmp['title']}"
-                return tmp, fulltitle, sum(1 for _ in tmp['entries']), False, None
+                size = tmp.get('playlist_count')
+                if size is None:
+                    size = sum(1 for _ in tmp['entries'])
+                new_items = size - known['len'] if known.get('len') is not None else None
+                return tmp, fulltitle, size, False, None, new_items
     except Exception as e:
         print(f"YoutubeDL failed to obtain the playlist title. Perhaps you mistyped the URL or the playlist is private (in which case a solution would be to make it unlisted or public). error : {e}")
         raise
@@ -473,10 +1988,255 @@ def log_date() -> None:
         f.write(f"{datetime.datetime.now()}\n")
 
 
-def check_for_unmuxed_videos(root: Path) -> None:
+def is_unmuxed_file( file_name: str ) -> bool:
+    ''' Returns True for yt-dlp intermediate format files (eg: ``title.f137.mp4``) '''
+    file_path_stem = file_name.rpartition('.')[0]
+    return len(file_path_stem)>5 and file_path_stem[-5:-3]=='.f'
+
+
+def find_unmuxed_files( root: Path, store: Optional['PlaylistStateStore'] = None, touched_dirs: Iterable[Path] = () ) -> List[Path]:
+    ''' Returns unmuxed files under ``root``.
+    If a state store is given, its directory index (directory -> mtime) is used to only list
+    directories that were modified since the last scan, or touched during this run
+    (``touched_dirs``). Subdirectories of unmodified directories are still checked, as
+    their own modification doesn't change their parent's mtime.
+    Directories that still contain unmuxed files are indexed without mtime, so they are listed again next time.
+    '''
+    known = store.scan_index() if store is not None else {}
+    known_subdirs = defaultdict(list)
+    for _dir, (parent, _) in known.items():
+        known_subdirs[parent].append(_dir)
+    touched = { p.as_posix() for p in touched_dirs }
+    new_index = {}
+    unmuxed_files = []
+    nb_listed = 0
+    to_visit = [ (root.as_posix(), None) ]
+    while to_visit:
+        _dir, parent = to_visit.pop()
+        try:
+            mtime_ns = os.stat(_dir).st_mtime_ns
+        except FileNotFoundError:
+            continue
+        if _dir not in touched and _dir in known and known[_dir][1]==mtime_ns:
+            # unmodified: no need to list it, but its subdirectories may have changed
+            new_index[_dir] = known[_dir]
+            to_visit.extend( (d, _dir) for d in known_subdirs[_dir] )
+            continue
+        nb_listed += 1
+        has_unmuxed_files = False
+        with os.scandir(_dir) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    to_visit.append( (entry.path, _dir) )
+                elif is_unmuxed_file(entry.name):
+                    unmuxed_files.append( Path(entry.path) )
+                    has_unmuxed_files = True
+        new_index[_dir] = (parent, -1 if has_unmuxed_files else mtime_ns)
+
+    LOG.debug("Listed %d directories in %s (%d indexed)", nb_listed, root, len(new_index))
+    if store is not None:
+        store.set_scan_index( new_index )
+    return unmuxed_files
+
+
+class FFmpegProgressMonitor:
+    ''' Reports FFmpeg progress events (see ``FFmpegRunner``) to ``PROGRESS_BOARD``,
+    like ``YDLDownloadMonitor`` does for downloads '''
+
+    def __init__( self, name: str ) -> None:
+        self.name = name
+        self.progress: Optional[DownloadProgress] = None
+        self.last_logged_percent = -1
+
+    def hook( self, d: dict ) -> None:
+        ''' Will be called on FFmpeg progress '''
+        if self.progress is None:
+            self.progress = PROGRESS_BOARD.start( self.name, 'ffmpeg' )
+        if d['status']=='finished':
+            PROGRESS_BOARD.finish( self.progress, 'finished' )
+            self.progress = None
+            return
+        percent = d.get('percent')
+        self.progress.percent = percent
+        total_size = d.get('total_size') or ''
+        self.progress.total = int(total_size) if total_size.isdigit() else None
+        self.progress.speed = d.get('speed')
+        PROGRESS_BOARD.refresh()
+        if PROGRESS_TO_FILE and percent is not None and percent >= self.last_logged_percent + 10:
+            self.last_logged_percent = percent
+            LOG.info("%s (ffmpeg): %.1f%%", self.name, percent)
+
+
+class FFmpegRunner:
+    ''' Runs FFmpeg asynchronously, streaming its output line by line instead of buffering it:
+    - machine-readable progress (``-progress pipe:1``) is parsed into events passed to ``progress_hooks``:
+      ``{ 'status': <'running'|'finished'>, 'out_time_ms', 'total_size', 'speed', 'percent' }``;
+    - only the last lines of FFmpeg's log are kept (for error messages), so memory use is bounded;
+    - the process can be stopped with ``cancel()`` (from any thread) or after ``timeout`` seconds;
+    - success means exit code 0 and an output file that exists, isn't empty and (if ffprobe is
+      available) can be probed.
+    '''
+
+    DURATION_PATTERN = re.compile(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)")
+
+    def __init__( self, args: List[Any], output: Path, timeout: Optional[float] = None, progress_hooks: Iterable[Callable[[dict],None]] = () ) -> None:
+        self.args = [ str(a) for a in args ]
+        self.output = output
+        self.timeout = timeout
+        self.progress_hooks = list(progress_hooks)
+        self.log_tail = deque(maxlen=30)
+        self.duration_ms = None
+        self.returncode = None
+        self._process = None
+        self._loop = None
+        self._cancelled = False
+
+    def _emit( self, event: dict ) -> None:
+        for hook in self.progress_hooks:
+            hook(event)
+
+    async def _read_progress( self, stream: 'asyncio.StreamReader' ) -> None:
+        event = {}
+        async for raw_line in stream:
+            key, _, value = raw_line.decode('utf8', errors='replace').strip().partition('=')
+            if key!='progress':
+                event[key] = value
+                continue
+            out_time_ms = event.get('out_time_us', event.get('out_time_ms', ''))
+            progress = {
+                'status': 'finished' if value=='end' else 'running',
+                'out_time_ms': int(out_time_ms)//1000 if out_time_ms.isdigit() else None,
+                'total_size': event.get('total_size'),
+                'speed': event.get('speed'),
+                'percent': None
+            }
+            if self.duration_ms and progress['out_time_ms'] is not None:
+                progress['percent'] = min( 100.0, 100 * progress['out_time_ms'] / self.duration_ms )
+            self._emit( progress )
+            event = {}
+
+    async def _read_log( self, stream: 'asyncio.StreamReader' ) -> None:
+        async for raw_line in stream:
+            line = raw_line.decode('utf8', errors='replace').rstrip()
+            self.log_tail.append(line)
+            if self.duration_ms is None:
+                res = FFmpegRunner.DURATION_PATTERN.search(line)
+                if res:
+                    hours, minutes, seconds = res.groups()
+                    self.duration_ms = int( (int(hours)*3600 + int(minutes)*60 + float(seconds)) * 1000 )
+
+    async def run_async( self ) -> bool:
+        ''' Runs FFmpeg; returns True on success. Raises TimeoutError on timeout. '''
+        import asyncio
+        self._loop = asyncio.get_running_loop()
+        self._process = await asyncio.create_subprocess_exec(
+            'ffmpeg', '-hide_banner', '-nostdin', '-nostats', '-progress', 'pipe:1', *self.args, str(self.output),
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        if self._cancelled:
+            self._process.terminate()
+        readers = asyncio.gather( self._read_progress(self._process.stdout), self._read_log(self._process.stderr) )
+        try:
+            await asyncio.wait_for( asyncio.shield(readers), timeout=self.timeout )
+            self.returncode = await self._process.wait()
+        except asyncio.TimeoutError:
+            self._process.kill()
+            await self._process.wait()
+            await readers
+            raise TimeoutError(f"FFmpeg didn't finish within {self.timeout}s") from None
+        return not self._cancelled and self.returncode==0 and self._probe_output()
+
+    def run( self ) -> bool:
+        ''' Synchronous version of ``run_async`` '''
+        import asyncio
+        return asyncio.run( self.run_async() )
+
+    def cancel( self ) -> None:
+        ''' Stops FFmpeg; safe to call from any thread '''
+        self._cancelled = True
+        if self._loop is not None and self._process is not None and self._process.returncode is None:
+            self._loop.call_soon_threadsafe( self._process.terminate )
+
+    def _probe_output( self ) -> bool:
+        ''' Checks output file looks valid '''
+        if not self.output.is_file() or self.output.stat().st_size==0:
+            return False
+        if shutil.which('ffprobe') is None:
+            return True
+        probe = subprocess.run(
+            [ 'ffprobe', '-v', 'error', '-show_entries', 'format=duration', '-of', 'csv=p=0', str(self.output) ],
+            stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, check=False
+        )
+        return probe.returncode==0 and bool(probe.stdout.strip())
+
+
+def mux_mp4( destination: Path, mp4_video: Path, m4a_audio: Path, timeout: Optional[float] = None ) -> None:
+    ''' Muxes video and audio streams into ``destination`` using FFmpeg, then deletes them.
+    ``destination`` is overwritten if it exists, and deleted if muxing fails. '''
+    runner = FFmpegRunner(
+        args=[ '-y', '-i', mp4_video, '-i', m4a_audio, '-c', 'copy' ],
+        output=destination,
+        timeout=timeout,
+        progress_hooks=[ FFmpegProgressMonitor(destination.stem).hook ]
+    )
+    try:
+        success = runner.run()
+    except BaseException:
+        # FFmpeg was killed (timeout, interrupted run): remove partial output
+        destination.unlink(missing_ok=True)
+        raise
+    if not success:
+        destination.unlink(missing_ok=True)
+        log_tail = '\n'.join(runner.log_tail)
+        raise RuntimeError(f"FFmpeg failed (exit code {runner.returncode}); check output for errors:\n{log_tail}")
+    mp4_video.unlink()
+    m4a_audio.unlink()
+
+
+def extract_audio_tracks( video_files: Iterable[Path], download_dir: Path, audio_dir: str = 'Audio' ) -> List[Path]:
+    ''' Copies (no re-encoding) the audio stream of downloaded videos to the audio folder,
+    mirroring their location relative to ``download_dir``; returns created audio files.
+    Used instead of downloading the audio stream a second time for ``[audio]`` playlists.
+    '''
+    created = []
+    for video_file in video_files:
+        try:
+            relative_path = video_file.relative_to(download_dir)
+        except ValueError:
+            LOG.warning("Can't extract audio from '%s': not in %s", video_file, download_dir)
+            continue
+        audio_file = (download_dir / audio_dir / relative_path).with_suffix( AUDIO_COPY_EXT.get(video_file.suffix, '.mka') )
+        if audio_file.exists():
+            LOG.debug("Audio file '%s' already exists", audio_file)
+            continue
+        audio_file.parent.mkdir(parents=True, exist_ok=True)
+        LOG.info("Extracting audio to %s ..", audio_file)
+        runner = FFmpegRunner(
+            args=[ '-i', video_file, '-map', '0:a:0', '-vn', '-c:a', 'copy' ],
+            output=audio_file,
+            timeout=SETTINGS['remux_timeout'] or None,
+            progress_hooks=[ FFmpegProgressMonitor(audio_file.stem).hook ]
+        )
+        try:
+            success = runner.run()
+        except TimeoutError:
+            success = False
+        if not success:
+            log_tail = '\n'.join(runner.log_tail)
+            LOG.error("Audio extraction failed for '%s' (exit code %s):\n%s", video_file, runner.returncode, log_tail)
+            audio_file.unlink(missing_ok=True)
+            continue
+        created.append(audio_file)
+    return created
+
+
+def check_for_unmuxed_videos( root: Path, store: Optional['PlaylistStateStore'] = None, touched_dirs: Iterable[Path] = () ) -> None:
     ''' Unfortunately it happens that some videos don't get muxed,
     leaving corresponding .mp4 and .m4a files instead.
-    This attempts to fix it.
+    This attempts to fix it, running FFmpeg jobs in parallel (see ``remux_workers`` setting).
+    See ``find_unmuxed_files`` for ``store`` and ``touched_dirs``.
     '''
     def group_by(elements: Iterable[Any], criterion: Callable) -> dict:
         res = defaultdict(list)
@@ -484,36 +2244,18 @@ def check_for_unmuxed_videos(root: Path) -> None:
             res[criterion(e)].append(e)
         return res
 
-    def mux_mp4(destination_title: str, mp4_video: Path, m4a_audio: Path) -> None:
-        LOG.info("Muxing %s ..", destination_title)
-        command = [
-            'ffmpeg',
-            '-i', mp4_video,
-            '-i', m4a_audio,
-            '-c', 'copy',
-            '-loglevel', 'info',
-            (mp4_video.parent / destination_title)
-        ]
-        output = subprocess.check_output(command, shell=False, universal_newlines=True, stderr=subprocess.STDOUT)
-        # On success, last line FFmpeg ouputs contains stats. Here we check for them.
-        if 'muxing overhead' not in output:
-            raise RuntimeError(f"FFmpeg failed; check output for errors:\n{output}")
-        mp4_video.unlink()
-        m4a_audio.unlink()
-
-    is_unmuxed_file = lambda file_path_stem: len(file_path_stem)>5 and file_path_stem[-5:-3]=='.f'
-    unmuxed_files = list(
-        _file
-        for _file in root.rglob('*.*')
-        if is_unmuxed_file(_file.stem)
-    )
+    metrics_labels = { 'path': root.as_posix() }
+    with METRICS.timer( 'unmuxed_scan', **metrics_labels ):
+        unmuxed_files = find_unmuxed_files( root, store, touched_dirs )
     if not unmuxed_files:
         LOG.info("Non unmuxed video found!")
+        return
 
-    actual_title = lambda _f: _f.stem if len(_f.stem)<6 else _f.stem[:-5]
+    actual_title = lambda _f: _f.parent / (_f.stem if len(_f.stem)<6 else _f.stem[:-5])
     unmuxed_file_couples = group_by(unmuxed_files, actual_title)
     LOG.info("Found %d unmuxed videos!", len(list(unmuxed_file_couples.keys())))
 
+    mux_jobs = {}
     for title,elements in unmuxed_file_couples.items():
         if len(elements)!=2:
             LOG.warning("%d elements for title='%s', elements=%s", len(elements), title, elements)
@@ -524,12 +2266,1398 @@ def check_for_unmuxed_videos(root: Path) -> None:
             LOG.warning("video_components=%s", video_components)
             continue
 
-        mux_mp4( 
-            destination_title=(title + '.mp4'),
-            mp4_video=video_components['.mp4'][0],
-            m4a_audio=video_components['.m4a'][0]
+        mux_jobs[title] = {
+            'destination': title.with_name(title.name + '.mp4'),
+            'mp4_video': video_components['.mp4'][0],
+            'm4a_audio': video_components['.m4a'][0],
+            'timeout': SETTINGS['remux_timeout'] or None
+        }
+
+    # FFmpeg does the work in its own process; threads only wait for it
+    workers = SETTINGS['remux_workers'] or os.cpu_count() or 1
+    with METRICS.timer( 'remux', **metrics_labels ), ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = { executor.submit(mux_mp4, **kwargs): title for title, kwargs in mux_jobs.items() }
+        for idx, future in enumerate(as_completed(futures), start=1):
+            title = futures[future]
+            try:
+                future.result()
+                LOG.info("[%d/%d] Muxed %s", idx, len(futures), title.name)
+                METRICS.inc( 'remux_jobs', status='success', **metrics_labels )
+            except TimeoutError:
+                LOG.error("[%d/%d] Muxing %s timed out after %ss", idx, len(futures), title.name, SETTINGS['remux_timeout'])
+                METRICS.inc( 'remux_jobs', status='timeout', **metrics_labels )
+            except Exception as e:
+                LOG.error("[%d/%d] Muxing %s failed: %s", idx, len(futures), title.name, e)
+                METRICS.inc( 'remux_jobs', status='failure', **metrics_labels )
+
+
+############################## State store section ##############################
+
+DB_SETUP_LOCK = threading.Lock()
+# Journal mode of databases of surveiled paths: WAL needs shared memory between the processes using
+# a database, which runners on other hosts or containers don't have (see `open_job_queue`)
+DB_JOURNAL_MODE = 'wal'
+
+
+def connect_db( db_file: Path, journal_mode: Optional[str] = None, read_only: bool = False ) -> sqlite3.Connection:
+    ''' Connects to SQLite database ``db_file``, waiting up to a minute for locks held by other
+    connections. The journal mode (default: ``DB_JOURNAL_MODE``) is persistent: it is only set by the
+    first connection to a new database, or to a database last used in another mode. Switching it fails
+    at once while another connection (possibly of another process) uses the database, instead of
+    waiting like other statements do: it is retried until it is set.
+    If ``read_only``, the database must exist and is used in whatever journal mode it is in.
+    '''
+    if read_only:
+        return sqlite3.connect( f"{db_file.resolve().as_uri()}?mode=ro", uri=True, timeout=60 )
+    journal_mode = journal_mode or DB_JOURNAL_MODE
+    con = sqlite3.connect( db_file.as_posix(), timeout=60 )
+    if con.execute( "PRAGMA journal_mode" ).fetchone()[0]==journal_mode:
+        return con
+    deadline = time.monotonic() + 60
+    with DB_SETUP_LOCK:
+        while con.execute( "PRAGMA journal_mode" ).fetchone()[0]!=journal_mode:
+            try:
+                con.execute( f"PRAGMA journal_mode={journal_mode}" )
+            except sqlite3.OperationalError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep( 0.05 )
+    return con
+
+
+class IndexRanges:
+    ''' Set of positive integers (playlist indexes) stored as sorted, disjoint,
+    non-adjacent intervals. String representation is compatible with yt-dlp's
+    ``playlist_items`` syntax, eg: ``1-1200,1205,1300-4999``.
+    Membership test and interval lookup for merging are O(log n) (n: number of intervals).
+    '''
+
+    def __init__( self, items: Iterable[int] = () ) -> None:
+        self._starts: List[int] = []
+        self._ends: List[int] = []
+        self.update( items )
+
+    @classmethod
+    def parse( cls, s: Optional[str] ) -> 'IndexRanges':
+        ''' Reverse of ``str(IndexRanges)`` '''
+        res = cls()
+        for part in (s or '').split(','):
+            part = part.strip()
+            if not part:
+                continue
+            start, _, end = part.partition('-')
+            res.add_range( int(start), int(end or start) )
+        return res
+
+    def add_range( self, start: int, end: int ) -> None:
+        ''' Adds all integers in [start,end] '''
+        if end < start:
+            return
+        # intervals overlapping or adjacent to [start,end] are those in [lo,hi)
+        lo = bisect.bisect_left( self._ends, start - 1 )
+        hi = bisect.bisect_right( self._starts, end + 1 )
+        if lo < hi:
+            start = min( start, self._starts[lo] )
+            end = max( end, self._ends[hi-1] )
+        self._starts[lo:hi] = [start]
+        self._ends[lo:hi] = [end]
+
+    def add( self, x: int ) -> None:
+        ''' Adds integer x '''
+        self.add_range( x, x )
+
+    def update( self, items: Iterable[int] ) -> None:
+        ''' Adds all integers from ``items`` (or all ranges from another IndexRanges) '''
+        if isinstance( items, IndexRanges ):
+            for start, end in items.ranges():
+                self.add_range( start, end )
+            return
+        for x in sorted( items ):
+            self.add( x )
+
+    def ranges( self ) -> Iterator[Tuple[int,int]]:
+        ''' Yields ( <start>, <end> ) closed intervals '''
+        return zip( self._starts, self._ends )
+
+    def complement( self, start: int, end: int ) -> 'IndexRanges':
+        ''' Returns integers in [start,end] that are not in this set '''
+        res = IndexRanges()
+        cursor = start
+        for r_start, r_end in self.ranges():
+            if r_end < cursor:
+                continue
+            if r_start > end:
+                break
+            if r_start > cursor:
+                res.add_range( cursor, r_start - 1 )
+            cursor = r_end + 1
+        res.add_range( cursor, end )
+        return res
+
+    def __contains__( self, x: int ) -> bool:
+        idx = bisect.bisect_right( self._starts, x ) - 1
+        return idx >= 0 and x <= self._ends[idx]
+
+    def __len__( self ) -> int:
+        return sum( end - start + 1 for start, end in self.ranges() )
+
+    def __bool__( self ) -> bool:
+        return bool( self._starts )
+
+    def __iter__( self ) -> Iterator[int]:
+        for start, end in self.ranges():
+            yield from range( start, end + 1 )
+
+    def __eq__( self, other: object ) -> bool:
+        return isinstance( other, IndexRanges ) and self._starts==other._starts and self._ends==other._ends
+
+    def __str__( self ) -> str:
+        return ','.join( str(start) if start==end else f"{start}-{end}" for start, end in self.ranges() )
+
+    def __repr__( self ) -> str:
+        return f"IndexRanges({str(self)!r})"
+
+
+class PlaylistStateStore:
+    ''' Per-user download state (formerly ``AutoYoutubeDL.json``), stored in an SQLite
+    database (see ``connect_db``): each playlist update is a small atomic transaction instead of
+    a rewrite of the whole file. Completed playlist indexes are stored as ``IndexRanges``.
+    Videos deferred for lack of disk space (see ``DiskBudget``) are stored per playlist.
+    '''
+
+    FIELDS = ('title', 'len', 'len_checked', 'last_scan', 'last_video_id', 'last_upload', 'upload_interval', 'scanned_len')
+    SCHEMA_VERSION = 6
+
+    def __init__( self, db_file: Path, read_only: bool = False ) -> None:
+        ''' If ``read_only``, opens an existing database as is: without creating tables nor upgrading
+        it, which callers have to check with ``outdated``. '''
+        self.db_file = db_file
+        self.con = connect_db( db_file, read_only=read_only )
+        if read_only:
+            return
+        self.con.execute( "PRAGMA synchronous=NORMAL" )
+        with self.con:
+            self.con.execute(
+                "CREATE TABLE IF NOT EXISTS playlist ("
+                "url TEXT PRIMARY KEY, title TEXT, len INTEGER, len_checked TEXT, last_scan TEXT, last_video_id TEXT, "
+                "done TEXT NOT NULL DEFAULT '', extra TEXT NOT NULL DEFAULT '{}', last_upload REAL, upload_interval REAL, scanned_len INTEGER)"
+            )
+            # since version 2: directory index for `find_unmuxed_files`
+            self.con.execute(
+                "CREATE TABLE IF NOT EXISTS scan_index (dir TEXT PRIMARY KEY, parent TEXT, mtime_ns INTEGER NOT NULL)"
+            )
+            # since version 4: videos deferred for lack of disk space
+            self.con.execute(
+                "CREATE TABLE IF NOT EXISTS deferred ("
+                "url TEXT NOT NULL, video_id TEXT NOT NULL, size INTEGER, reason TEXT, deferred_at REAL NOT NULL, "
+                "PRIMARY KEY (url, video_id))"
+            )
+            # since version 6: size of the files of the surveiled path, for its quota (see `DiskBudget`)
+            self.con.execute(
+                "CREATE TABLE IF NOT EXISTS disk_usage (id INTEGER PRIMARY KEY CHECK (id=0), size INTEGER NOT NULL, counted_at REAL NOT NULL)"
+            )
+            self._upgrade_schema()
+
+    def _upgrade_schema( self ) -> None:
+        ''' Upgrades databases created by earlier versions '''
+        version = self.con.execute( "PRAGMA user_version" ).fetchone()[0]
+        if version < 1 and self.con.execute( "SELECT 1 FROM sqlite_master WHERE type='table' AND name='done'" ).fetchone():
+            # version 0: completed indexes were stored one per row in table `done`
+            LOG.info("Upgrading %s to schema version 1 ..", self.db_file)
+            self.con.execute( "ALTER TABLE playlist ADD COLUMN done TEXT NOT NULL DEFAULT ''" )
+            done = defaultdict(list)
+            for url, idx in self.con.execute( "SELECT url, idx FROM done" ):
+                done[url].append(idx)
+            self.con.executemany(
+                "UPDATE playlist SET done=? WHERE url=?",
+                ( (str(IndexRanges(indexes)), url) for url, indexes in done.items() )
+            )
+            self.con.execute( "DROP TABLE done" )
+        columns = { row[1] for row in self.con.execute( "PRAGMA table_info(playlist)" ) }
+        for column in ('last_upload', 'upload_interval'):
+            if column not in columns:
+                # since version 3: upload cadence, for adaptive polling
+                self.con.execute( f"ALTER TABLE playlist ADD COLUMN {column} REAL" )
+        if 'scanned_len' not in columns:
+            # since version 5: playlist size when all its items were last gone through (see `has_pending_items`)
+            self.con.execute( "ALTER TABLE playlist ADD COLUMN scanned_len INTEGER" )
+        self.con.execute( f"PRAGMA user_version={PlaylistStateStore.SCHEMA_VERSION}" )
+
+    def outdated( self ) -> bool:
+        ''' Whether the database was created by an earlier version, and is only readable once upgraded '''
+        return self.con.execute( "PRAGMA user_version" ).fetchone()[0] < PlaylistStateStore.SCHEMA_VERSION
+
+    def get( self, url: str ) -> Optional[dict]:
+        ''' Returns state for given playlist, or None if unknown; format is the
+        same as an ``AutoYoutubeDL.json`` entry, except ``done`` is an ``IndexRanges`` '''
+        row = self.con.execute(
+            f"SELECT {', '.join(PlaylistStateStore.FIELDS)}, done, extra FROM playlist WHERE url=?", (url,)
+        ).fetchone()
+        if row is None:
+            return None
+        res = json.loads(row[-1])
+        res.update( (k, v) for k, v in zip(PlaylistStateStore.FIELDS, row) if v is not None )
+        res['done'] = IndexRanges.parse(row[-2])
+        return res
+
+    def update( self, url: str, done: Iterable[int] = (), deferred: Optional[Dict[str,Tuple[Optional[int],str]]] = None, added_bytes: int = 0, **fields ) -> None:
+        ''' Atomically updates state for given playlist: sets ``fields``, adds ``done`` indexes
+        to the set of completed items and, unless None, replaces deferred videos with ``deferred``:
+        ``{ <video id>: ( <estimated size|None>, <reason> ) }``. ``added_bytes`` (size of files
+        downloaded for the playlist) is added to the size of the files of the surveiled path. '''
+        unknown_fields = set(fields) - set(PlaylistStateStore.FIELDS)
+        assert not unknown_fields, f"Unknown fields {unknown_fields}"
+        with self.con:
+            self.con.execute( "INSERT OR IGNORE INTO playlist (url) VALUES (?)", (url,) )
+            if done:
+                row = self.con.execute( "SELECT done FROM playlist WHERE url=?", (url,) ).fetchone()
+                all_done = IndexRanges.parse(row[0])
+                all_done.update(done)
+                fields = dict(fields, done=str(all_done))
+            if fields:
+                self.con.execute(
+                    f"UPDATE playlist SET {', '.join(f'{k}=?' for k in fields)} WHERE url=?",
+                    (*fields.values(), url)
+                )
+            if deferred is not None:
+                self.con.execute( "DELETE FROM deferred WHERE url=?", (url,) )
+                self.con.executemany(
+                    "INSERT INTO deferred (url, video_id, size, reason, deferred_at) VALUES (?,?,?,?,?)",
+                    ( (url, video_id, size, reason, time.time()) for video_id, (size, reason) in deferred.items() )
+                )
+            if added_bytes:
+                self.con.execute( "UPDATE disk_usage SET size=size+?", (added_bytes,) )
+
+    def scan_index( self ) -> Dict[str,Tuple[Optional[str],int]]:
+        ''' Returns directory index: { <dir>: ( <parent_dir>, <mtime_ns> ) } '''
+        return { _dir: (parent, mtime_ns) for _dir, parent, mtime_ns in self.con.execute( "SELECT dir, parent, mtime_ns FROM scan_index" ) }
+
+    def set_scan_index( self, index: Dict[str,Tuple[Optional[str],int]] ) -> None:
+        ''' Replaces directory index '''
+        with self.con:
+            self.con.execute( "DELETE FROM scan_index" )
+            self.con.executemany(
+                "INSERT INTO scan_index (dir, parent, mtime_ns) VALUES (?,?,?)",
+                ( (_dir, parent, mtime_ns) for _dir, (parent, mtime_ns) in index.items() )
+            )
+
+    def disk_usage( self ) -> Optional[Tuple[int,float]]:
+        ''' Returns ( <size of the files of the surveiled path>, <time they were last counted> ), None if never counted '''
+        return self.con.execute( "SELECT size, counted_at FROM disk_usage" ).fetchone()
+
+    def set_disk_usage( self, size: int ) -> None:
+        ''' Records the size of the files of the surveiled path, as just counted '''
+        with self.con:
+            self.con.execute( "INSERT OR REPLACE INTO disk_usage (id, size, counted_at) VALUES (0,?,?)", (size, time.time()) )
+
+    def deferred( self ) -> Dict[str,Tuple[int,int]]:
+        ''' Returns playlists with deferred videos: ``{ <url>: ( <number of videos>, <estimated size of those of known size> ) }`` '''
+        return {
+            url: (count, size)
+            for url, count, size in self.con.execute( "SELECT url, COUNT(*), IFNULL(SUM(size), 0) FROM deferred GROUP BY url" )
+        }
+
+    def migrate_json( self, json_db: Path ) -> int:
+        ''' Imports entries from a legacy ``AutoYoutubeDL.json`` file in a single transaction,
+        then renames it so it isn't imported again; returns number of imported entries '''
+        legacy_db = json.loads( json_db.read_text(encoding='utf8') )
+        with self.con:
+            for url, entry in legacy_db.items():
+                fields = { k: entry[k] for k in PlaylistStateStore.FIELDS if k in entry }
+                fields['done'] = str(IndexRanges(entry.get('done', [])))
+                extra = { k: v for k, v in entry.items() if k not in fields }
+                self.con.execute(
+                    f"INSERT OR REPLACE INTO playlist (url, {', '.join(fields)}, extra) VALUES ({', '.join('?'*(len(fields)+2))})",
+                    (url, *fields.values(), json.dumps(extra))
+                )
+        json_db.rename( json_db.with_suffix('.json.migrated') )
+        return len(legacy_db)
+
+    def close( self ) -> None:
+        ''' Closes database '''
+        self.con.close()
+
+
+def open_state_store( surveiled_path_p: Path ) -> PlaylistStateStore:
+    ''' Opens download state store for given surveiled path, importing legacy JSON DB if present '''
+    store = PlaylistStateStore( surveiled_path_p / 'AutoYoutubeDL.sqlite' )
+    json_db = surveiled_path_p / 'AutoYoutubeDL.json'
+    if json_db.is_file():
+        LOG.info("Migrating %s to %s ..", json_db, store.db_file)
+        nb_entries = store.migrate_json( json_db )
+        LOG.info("Migrated %d entries", nb_entries)
+    return store
+
+
+class JobJournal:
+    ''' Write-ahead journal of playlist jobs of a surveiled path: an append-only JSON lines file
+    recording, for each playlist/channel URL, the probe summary (``probed``), planned items and
+    format (``planned``) and the state of each item (``downloading``, ``merged``, ``moved``),
+    until the result is committed to the state store (``committed``).
+    After an interrupted run, ``replay`` tells what was done, so that the next run resumes
+    where it stopped. Safe to use from several threads (and processes: lines are appended
+    with a single write each).
+    '''
+
+    def __init__( self, journal_file: Path ) -> None:
+        self.journal_file = journal_file
+        self._lock = threading.Lock()
+        self._f = None
+
+    def record( self, url: str, event: str, **data ) -> None:
+        ''' Appends event for playlist/channel ``url`` '''
+        line = json.dumps( dict( t=round(time.time(), 3), url=url, event=event, **data ) ) + '\n'
+        with self._lock:
+            if self._f is None:
+                self._f = self.journal_file.open('a', encoding='utf8')
+            self._f.write(line)
+            self._f.flush()
+
+    def replay( self ) -> Dict[str,dict]:
+        ''' Returns jobs that were interrupted (not committed):
+        ``{ <url>: { 'summary': <last probe summary|None>, 'planned': <last planned event|None>, 'moved': <IndexRanges> } }``
+        '''
+        jobs = {}
+        if not self.journal_file.is_file():
+            return jobs
+        with self.journal_file.open(encoding='utf8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    LOG.warning("Ignoring truncated line in %s", self.journal_file)
+                    continue
+                url, event = entry['url'], entry['event']
+                if event=='committed':
+                    jobs.pop(url, None)
+                    continue
+                job = jobs.setdefault( url, { 'summary': None, 'planned': None, 'moved': IndexRanges() } )
+                if event=='probed':
+                    job['summary'] = entry['summary']
+                elif event=='planned':
+                    job['planned'] = entry
+                elif event=='moved' and entry.get('index') is not None:
+                    job['moved'].add( entry['index'] )
+        return jobs
+
+    def close( self, clear: bool = False ) -> None:
+        ''' Closes journal; ``clear`` deletes it (when all jobs were committed) '''
+        with self._lock:
+            if self._f is not None:
+                self._f.close()
+                self._f = None
+            if clear:
+                self.journal_file.unlink(missing_ok=True)
+
+
+JOURNALS: Dict[Path,JobJournal] = {}
+
+
+def journal_for( surveiled_path_p: Path ) -> JobJournal:
+    ''' Returns job journal of given surveiled path '''
+    journal = JOURNALS.get(surveiled_path_p)
+    if journal is None:
+        # setdefault is atomic: concurrent workers get the same journal
+        journal = JOURNALS.setdefault( surveiled_path_p, JobJournal( surveiled_path_p / 'AutoYoutubeDL.journal.jsonl' ) )
+    return journal
+
+
+class DownloadArchive:
+    ''' Per-user download archive, stored in the state store database: IDs of downloaded videos,
+    as ``<extractor> <video ID>`` like yt-dlp's ``download_archive``, for each kind of download
+    (``video`` or ``audio``) and with the playlist/channel they were downloaded for. Unlike
+    completed playlist indexes, IDs aren't fooled by playlists being reordered.
+    IDs of a kind are loaded in memory on first lookup, so lookups are O(1); IDs missing from
+    memory are looked up in the database, which may have been updated by other worker processes.
+    ``view`` returns set-like objects used as YoutubeDL's ``download_archive``.
+    '''
+
+    def __init__( self, db_file: Path ) -> None:
+        self.db_file = db_file
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._ids: Dict[str,set] = {}
+        con = self.con
+        with con:
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS archive ("
+                "kind TEXT NOT NULL, archive_id TEXT NOT NULL, playlist TEXT NOT NULL, added REAL NOT NULL, PRIMARY KEY (kind, archive_id))"
+            )
+            con.execute( "CREATE INDEX IF NOT EXISTS archive_playlist ON archive (playlist)" )
+
+    @property
+    def con( self ) -> sqlite3.Connection:
+        ''' Connection of the current thread (and process) '''
+        con = getattr( self._local, 'con', None )
+        if con is None or self._local.pid!=os.getpid():
+            con = connect_db( self.db_file )
+            con.execute( "PRAGMA synchronous=NORMAL" )
+            self._local.con, self._local.pid = con, os.getpid()
+        return con
+
+    def _loaded( self, kind: str ) -> set:
+        ''' In-memory IDs of given kind '''
+        with self._lock:
+            ids = self._ids.get(kind)
+            if ids is None:
+                ids = self._ids[kind] = { row[0] for row in self.con.execute( "SELECT archive_id FROM archive WHERE kind=?", (kind,) ) }
+        return ids
+
+    def contains( self, kind: str, archive_id: str ) -> bool:
+        ''' Returns True if ``archive_id`` was downloaded as ``kind`` '''
+        ids = self._loaded(kind)
+        if archive_id in ids:
+            return True
+        if self.con.execute( "SELECT 1 FROM archive WHERE kind=? AND archive_id=?", (kind, archive_id) ).fetchone() is None:
+            return False
+        with self._lock:
+            ids.add(archive_id)
+        return True
+
+    def add( self, kind: str, archive_ids: Iterable[str], playlist: str ) -> None:
+        ''' Records ``archive_ids`` as downloaded as ``kind`` for ``playlist`` '''
+        archive_ids = list(archive_ids)
+        now = time.time()
+        con = self.con
+        with con:
+            con.executemany(
+                "INSERT OR IGNORE INTO archive (kind, archive_id, playlist, added) VALUES (?,?,?,?)",
+                ( (kind, archive_id, playlist, now) for archive_id in archive_ids )
+            )
+        ids = self._loaded(kind)
+        with self._lock:
+            ids.update(archive_ids)
+
+    def has_playlist( self, playlist: str ) -> bool:
+        ''' Returns True if anything was recorded for ``playlist`` '''
+        return self.con.execute( "SELECT 1 FROM archive WHERE playlist=? LIMIT 1", (playlist,) ).fetchone() is not None
+
+    def view( self, kind: str, playlist: str ) -> 'DownloadArchive.View':
+        ''' Returns set-like view of ``kind`` downloads, recording new ones for ``playlist`` '''
+        return DownloadArchive.View( self, kind, playlist )
+
+    class View:
+        ''' Set-like view of a download archive, as expected by YoutubeDL (``in`` and ``add``) '''
+
+        def __init__( self, archive: 'DownloadArchive', kind: str, playlist: str ) -> None:
+            self.archive = archive
+            self.kind = kind
+            self.playlist = playlist
+
+        def __contains__( self, archive_id: str ) -> bool:
+            return self.archive.contains( self.kind, archive_id )
+
+        def __bool__( self ) -> bool:
+            return True # YoutubeDL doesn't look empty archives up, but IDs may be in the database only
+
+        def add( self, archive_id: str ) -> None:
+            ''' Records download '''
+            self.archive.add( self.kind, [archive_id], self.playlist )
+
+
+ARCHIVES: Dict[Path,DownloadArchive] = {}
+
+
+def archive_for( surveiled_path_p: Path ) -> DownloadArchive:
+    ''' Returns download archive of given surveiled path '''
+    archive = ARCHIVES.get(surveiled_path_p)
+    if archive is None:
+        archive = ARCHIVES.setdefault( surveiled_path_p, DownloadArchive( surveiled_path_p / 'AutoYoutubeDL.sqlite' ) )
+    return archive
+
+
+############################## Metadata cache section ##############################
+
+class MetadataCache:
+    ''' On-disk cache of playlist/channel probe results (see ``get_playlist_infos``),
+    stored next to the download state store and keyed by URL.
+
+    Each entry gets a TTL depending on its tier:
+    - ``hot``: content changed recently (within ``dormant_after`` days);
+    - ``dormant``: content didn't change for a while, so it is probed less often.
+    When an entry expires it is revalidated by a probe: if the summary's "ETag"
+    (title, size and latest video) didn't change, only its TTL is extended.
+    Least recently used entries are evicted beyond ``max_entries``.
+    '''
+
+    TIERS = ('hot', 'dormant')
+
+    def __init__( self, cache_file: Path, ttl: Dict[str,int], dormant_after: int, max_entries: int, read_only: bool = False ) -> None:
+        ''' If ``read_only``, opens an existing cache file as is, for ``get( touch=False )`` only. '''
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.dormant_after = dormant_after
+        self.max_entries = max_entries
+        self.read_only = read_only
+        self.con = connect_db( cache_file, read_only=read_only )
+        if read_only:
+            return
+        self.con.execute(
+            "CREATE TABLE IF NOT EXISTS metadata ("
+            "url TEXT PRIMARY KEY, summary TEXT NOT NULL, etag TEXT NOT NULL, tier TEXT NOT NULL, "
+            "fetched_at REAL NOT NULL, changed_at REAL NOT NULL, expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self.con.commit()
+
+    @staticmethod
+    def etag( summary: dict ) -> str:
+        ''' Fingerprint of the parts of a summary that denote new content '''
+        return json.dumps( [ summary.get(k) for k in ('title', 'len', 'latest_video_id') ] )
+
+    def get( self, url: str, touch: bool = True ) -> Optional[dict]:
+        ''' Returns cached summary for ``url`` if it hasn't expired, None otherwise.
+        Entry is marked as recently used (for eviction) if ``touch``. '''
+        now = time.time()
+        row = self.con.execute( "SELECT summary, expires_at FROM metadata WHERE url=?", (url,) ).fetchone()
+        if row is None:
+            return None
+        if touch:
+            self.con.execute( "UPDATE metadata SET last_access=? WHERE url=?", (now, url) )
+            self.con.commit()
+        summary, expires_at = row
+        return json.loads(summary) if now < expires_at else None
+
+    def put( self, url: str, summary: dict, ttl: Optional[float] = None ) -> str:
+        ''' Stores (or revalidates) summary for ``url``; returns the tier it was assigned.
+        The entry expires after ``ttl`` seconds if given, otherwise after its tier's TTL. '''
+        now = time.time()
+        etag = MetadataCache.etag(summary)
+        row = self.con.execute( "SELECT etag, changed_at FROM metadata WHERE url=?", (url,) ).fetchone()
+        changed_at = row[1] if row is not None and row[0]==etag else now
+        tier = 'dormant' if now - changed_at > self.dormant_after * 86400 else 'hot'
+        self.con.execute(
+            "INSERT OR REPLACE INTO metadata (url, summary, etag, tier, fetched_at, changed_at, expires_at, last_access) VALUES (?,?,?,?,?,?,?,?)",
+            (url, json.dumps(summary), etag, tier, now, changed_at, now + (self.ttl[tier] if ttl is None else ttl), now)
         )
-        
+        self.con.commit()
+        return tier
+
+    def next_expiry( self, urls: Iterable[str] ) -> Optional[float]:
+        ''' Returns the earliest expiry time among cached entries for ``urls`` (None if none is cached) '''
+        urls = set(urls)
+        return min( (
+            expires_at
+            for url, expires_at in self.con.execute( "SELECT url, expires_at FROM metadata" )
+            if url in urls
+        ), default=None )
+
+    def evict( self ) -> None:
+        ''' Removes least recently used entries in excess of ``max_entries`` '''
+        cur = self.con.execute(
+            "DELETE FROM metadata WHERE url NOT IN (SELECT url FROM metadata ORDER BY last_access DESC LIMIT ?)",
+            (self.max_entries,)
+        )
+        if cur.rowcount:
+            LOG.debug("Evicted %d entries from %s", cur.rowcount, self.cache_file)
+        self.con.commit()
+
+    def close( self ) -> None:
+        ''' Evicts excess entries (unless read-only) and closes database '''
+        if not self.read_only:
+            self.evict()
+        self.con.close()
+
+
+def open_metadata_cache( surveiled_path_p: Path, read_only: bool = False ) -> MetadataCache:
+    ''' Opens metadata cache for given surveiled path, using settings from config '''
+    return MetadataCache(
+        cache_file=surveiled_path_p / 'AutoYoutubeDL.cache.sqlite',
+        ttl={ tier: SETTINGS[f'cache_ttl_{tier}'] for tier in MetadataCache.TIERS },
+        dormant_after=SETTINGS['cache_dormant_after'],
+        max_entries=SETTINGS['cache_max_entries'],
+        read_only=read_only
+    )
+
+
+def has_pending_items( db_entry: Optional[dict], summary: dict ) -> bool:
+    ''' Returns True if DB entry suggests there is something left to download
+    for a playlist/channel described by cached summary '''
+    if not db_entry:
+        return True
+    if summary['is_channel']:
+        return db_entry.get('last_video_id')!=summary['latest_video_id']
+    if db_entry.get('scanned_len')==summary['len']:
+        # all items were gone through since the playlist last changed size: items left failed
+        # (eg: unavailable videos), they are retried once cached infos expire instead of every run
+        return False
+    return bool( db_entry.get('done', IndexRanges()).complement( 1, summary['len'] ) )
+
+
+# Weight of the latest interval between uploads in their moving average (see ``upload_cadence_fields``)
+UPLOAD_INTERVAL_EWMA_ALPHA = 0.3
+
+
+def upload_cadence_fields( db_entry: dict, result: dict, now: float ) -> dict:
+    ''' Returns DB fields to update if probe result (see ``process_playlist``) shows new content:
+    ``last_upload`` (time new content was detected) and ``upload_interval`` (exponentially
+    weighted moving average of intervals between uploads, in seconds).
+    '''
+    if result['is_channel']:
+        uploaded = result['latest_video_id'] is not None and result['latest_video_id']!=db_entry.get('last_video_id')
+    else:
+        uploaded = result['len'] is not None and result['len'] > (db_entry.get('len') or 0)
+    if not uploaded:
+        return {}
+    if db_entry.get('last_upload') is None:
+        # First content seen: only a reference for the next interval
+        return { 'last_upload': now }
+    interval = now - db_entry['last_upload']
+    if db_entry.get('upload_interval') is not None:
+        interval = UPLOAD_INTERVAL_EWMA_ALPHA * interval + (1 - UPLOAD_INTERVAL_EWMA_ALPHA) * db_entry['upload_interval']
+    return { 'last_upload': now, 'upload_interval': interval }
+
+
+def next_probe_delay( db_entry: Optional[dict], now: float ) -> Optional[float]:
+    ''' Adaptive polling: returns seconds until playlist/channel should be probed again, based
+    on its upload cadence (see ``upload_cadence_fields``), or None without enough history.
+    Probing resumes halfway through the expected interval between uploads, then backs off
+    exponentially (each delay is the time elapsed since probing resumed) until new content
+    is detected. Delays are kept between ``cache_ttl_hot`` and ``max_staleness``.
+    '''
+    if not db_entry or db_entry.get('upload_interval') is None or db_entry.get('last_upload') is None:
+        return None
+    window_start = db_entry['last_upload'] + db_entry['upload_interval'] / 2
+    delay = window_start - now if now < window_start else now - window_start
+    return min( max( delay, SETTINGS['cache_ttl_hot'] ), SETTINGS['max_staleness'] )
+
+
+############################## Content index section ##############################
+
+FICLONE = 0x40049409 # Linux ioctl cloning a file's extents (reflink), on btrfs/xfs/..
+
+
+def link_file( source: Path, destination: Path, mode: str = 'hardlink' ) -> None:
+    ''' Makes ``destination`` a copy of ``source`` without copying data: a hard link, or
+    a reflink (copy-on-write clone) with ``mode='reflink'``, which falls back to a hard link
+    where it isn't available. Both files must be on the same volume. '''
+    destination.parent.mkdir( parents=True, exist_ok=True )
+    if mode=='reflink' and fcntl is not None:
+        try:
+            with source.open('rb') as src, destination.open('wb') as dst:
+                fcntl.ioctl( dst.fileno(), FICLONE, src.fileno() )
+            shutil.copystat( source, destination )
+            return
+        except OSError as e:
+            LOG.debug("Could not reflink %s (%s); hard linking it instead", source, e)
+            destination.unlink( missing_ok=True )
+    os.link( source, destination )
+
+
+class ContentIndex:
+    ''' Index of downloaded files shared by all surveiled paths, keyed by ``( <video ID>, <format> )``.
+    Each file is recorded with its size, a sample hash (see ``sample_hash``) and the device it is on,
+    so that a video downloaded by another user can be hard linked (or reflinked) instead of being
+    downloaded again, as long as it is on the same volume. Stale entries (file deleted or modified)
+    are dropped when looked up. Connections are per thread/process, as downloads run concurrently.
+    '''
+
+    SAMPLE_SIZE = 1 << 20
+
+    def __init__( self, index_file: Path ) -> None:
+        self.index_file = index_file
+        self._local = threading.local()
+        con = self.con
+        con.execute(
+            "CREATE TABLE IF NOT EXISTS content ("
+            "video_id TEXT NOT NULL, format TEXT NOT NULL, path TEXT NOT NULL, size INTEGER NOT NULL, hash TEXT NOT NULL, "
+            "dev INTEGER NOT NULL, linked INTEGER NOT NULL, added REAL NOT NULL, PRIMARY KEY (video_id, format, path))"
+        )
+        con.commit()
+
+    @property
+    def con( self ) -> sqlite3.Connection:
+        ''' Connection of the current thread (and process) '''
+        con = getattr( self._local, 'con', None )
+        if con is None or self._local.pid!=os.getpid():
+            con = connect_db( self.index_file )
+            self._local.con, self._local.pid = con, os.getpid()
+        return con
+
+    @staticmethod
+    def sample_hash( file: Path, size: Optional[int] = None ) -> str:
+        ''' Cheap fingerprint of a (large) file: hash of its size and first/last ``SAMPLE_SIZE`` bytes '''
+        size = file.stat().st_size if size is None else size
+        h = hashlib.blake2b( str(size).encode(), digest_size=16 )
+        with file.open('rb') as f:
+            h.update( f.read(ContentIndex.SAMPLE_SIZE) )
+            if size > ContentIndex.SAMPLE_SIZE:
+                f.seek( max( ContentIndex.SAMPLE_SIZE, size - ContentIndex.SAMPLE_SIZE ) )
+                h.update( f.read() )
+        return h.hexdigest()
+
+    def add( self, video_id: str, fmt: str, file: Path, linked: bool = False ) -> None:
+        ''' Records ``file`` as a copy of video ``video_id`` in format ``fmt``; ``linked`` means
+        it was linked from another copy (it is counted in space saved) '''
+        st = file.stat()
+        con = self.con
+        con.execute(
+            "INSERT OR REPLACE INTO content (video_id, format, path, size, hash, dev, linked, added) VALUES (?,?,?,?,?,?,?,?)",
+            (video_id, fmt, file.resolve().as_posix(), st.st_size, ContentIndex.sample_hash(file, st.st_size), st.st_dev, int(linked), time.time())
+        )
+        con.commit()
+
+    def _is_valid( self, row: tuple ) -> bool:
+        ''' Returns True if indexed file still exists unmodified '''
+        path, size, _hash = row
+        try:
+            return Path(path).stat().st_size==size and ContentIndex.sample_hash( Path(path), size )==_hash
+        except OSError:
+            return False
+
+    def _drop( self, video_id: str, fmt: str, path: str ) -> None:
+        con = self.con
+        con.execute( "DELETE FROM content WHERE video_id=? AND format=? AND path=?", (video_id, fmt, path) )
+        con.commit()
+
+    def lookup( self, video_id: str, fmt: str, dev: int ) -> Optional[Path]:
+        ''' Returns a valid copy of video ``video_id`` in format ``fmt`` on device ``dev``, if any '''
+        for row in self.con.execute( "SELECT path, size, hash FROM content WHERE video_id=? AND format=? AND dev=?", (video_id, fmt, dev) ).fetchall():
+            if self._is_valid(row):
+                return Path(row[0])
+            LOG.debug("Dropping stale content index entry %s", row[0])
+            self._drop( video_id, fmt, row[0] )
+        return None
+
+    def report( self ) -> None:
+        ''' Logs index size and disk space saved by linking files '''
+        files, size, linked, saved = self.con.execute( "SELECT COUNT(*), TOTAL(size), TOTAL(linked), TOTAL(linked * size) FROM content" ).fetchone()
+        LOG.info("Content index: %d file(s) (%s); %d linked instead of downloaded, saving %s", files, format_bytes(size), linked, format_bytes(saved))
+
+    def close( self ) -> None:
+        ''' Closes connection of the current thread '''
+        con = getattr( self._local, 'con', None )
+        if con is not None:
+            con.close()
+            self._local.con = None
+
+
+CONTENT_INDEX = None
+
+
+def content_index() -> ContentIndex:
+    ''' Returns content index, opening it on first use '''
+    global CONTENT_INDEX
+    if CONTENT_INDEX is None:
+        CONTENT_INDEX = ContentIndex( SCRIPT_DIR / 'AutoYoutubeDL.content.sqlite' )
+    return CONTENT_INDEX
+
+
+class ContentDeduplicator:
+    ''' Links videos already downloaded for another surveiled path, instead of downloading them.
+    ``match_filter`` is given to YoutubeDL: just before a video is downloaded, it looks its ID up
+    in the content index and, if a copy is found on the same volume, links it where YoutubeDL
+    would have written the video and skips its download. ``postprocessor_hook`` adds downloaded
+    files to the index. Linked videos are reported to ``postp_monitor`` as downloaded (unless None).
+    ``ydl`` must be set to the YoutubeDL instance running the download.
+    '''
+
+    def __init__( self, fmt: str, download_dir: Path, postp_monitor: Optional['YDLPostProcessMonitor'], metrics_labels: Optional[dict] = None ) -> None:
+        self.fmt = fmt
+        self.dev = download_dir.stat().st_dev
+        self.postp_monitor = postp_monitor
+        self.metrics_labels = metrics_labels or {}
+        self.ydl = None
+
+    def match_filter( self, info_dict: dict, incomplete: bool = False ) -> Optional[str]:
+        ''' YoutubeDL match filter: returns a reason to skip download if the video could be linked '''
+        if incomplete or SETTINGS['dedup_mode']=='off' or self.ydl is None or not info_dict.get('id'):
+            return None
+        destination = Path( self.ydl.prepare_filename(info_dict) )
+        if destination.exists():
+            return None # YoutubeDL handles already downloaded files
+        source = content_index().lookup( info_dict['id'], self.fmt, self.dev )
+        if source is None:
+            return None
+        try:
+            link_file( source, destination, SETTINGS['dedup_mode'] )
+        except OSError as e:
+            LOG.warning("Could not link %s to %s, downloading it instead: %s", source, destination, e)
+            return None
+        content_index().add( info_dict['id'], self.fmt, destination, linked=True )
+        self.ydl.record_download_archive( info_dict )
+        if self.postp_monitor is not None:
+            self.postp_monitor.linked( info_dict, destination )
+        METRICS.inc( 'videos_linked', **self.metrics_labels )
+        METRICS.inc( 'dedup_linked_bytes', destination.stat().st_size, **self.metrics_labels )
+        return f"{info_dict['id']}: linked from existing copy '{source}'"
+
+    def postprocessor_hook( self, d: dict ) -> None:
+        ''' Indexes files once moved to their final location '''
+        if d['status']=='finished' and d['postprocessor']=='MoveFiles' and d['info_dict'].get('filepath'):
+            filepath = Path( d['info_dict']['filepath'] )
+            if filepath.is_file():
+                content_index().add( d['info_dict']['id'], self.fmt, filepath )
+
+
+############################## Scheduler section ##############################
+
+class PlaylistJob:
+    ''' Describes the processing of one playlist/channel URL for a surveiled path.
+    Only holds picklable data, so it can be sent to a process pool worker.
+    '''
+
+    def __init__( self, url: str, do_extract_audio: Optional[str], download_dir: Path, db_entry: Optional[dict], cached: Optional[dict] = None, profile: Optional[str] = None ) -> None:
+        self.url = url
+        self.do_extract_audio = do_extract_audio
+        self.profile = profile # tuning profile name, None for default profile
+        self.download_dir = download_dir
+        self.db_entry = db_entry # snapshot: only the scheduler's caller writes to the DB
+        self.cached = cached # fresh summary from MetadataCache, if any
+        self.probe = None # result of `probe_playlist`, when probed ahead of download
+        self.host = urlparse(url).netloc.lower()
+
+    def __repr__( self ) -> str:
+        return f"PlaylistJob({self.url!r}, {self.download_dir.as_posix()!r})"
+
+
+def probe_playlist( job: PlaylistJob ) -> dict:
+    ''' First stage of ``process_playlist``: probes playlist/channel (unless a cached probe summary
+    was given) and tells whether there is something to download. Returns a result (see
+    ``process_playlist``) with status ``'unavailable'``, ``'skipped'`` or ``'pending'``; pending
+    results also hold (picklable) arguments for ``download_playlist`` as ``playlist``.
+    '''
+    db_entry = job.db_entry or {}
+    metrics_labels = { 'path': job.download_dir.as_posix(), 'playlist': job.url }
+    if job.cached is not None:
+        LOG.info("Using cached infos for '%s'", job.url)
+        playlist_title, playlist_len, playlist_is_yt_channel, latest_video_id = [
+            job.cached[k] for k in ('title', 'len', 'is_channel', 'latest_video_id')
+        ]
+        # still valid unless the known latest video changed since the probe
+        new_items = job.cached.get('new_items') if job.cached.get('new_items_since')==db_entry.get('last_video_id') else None
+        summary = None
+    else:
+        try:
+            with METRICS.timer( 'probe', **metrics_labels ):
+                playlist_infos, playlist_title, playlist_len, playlist_is_yt_channel, latest_video_id, new_items = get_playlist_infos(
+                    job.url,
+                    known=db_entry,
+                    probe_size=SETTINGS['probe_size'],
+                    len_max_age=SETTINGS['len_max_age']
+                )
+        except yt_dlp.utils.ExtractorError:
+            LOG.warning("Playlist %s does not exist or is private!", job.url)
+            METRICS.inc( 'playlists_unavailable', **metrics_labels )
+            return { 'status': 'unavailable' }
+        summary = {
+            'title': playlist_title,
+            'len': playlist_len,
+            'is_channel': playlist_is_yt_channel,
+            'latest_video_id': latest_video_id,
+            # number of new items, counted from the known latest video (see `get_playlist_infos`)
+            'new_items': new_items,
+            'new_items_since': db_entry.get('last_video_id'),
+            # only fields used by `output_template`
+            'infos': { k: playlist_infos.get(k) for k in ('id', 'title', 'channel') }
+        }
+
+    res = {
+        'status': 'skipped',
+        'title': playlist_title,
+        'len': playlist_len,
+        'is_channel': playlist_is_yt_channel,
+        'latest_video_id': latest_video_id,
+        'new_items': new_items,
+        'successful_downloads': None,
+        'touched_dirs': [],
+        'summary': summary
+    }
+
+    # Restriction: scan channels only if a new video was uploaded
+    if playlist_is_yt_channel:
+        # if db_entry.get('last_scan') == (datetime.date.today() - datetime.timedelta(days=1)).strftime("%Y%m%d"):
+        #     LOG.info("Skipping channel scan: Already scanned today.")
+        #     return res
+        if db_entry.get('last_video_id') == latest_video_id:
+            LOG.info("Skipping channel scan: No new video detected.")
+            METRICS.inc( 'playlists_skipped', reason='no_new_video', **metrics_labels )
+            return res
+
+    res['status'] = 'pending'
+    res['playlist'] = {
+        'url'  : job.url,
+        'title': db_entry.get('title', playlist_title),
+        'len'  : playlist_len,
+        'is_channel': playlist_is_yt_channel,
+        'items_completed' : db_entry.get('done'),
+        'last_scan' : db_entry.get('last_scan'),
+        'new_items' : new_items,
+        'do_extract_audio': job.do_extract_audio,
+        'profile': job.profile,
+        'infos': (summary or job.cached)['infos']
+    }
+    res['batch_key'] = batch_key( res['playlist'] )
+    return res
+
+
+def batch_key( playlist: dict ) -> Optional[tuple]:
+    ''' Probed playlists with the same key can be downloaded by a single YoutubeDL invocation
+    (see ``PlaylistScheduler`` and ``download_playlists``), as they share options (audio, tuning
+    profile). None for those that shouldn't:
+    when batching is disabled, for channels and for playlists with more than ``batch_max_items``
+    items left to download.
+    '''
+    if SETTINGS['batch_size'] <= 1 or playlist['is_channel']:
+        return None
+    if len( (playlist['items_completed'] or IndexRanges()).complement( 1, playlist['len'] or 0 ) ) > SETTINGS['batch_max_items']:
+        return None
+    return ( playlist['do_extract_audio'], playlist.get('profile') )
+
+
+def process_playlist( job: PlaylistJob ) -> dict:
+    ''' Worker function: probes (unless already done, see ``PlaylistJob.probe``) then downloads a playlist/channel.
+    Doesn't write to the DB; instead returns a result for the caller to commit:
+    ``{ 'status': <'unavailable'|'skipped'|'processed'>, 'title', 'len', 'is_channel', 'latest_video_id', 'new_items', 'successful_downloads', 'touched_dirs', 'deferred', 'archived', 'added_bytes', 'summary' }``
+    ``summary`` is the probe summary to be cached, or None if the cached one was used.
+    '''
+    if job.probe is None:
+        job.probe = probe_playlist(job)
+    if job.probe['status']!='pending':
+        return job.probe
+    return process_playlist_batch( [ job ] )[0]
+
+
+def process_playlist_batch( jobs: List[PlaylistJob] ) -> List[dict]:
+    ''' Worker function: downloads probed playlists of a surveiled path, with a single YoutubeDL
+    invocation when possible (see ``download_playlists``). Returns a result per job, like ``process_playlist``.
+    '''
+    results, playlists = [], []
+    for job in jobs:
+        res = dict(job.probe)
+        playlists.append( res.pop('playlist') )
+        res['status'] = 'processed'
+        journal_for(job.download_dir).record( job.url, 'probed', summary=res['summary'] or job.cached )
+        results.append( res )
+    downloads = download_playlists( playlists=playlists, download_dir=jobs[0].download_dir )
+    for res, download in zip( results, downloads ):
+        res.update( download )
+    return results
+
+
+def commit_playlist_result( store: PlaylistStateStore, playlist_url_s: str, result: dict ) -> None:
+    ''' Applies result returned by ``process_playlist`` to DB, in a single transaction '''
+    if result['status']=='unavailable':
+        return
+
+    playlist_title = result['title']
+    db_entry = store.get(playlist_url_s)
+    fields, done = {}, ()
+    if db_entry is None:
+        LOG.info("Added new playlist/channel: %s", playlist_title)
+        db_entry = {}
+        fields['title'] = playlist_title
+    elif db_entry.get('title')!=playlist_title:
+        LOG.warning("Playlist title mismatch: db_entry['title']=%s, playlist_title=%s", db_entry.get('title'), playlist_title)
+
+    # Channel size is an estimate unless it was recounted (see `get_playlist_infos`)
+    if result['len'] is not None:
+        len_was_counted = not (
+            result['is_channel']
+            and result['new_items'] is not None
+            and stored_len_is_fresh( db_entry, SETTINGS['len_max_age'] )
+        )
+        if len_was_counted:
+            fields['len_checked'] = datetime.date.today().strftime("%Y%m%d")
+        fields['len'] = result['len']
+
+    # Save progress
+    successful_downloads = result['successful_downloads']
+    deferred = result.get('deferred') or {}
+    if result['status']=='skipped':
+        pass
+    elif result['is_channel'] and deferred:
+        # the channel is scanned again by next run, which downloads deferred videos (others are in download archive)
+        LOG.debug("Scan incomplete: %d videos deferred", len(deferred))
+    elif result['is_channel']:
+        LOG.debug("Scan done")
+        fields['last_scan'] = (datetime.date.today() - datetime.timedelta(days=1)).strftime("%Y%m%d")
+        fields['last_video_id'] = result['latest_video_id']
+    else:
+        if successful_downloads:
+            LOG.debug("Successfully downloaded %s", successful_downloads)
+        else:
+            LOG.debug("Did nothing")
+        # items in download archive were downloaded before, possibly at another index
+        done = sorted( set(successful_downloads or ()) | set(result.get('archived') or ()) )
+        # all items were gone through: those left failed (eg: unavailable videos), unless deferred
+        fields['scanned_len'] = None if deferred else result['len']
+
+    # Upload cadence, only known from fresh probes
+    if result.get('summary') is not None:
+        fields.update( upload_cadence_fields( db_entry, result, time.time() ) )
+
+    store.update( playlist_url_s, done=done, deferred=deferred, added_bytes=result.get('added_bytes', 0), **fields )
+
+
+def resume_interrupted_jobs( journal: JobJournal, store: PlaylistStateStore ) -> Dict[str,dict]:
+    ''' Replays journal left by an interrupted run: playlist items that were fully downloaded
+    are committed to the state store, then the journal is restarted with the probe summaries
+    of interrupted jobs. Returns ``{ <url>: <probe summary> }`` for interrupted jobs, so that
+    they are resumed without probing again (.part files are resumed by YoutubeDL).
+    '''
+    interrupted = journal.replay()
+    res = {}
+    for url, job in interrupted.items():
+        LOG.info("Resuming interrupted job for %s (%d item(s) were downloaded)", url, len(job['moved']))
+        summary = job['summary']
+        if summary is None:
+            continue
+        if job['moved'] and not summary['is_channel']:
+            store.update( url, done=job['moved'] )
+        res[url] = summary
+    journal.close( clear=True )
+    for url, summary in res.items():
+        journal.record( url, 'probed', summary=summary )
+    return res
+
+
+def worker_process_config() -> tuple:
+    ''' Returns the arguments of ``init_worker_process``: the configuration of this process '''
+    return ( dict(SETTINGS), GOVERNOR.share, DISK_BUDGET.usage(), PROGRESS_TO_FILE, DB_JOURNAL_MODE, log_queue_h.queue )
+
+
+def init_worker_process( settings: dict, share: float, disk_usage: Dict[str,int], progress_to_file: bool, db_journal_mode: str, log_queue: Any ) -> None:
+    ''' Initializer of worker processes: applies the configuration of the main process (see
+    ``worker_process_config``). Forked processes inherit it, but processes started by spawn or forkserver
+    (the default start methods on macOS and Windows, and on Linux since Python 3.14) start from scratch.
+    Their records are sent to the log listener of the main process (see ``share_log_queue``).
+    '''
+    global PROGRESS_TO_FILE, DB_JOURNAL_MODE
+    if log_queue_h.queue is not log_queue:
+        # not forked: records logged at import time stay in the startup buffer of this process
+        log_listener.stop()
+        log_queue_h.queue = log_queue
+        log_queue_h.addFilter( stamp_log_context )
+        logging.getLogger().setLevel( settings['log_level'].upper() )
+    SETTINGS.update(settings)
+    PROGRESS_TO_FILE = progress_to_file
+    DB_JOURNAL_MODE = db_journal_mode
+    import_yt_dlp()
+    GOVERNOR.configure( settings, share=share )
+    PROGRESS_BOARD.configure( settings )
+    DISK_BUDGET.configure( settings )
+    DISK_BUDGET.set_usage( disk_usage )
+
+
+class PlaylistScheduler:
+    ''' Runs playlist jobs from all surveiled paths as a two-stage pipeline:
+    probes (``probe_playlist``, on ``probe_workers`` threads) run ahead of downloads
+    (``process_playlist``, on a bounded pool of ``workers``), so that probing the next
+    playlists overlaps with downloading the current ones:
+    - at most ``prefetch`` probed jobs wait for a download worker (bounded queue: probing
+      pauses when downloads can't keep up);
+    - jobs are handed out round-robin between users (surveiled paths), so that
+      a user with many playlists can't starve the others;
+    - at most ``max_per_host`` probes, and ``max_per_host`` downloads, run concurrently for any given host;
+    - with ``batch_size`` > 1, probed jobs of a user with the same ``batch_key`` (small playlists)
+      are downloaded together (``process_playlist_batch``), up to ``batch_size`` jobs at once;
+      at least ``batch_size`` probed jobs may then wait for a download worker;
+    - once enqueued jobs are all handed out, more are taken from ``claim`` if given (eg: from a
+      ``JobQueue`` shared with other runners), one job at a time;
+    - results are yielded to the calling thread, which is expected to be the
+      only one of the process writing to state stores.
+    '''
+
+    def __init__( self, workers: int = 1, worker_type: str = 'thread', max_per_host: int = 2, probe_workers: int = 1, prefetch: int = 2, batch_size: int = 1, claim: Optional[Callable[[],List[PlaylistJob]]] = None ) -> None:
+        self.workers = workers
+        self.worker_type = worker_type
+        self.max_per_host = max_per_host
+        self.probe_workers = probe_workers
+        self.batch_size = batch_size
+        self.prefetch = max( prefetch, batch_size ) if batch_size > 1 else prefetch
+        self.claim = claim
+        self._queues: Dict[Path,deque] = {} # jobs to probe
+        self._ready: Dict[Path,deque] = {} # probed jobs, waiting for a download worker
+        self._rotation = deque()
+        self._running_per_host = defaultdict(int)
+        self._probing_per_host = defaultdict(int)
+
+    def add_jobs( self, user: Path, jobs: Iterable[PlaylistJob] ) -> None:
+        ''' Enqueues jobs for given user (surveiled path) '''
+        if user not in self._queues:
+            self._queues[user] = deque()
+            self._ready[user] = deque()
+            self._rotation.append(user)
+        self._queues[user].extend(jobs)
+
+    def jobs_left( self, user: Path ) -> int:
+        ''' Number of jobs for given user that were not handed out yet '''
+        return len(self._queues.get(user, ())) + len(self._ready.get(user, ()))
+
+    def _next_job( self, queues: Dict[Path,deque], running_per_host: Dict[str,int] ) -> Optional[PlaylistJob]:
+        ''' Returns next eligible job from ``queues`` in round-robin order, or None if no job can
+        be started right now (no job left, or remaining jobs are on busy hosts) '''
+        for _ in range(len(self._rotation)):
+            user = self._rotation[0]
+            self._rotation.rotate(-1)
+            queue = queues[user]
+            for idx, job in enumerate(queue):
+                if running_per_host[job.host] < self.max_per_host:
+                    del queue[idx]
+                    return job
+        return None
+
+    def _batch_mates( self, job: PlaylistJob ) -> List[PlaylistJob]:
+        ''' Removes from the ready queue, and returns, jobs that can be downloaded along with ``job`` '''
+        key = job.probe.get('batch_key')
+        if self.batch_size <= 1 or key is None:
+            return []
+        queue = self._ready[job.download_dir]
+        mates = [ other for other in queue if other.host==job.host and other.probe.get('batch_key')==key ][ : self.batch_size - 1 ]
+        for other in mates:
+            queue.remove(other)
+        return mates
+
+    def _probing_for( self, user: Path, probing: Dict[Future,PlaylistJob] ) -> bool:
+        ''' Whether jobs of given user are still to be probed '''
+        return bool(self._queues[user]) or any( job.download_dir==user for job in probing.values() )
+
+    def run( self, worker: Callable[[PlaylistJob],dict] = process_playlist, prober: Callable[[PlaylistJob],dict] = probe_playlist, batch_worker: Callable[[List[PlaylistJob]],List[dict]] = process_playlist_batch ) -> Iterator[Tuple[PlaylistJob,Optional[dict]]]:
+        ''' Processes enqueued jobs; yields ( <job>, <result> ) as they complete.
+        ``result`` is None if the job failed with an unexpected exception.
+        '''
+        if self.worker_type=='process':
+            share_log_queue()
+            executor_class = functools.partial( ProcessPoolExecutor, initializer=init_worker_process, initargs=worker_process_config() )
+        else:
+            executor_class = ThreadPoolExecutor
+        LOG.info(
+            "Starting scheduler: %d probe worker(s), %d %s download worker(s), at most %d job(s) per host, %d job(s) probed ahead, batches of up to %d job(s)",
+            self.probe_workers, self.workers, self.worker_type, self.max_per_host, self.prefetch, self.batch_size
+        )
+        with ThreadPoolExecutor(max_workers=self.probe_workers) as probe_executor, executor_class(max_workers=self.workers) as executor:
+            probing, in_flight, probed_at = {}, {}, {}
+            while True:
+                # Download stage
+                while len(in_flight) < self.workers:
+                    job = self._next_job( self._ready, self._running_per_host )
+                    if job is None:
+                        break
+                    batch = [ job ] + self._batch_mates( job )
+                    if len(batch) < self.batch_size and job.probe.get('batch_key') is not None and in_flight and self._probing_for( job.download_dir, probing ):
+                        # partial batch: wait for mates being probed while other downloads keep workers busy
+                        self._ready[job.download_dir].extendleft( reversed(batch) )
+                        break
+                    for job in batch:
+                        METRICS.add_time( 'pipeline_wait', time.perf_counter() - probed_at.pop(job), path=job.download_dir.as_posix() )
+                    self._running_per_host[batch[0].host] += 1
+                    func, arg = ( worker, job ) if len(batch)==1 else ( batch_worker, batch )
+                    if self.worker_type=='process':
+                        # metrics recorded in worker processes are sent back with results
+                        func = functools.partial( run_job_with_metrics, func )
+                    in_flight[executor.submit(run_as_user, batch[0].download_dir, func, arg)] = batch
+                # Probe stage: runs ahead of downloads, up to `prefetch` jobs (+ idle download workers)
+                ready = sum( len(queue) for queue in self._ready.values() )
+                while len(probing) < self.probe_workers and len(probing) + ready < self.prefetch + self.workers - len(in_flight):
+                    job = self._next_job( self._queues, self._probing_per_host )
+                    if job is None and self.claim is not None and not any( self._queues.values() ):
+                        for claimed in self.claim():
+                            self.add_jobs( claimed.download_dir, [ claimed ] )
+                        job = self._next_job( self._queues, self._probing_per_host )
+                    if job is None:
+                        break
+                    self._probing_per_host[job.host] += 1
+                    probing[probe_executor.submit(run_as_user, job.download_dir, prober, job)] = job
+                if not in_flight and not probing:
+                    break
+                done, _ = wait( list(in_flight) + list(probing), return_when=FIRST_COMPLETED )
+                for future in done:
+                    if future in probing:
+                        job = probing.pop(future)
+                        self._probing_per_host[job.host] -= 1
+                        try:
+                            result = future.result()
+                        except Exception as e:
+                            LOG.error("Probing %s failed; check error message.\ne=%s", job, e)
+                            METRICS.inc( 'jobs_failed', path=job.download_dir.as_posix(), playlist=job.url )
+                            result = None
+                        if result is not None and result['status']=='pending':
+                            job.probe = result
+                            probed_at[job] = time.perf_counter()
+                            self._ready[job.download_dir].append(job)
+                        else:
+                            yield job, result
+                        continue
+                    batch = in_flight.pop(future)
+                    self._running_per_host[batch[0].host] -= 1
+                    try:
+                        results = future.result()
+                        if self.worker_type=='process':
+                            results, metrics = results
+                            METRICS.merge(metrics)
+                        if len(batch)==1:
+                            results = [ results ]
+                    except Exception as e:
+                        LOG.error("Job(s) %s failed; check error message.\ne=%s", batch, e)
+                        for job in batch:
+                            METRICS.inc( 'jobs_failed', path=job.download_dir.as_posix(), playlist=job.url )
+                        results = [ None ] * len(batch)
+                    for job, result in zip( batch, results ):
+                        yield job, result
+
+
+class JobQueue:
+    ''' Job queue shared by several runners (instances started with ``--runner``, possibly in
+    containers mounting the same volume), stored in an SQLite database: each (surveiled path,
+    playlist URL) job is leased to a single runner, so that runners process jobs in parallel
+    without downloading the same videos twice.
+    - a round of jobs is planned by the first runner finding none left (see ``plan``), within a
+      write transaction: other runners wait for it to be queued, then claim jobs of that round;
+    - jobs are claimed one at a time (see ``claim``), in turn for each surveiled path;
+    - leases last ``lease_duration`` seconds and are renewed by a heartbeat thread: jobs of a
+      runner that stopped are handed out again once their lease expired, at most ``MAX_ATTEMPTS`` times;
+    - the runner completing the last job of a surveiled path is told so (see ``complete``), to remux its files.
+    Write transactions start with ``BEGIN IMMEDIATE``: runners wait for each other (up to a minute)
+    instead of failing on a deadlock. The database isn't in WAL mode, which needs shared memory
+    between runners, and neither are databases of surveiled paths once the queue is opened (see
+    ``open_job_queue``): they must all be on volumes supporting file locks.
+    '''
+
+    MAX_ATTEMPTS = 3
+
+    def __init__( self, queue_file: Path, lease_duration: float = 300 ) -> None:
+        self.queue_file = queue_file
+        self.lease_duration = lease_duration
+        import platform
+        self.runner_id = f"{platform.node()}:{os.getpid()}:{os.urandom(3).hex()}"
+        self.con = self._connect()
+        with self._transaction( self.con ):
+            self.con.execute(
+                "CREATE TABLE IF NOT EXISTS job ("
+                "seq INTEGER PRIMARY KEY, user TEXT NOT NULL, url TEXT NOT NULL, do_extract_audio TEXT, cached TEXT, "
+                "state TEXT NOT NULL DEFAULT 'pending', owner TEXT, lease_until REAL, attempts INTEGER NOT NULL DEFAULT 0, "
+                "touched_dirs TEXT NOT NULL DEFAULT '[]', profile TEXT, UNIQUE (user, url))"
+            )
+            if 'profile' not in { row[1] for row in self.con.execute( "PRAGMA table_info(job)" ) }:
+                # queue created by a version without tuning profiles
+                self.con.execute( "ALTER TABLE job ADD COLUMN profile TEXT" )
+        self._stop = threading.Event()
+        self._heartbeat = None
+
+    def _connect( self ) -> sqlite3.Connection:
+        # autocommit mode: transactions are started explicitly (see `_transaction`)
+        return sqlite3.connect( self.queue_file.as_posix(), timeout=60, isolation_level=None )
+
+    @staticmethod
+    @contextlib.contextmanager
+    def _transaction( con: sqlite3.Connection ) -> Iterator[None]:
+        con.execute( "BEGIN IMMEDIATE" )
+        try:
+            yield
+        except BaseException:
+            con.execute( "ROLLBACK" )
+            raise
+        con.execute( "COMMIT" )
+
+    def plan( self, planner: Callable[[],Dict[Path,List[PlaylistJob]]] ) -> Optional[Dict[Path,List[PlaylistJob]]]:
+        ''' Starts a new round, unless jobs of the current one are left: queues jobs returned by
+        ``planner`` (per surveiled path), interleaved between surveiled paths. Returns planned jobs,
+        or None if a round is in progress. '''
+        with self._transaction( self.con ):
+            if self.con.execute( "SELECT 1 FROM job WHERE state IN ('pending','leased') LIMIT 1" ).fetchone():
+                return None
+            jobs = planner()
+            self.con.execute( "DELETE FROM job" )
+            self.con.executemany(
+                "INSERT INTO job (user, url, do_extract_audio, profile, cached) VALUES (?,?,?,?,?)",
+                (
+                    ( job.download_dir.as_posix(), job.url, job.do_extract_audio, job.profile, None if job.cached is None else json.dumps(job.cached) )
+                    for turn in itertools.zip_longest( *jobs.values() )
+                    for job in turn
+                    if job is not None
+                )
+            )
+        LOG.info("Planned %d job(s) for runners", sum( len(user_jobs) for user_jobs in jobs.values() ))
+        return jobs
+
+    def claim( self ) -> Optional[Tuple[Path,str,Optional[str],Optional[dict],Optional[str]]]:
+        ''' Leases next job to this runner; returns ( <surveiled path>, <playlist URL>, <do_extract_audio>,
+        <cached probe summary|None>, <tuning profile|None> ), or None if no job is left to claim '''
+        with self._transaction( self.con ):
+            while True:
+                row = self.con.execute(
+                    "SELECT seq, user, url, do_extract_audio, cached, attempts, owner, profile FROM job "
+                    "WHERE state='pending' OR (state='leased' AND lease_until < ?) ORDER BY seq LIMIT 1",
+                    (time.time(),)
+                ).fetchone()
+                if row is None:
+                    return None
+                seq, user, url, do_extract_audio, cached, attempts, owner, profile = row
+                if attempts >= JobQueue.MAX_ATTEMPTS:
+                    LOG.warning("Giving up job %s of %s: its runner stopped %d times", url, user, attempts)
+                    self.con.execute( "UPDATE job SET state='failed' WHERE seq=?", (seq,) )
+                    continue
+                if owner is not None:
+                    LOG.warning("Taking over job %s of %s from runner %s, whose lease expired", url, user, owner)
+                self.con.execute(
+                    "UPDATE job SET state='leased', owner=?, lease_until=?, attempts=attempts+1 WHERE seq=?",
+                    (self.runner_id, time.time() + self.lease_duration, seq)
+                )
+                break
+        if self._heartbeat is None:
+            self._heartbeat = threading.Thread( target=self._renew_leases, name='JobQueueHeartbeat', daemon=True )
+            self._heartbeat.start()
+        return Path(user), url, do_extract_audio, None if cached is None else json.loads(cached), profile
+
+    def complete( self, user: Path, url: str, touched_dirs: Iterable[Path] = (), failed: bool = False ) -> Optional[List[Path]]:
+        ''' Ends lease of a job, done (or ``failed``). If it was the last job of surveiled path
+        ``user`` left in the round, returns directories all its jobs downloaded to; None otherwise '''
+        user_s = user.as_posix()
+        with self._transaction( self.con ):
+            cursor = self.con.execute(
+                "UPDATE job SET state=?, lease_until=NULL, touched_dirs=? WHERE user=? AND url=? AND owner=? AND state='leased'",
+                ('failed' if failed else 'done', json.dumps([ Path(p).as_posix() for p in touched_dirs ]), user_s, url, self.runner_id)
+            )
+            if cursor.rowcount==0:
+                LOG.warning("Lease of job %s of %s expired before it completed: it was handed out to another runner", url, user_s)
+                return None
+            if self.con.execute( "SELECT 1 FROM job WHERE user=? AND state IN ('pending','leased') LIMIT 1", (user_s,) ).fetchone():
+                return None
+            return sorted({
+                Path(p)
+                for (dirs,) in self.con.execute( "SELECT touched_dirs FROM job WHERE user=?", (user_s,) )
+                for p in json.loads(dirs)
+            })
+
+    def pending( self ) -> int:
+        ''' Number of jobs that can be claimed '''
+        return self.con.execute(
+            "SELECT COUNT(*) FROM job WHERE state='pending' OR (state='leased' AND lease_until < ?)", (time.time(),)
+        ).fetchone()[0]
+
+    def _renew_leases( self ) -> None:
+        # heartbeat thread, with its own connection
+        con = self._connect()
+        try:
+            while not self._stop.wait( self.lease_duration / 3 ):
+                try:
+                    with self._transaction( con ):
+                        con.execute(
+                            "UPDATE job SET lease_until=? WHERE owner=? AND state='leased'",
+                            (time.time() + self.lease_duration, self.runner_id)
+                        )
+                except sqlite3.Error as e:
+                    LOG.warning("Could not renew job leases: %s", e)
+        finally:
+            con.close()
+
+    def close( self ) -> None:
+        ''' Stops heartbeat, then closes database '''
+        self._stop.set()
+        if self._heartbeat is not None:
+            self._heartbeat.join()
+        self.con.close()
+
+
+def open_job_queue( cfg: dict ) -> JobQueue:
+    ''' Opens job queue shared by runners (see ``JobQueue``). Databases of surveiled paths are
+    then opened in rollback journal mode, as runners may not share memory (see ``DB_JOURNAL_MODE``) '''
+    global DB_JOURNAL_MODE
+    DB_JOURNAL_MODE = 'truncate' # rollback journal, emptied instead of deleted by each commit
+    queue_file = Path(cfg['job_queue']) if cfg['job_queue'] else SCRIPT_DIR / 'AutoYoutubeDL.queue.sqlite'
+    LOG.info("Runner: sharing jobs through %s", queue_file)
+    return JobQueue( queue_file, lease_duration=cfg['lease_duration'] )
+
 
 ############################## 'main' section ##############################
 
@@ -543,6 +3671,12 @@ def main() -> None:
     global PROGRESS_TO_FILE
     PROGRESS_TO_FILE = cmd_args.log_progress
     LOG.info("PROGRESS_TO_FILE=%s", PROGRESS_TO_FILE)
+    DISK_BUDGET.rescan = cmd_args.count_usage
+
+    if cmd_args.daemon:
+        open_log_file( new_run=not cmd_args.runner )
+        run_daemon( runner=cmd_args.runner )
+        return
 
     # if not internet_available( host="http://www.youtube.com" ):
     #     print("Couldn't reach Youtube. Please check connection.")
@@ -551,85 +3685,284 @@ def main() -> None:
     # upgrade and import youtube_dl
     #upgrade_youtubedl()
     cfg = load_config()
-    for surveiled_path_p, surveiled_playlist_p, surveiled_playlist_db in surveiled_playlist_files(cfg):
-        LOG.info("Processing playlists in %s ..", surveiled_playlist_p)
-        
-        # Load DB
-        _db = json.loads(surveiled_playlist_db.read_text(), )
-        
-        # process playlists
-        for playlist_url_s, do_extract_audio in playlists_from_file(surveiled_playlist_p):
-            try:
-                playlist_infos, playlist_title, playlist_len, playlist_is_yt_channel, latest_video_id = get_playlist_infos(playlist_url_s)
-            except yt_dlp.utils.ExtractorError:
-                LOG.warning("Playlist %s does not exist or is private!", playlist_url_s)
-                continue
-            
-            if playlist_url_s not in _db:
-                LOG.info("Added new playlist/channel: %s", playlist_title)
-                _db[playlist_url_s] = {
-                    'title': playlist_title
-                }
-            elif _db[playlist_url_s]['title']!=playlist_title:
-                LOG.warning("Playlist title mismatch: _db[playlist_url_s]['title']=%s, playlist_title=%s", _db[playlist_url_s]['title'], playlist_title)
-            
-            # Restriction: scan channels only if a new video was uploaded
-            if playlist_is_yt_channel:
-                # if _db[playlist_url_s].get('last_scan') == (datetime.date.today() - datetime.timedelta(days=1)).strftime("%Y%m%d"):
-                #     LOG.info("Skipping channel scan: Already scanned today.")
-                #     continue
-                if _db[playlist_url_s].get('last_video_id') == latest_video_id:
-                    LOG.info("Skipping channel scan: No new video detected.")
+    SETTINGS.update(cfg)
+    job_queue = open_job_queue(cfg) if cmd_args.runner else None
+    try:
+        if not ( job_queue is not None and job_queue.pending() ) and not work_is_due(cfg):
+            LOG.info("Nothing to do: all playlists/channels were checked recently and are up to date.")
+            return
+        # runners share log files: they are rotated by size and age only
+        open_log_file( new_run=job_queue is None )
+        process_surveiled_paths(cfg, job_queue)
+    finally:
+        if job_queue is not None:
+            job_queue.close()
+
+
+def remux_surveiled_path( surveiled_path_p: Path, touched_dirs: Iterable[Path] = () ) -> None:
+    ''' Remux stage: runs on its own thread (with its own DB connection), so that
+    remuxing files of a user doesn't hold up jobs of other users '''
+    store = open_state_store(surveiled_path_p)
+    try:
+        with log_context( surveiled_path_p ):
+            check_for_unmuxed_videos(surveiled_path_p, store, touched_dirs)
+    finally:
+        store.close()
+
+
+def work_is_due( cfg: dict ) -> bool:
+    ''' Fast path of runs with nothing to do, which doesn't need yt-dlp: returns False if no
+    playlist/channel has to be checked or downloaded, ie. all have fresh cached infos and nothing
+    left to download, and no job was interrupted (same rules as ``process_surveiled_paths``).
+    Databases are opened read-only: a run with nothing to do writes nothing.
+    '''
+    for surveiled_path_p, surveiled_playlist_p in surveiled_playlist_files(cfg):
+        journal_file = surveiled_path_p / 'AutoYoutubeDL.journal.jsonl'
+        if journal_file.is_file() and journal_file.stat().st_size > 0:
+            LOG.info("Found interrupted jobs in %s", surveiled_path_p)
+            return True
+        if (surveiled_path_p / 'AutoYoutubeDL.json').is_file():
+            LOG.info("Found legacy DB to migrate in %s", surveiled_path_p)
+            return True
+        if not ( (surveiled_path_p / 'AutoYoutubeDL.sqlite').is_file() and (surveiled_path_p / 'AutoYoutubeDL.cache.sqlite').is_file() ):
+            # Nothing stored yet: due if there is any playlist
+            if next( iter(playlists_from_file(surveiled_playlist_p)), None ) is not None:
+                LOG.info("No download state in %s", surveiled_path_p)
+                return True
+            continue
+        store = PlaylistStateStore( surveiled_path_p / 'AutoYoutubeDL.sqlite', read_only=True )
+        cache = open_metadata_cache( surveiled_path_p, read_only=True )
+        try:
+            if store.outdated():
+                LOG.info("%s has to be upgraded", store.db_file)
+                return True
+            for playlist_url_s, _, _ in playlists_from_file(surveiled_playlist_p):
+                cached = cache.get( playlist_url_s, touch=False )
+                if cached is None or has_pending_items( store.get(playlist_url_s), cached ):
+                    LOG.info("'%s' is due", playlist_url_s)
+                    return True
+        finally:
+            cache.close()
+            store.close()
+    return False
+
+
+def queue_playlists( surveiled_path_p: Path, surveiled_playlist_p: Path, store: PlaylistStateStore, cache: MetadataCache, urls: List[str] ) -> List[PlaylistJob]:
+    ''' Returns jobs for the playlists/channels of a surveiled path that are due, including interrupted
+    jobs (see ``resume_interrupted_jobs``); those with videos deferred for lack of disk space come first.
+    URLs read from the playlist file are appended to ``urls``.
+    '''
+    with log_context( surveiled_path_p ):
+        LOG.info("Queuing playlists in %s ..", surveiled_playlist_p)
+        interrupted = resume_interrupted_jobs( journal_for(surveiled_path_p), store )
+
+        # Queue playlists; a duplicate URL would lead to two jobs updating the same DB entry
+        jobs = {}
+        with METRICS.timer( 'queue', path=surveiled_path_p.as_posix() ):
+            for playlist_url_s, do_extract_audio, profile in playlists_from_file(surveiled_playlist_p):
+                urls.append(playlist_url_s)
+                if playlist_url_s in jobs:
+                    LOG.warning("Ignoring duplicate URL %s in %s", playlist_url_s, surveiled_playlist_p)
                     continue
-            
-            successful_downloads = download_playlist(
-                playlist={
-                    'url'  : playlist_url_s,
-                    'title': _db[playlist_url_s]['title'],
-                    'len'  : playlist_len,
-                    'is_channel': playlist_is_yt_channel,
-                    'items_completed' : _db[playlist_url_s].get('done'),
-                    'last_scan' : _db[playlist_url_s].get('last_scan'),
-                    'do_extract_audio': do_extract_audio,
-                    'infos': playlist_infos
-                },
-                download_dir=surveiled_path_p
-            )
-            
+                if profile is not None and profile not in SETTINGS['profiles']:
+                    LOG.warning("Unknown profile '%s' for %s in %s: using default profile", profile, playlist_url_s, surveiled_playlist_p)
+                db_entry = store.get(playlist_url_s)
+                cached = interrupted.get(playlist_url_s) or cache.get(playlist_url_s)
+                if cached is not None and playlist_url_s not in interrupted and not has_pending_items(db_entry, cached):
+                    LOG.info("Skipping '%s': cached infos are fresh and nothing is left to download.", cached['title'])
+                    METRICS.inc( 'playlists_skipped', reason='fresh_cache', path=surveiled_path_p.as_posix(), playlist=playlist_url_s )
+                    continue
+                jobs[playlist_url_s] = PlaylistJob(playlist_url_s, do_extract_audio, surveiled_path_p, db_entry, cached, profile)
+        # Playlists with videos deferred by previous run for lack of disk space go first
+        deferred = store.deferred()
+        if deferred:
+            LOG.info("%d videos were deferred for lack of disk space: downloading them first", sum( count for count, _ in deferred.values() ))
+        return sorted( jobs.values(), key=lambda job: job.url not in deferred )
+
+
+def process_surveiled_paths( cfg: dict, job_queue: Optional[JobQueue] = None ) -> Optional[float]:
+    ''' Downloads new content for all surveiled paths, then remuxes leftover video/audio files.
+    With ``job_queue``, jobs are shared with other runners: a round of jobs is planned unless one
+    is in progress, then jobs are claimed from the queue until none is left (see ``JobQueue``).
+    Returns the time at which the next playlist/channel is due (cached infos expire), if known.
+    '''
+    import_yt_dlp()
+    GOVERNOR.configure( cfg, share=1/cfg['workers'] if cfg['worker_type']=='process' else 1.0 )
+    PROGRESS_BOARD.configure( cfg )
+    DISK_BUDGET.configure( cfg )
+
+    # Open DBs and metadata caches
+    playlist_files = dict( surveiled_playlist_files(cfg) )
+    stores = { p: open_state_store(p) for p in playlist_files }
+    caches = { p: open_metadata_cache(p) for p in playlist_files }
+    for p, store in stores.items():
+        DISK_BUDGET.load_usage( p, store )
+    DISK_BUDGET.rescan = False
+    urls = defaultdict(list)
+
+    def plan() -> Dict[Path,List[PlaylistJob]]:
+        return { p: queue_playlists( p, f, stores[p], caches[p], urls[p] ) for p, f in playlist_files.items() }
+
+    def claim() -> List[PlaylistJob]:
+        # next job of the shared queue
+        while True:
+            claimed = job_queue.claim()
+            if claimed is None:
+                return []
+            user, url, do_extract_audio, cached, profile = claimed
+            if user in stores:
+                return [ PlaylistJob(url, do_extract_audio, user, stores[user].get(url), cached, profile) ]
+            LOG.error("Job %s is for %s, which isn't a surveiled path of this runner: runners must share the same config", url, user)
+            job_queue.complete( user, url, failed=True )
+
+    scheduler = PlaylistScheduler(
+        workers=cfg['workers'],
+        worker_type=cfg['worker_type'],
+        max_per_host=cfg['max_per_host'],
+        probe_workers=cfg['probe_workers'],
+        prefetch=cfg['prefetch'],
+        batch_size=cfg['batch_size'],
+        claim=None if job_queue is None else claim
+    )
+    if job_queue is None:
+        planned = plan()
+        for surveiled_path_p, jobs in planned.items():
+            scheduler.add_jobs( surveiled_path_p, jobs )
+    else:
+        planned = job_queue.plan( plan )
+        if planned is None:
+            LOG.info("Joining the round of jobs in progress")
+            planned = {}
+            for surveiled_path_p, surveiled_playlist_p in playlist_files.items():
+                urls[surveiled_path_p].extend( url for url, _, _ in playlists_from_file(surveiled_playlist_p) )
+
+    # process playlists
+    jobs_left = { p: len(jobs) for p, jobs in planned.items() }
+    touched_dirs = defaultdict(set)
+    remux_executor = ThreadPoolExecutor(max_workers=1)
+    remuxes = {}
+    for surveiled_path_p in [ p for p, n in jobs_left.items() if n==0 ]:
+        journal_for(surveiled_path_p).close( clear=True )
+        remuxes[remux_executor.submit(remux_surveiled_path, surveiled_path_p)] = surveiled_path_p
+    failed_jobs = defaultdict(int)
+    for job, result in scheduler.run():
+        if result is None:
+            failed_jobs[job.download_dir] += 1
+        else:
+            touched_dirs[job.download_dir].update( result.get('touched_dirs', []) )
             # Save progress
-            if playlist_is_yt_channel:
-                LOG.debug("Scan done")
-                _db[playlist_url_s]['last_scan'] = (datetime.date.today() - datetime.timedelta(days=1)).strftime("%Y%m%d")
-                _db[playlist_url_s]['last_video_id'] = latest_video_id
-            elif successful_downloads:
-                LOG.debug("Successfully downloaded %s", successful_downloads)
-                debug_var(_db[playlist_url_s].get('done',[]))
-                _db[playlist_url_s]['done'] = _db[playlist_url_s].get('done',[]) + successful_downloads
-                debug_var(_db[playlist_url_s]['done'])
-            else:
-                LOG.debug("Did nothing")
-
-            # Save DB
-            surveiled_playlist_db.write_text(
-                json.dumps(_db, indent=2),
-                encoding='utf8'
-            )
+            with log_context( job.download_dir ), METRICS.timer( 'db_commit', path=job.download_dir.as_posix() ):
+                commit_playlist_result(stores[job.download_dir], job.url, result)
+                if result.get('summary') is not None:
+                    ttl = next_probe_delay( stores[job.download_dir].get(job.url), time.time() ) if SETTINGS['adaptive_polling'] else None
+                    tier = caches[job.download_dir].put(job.url, result['summary'], ttl=ttl)
+                    LOG.debug("Cached infos for '%s' (tier: %s, adaptive TTL: %s)", job.url, tier, ttl)
+            journal_for(job.download_dir).record( job.url, 'committed' )
+
+        remux_dirs = None
+        if job_queue is not None:
+            # Journals are replayed by the runner planning the next round
+            journal_for(job.download_dir).close()
+            remux_dirs = job_queue.complete( job.download_dir, job.url, touched_dirs.pop(job.download_dir, ()), failed=result is None )
+        else:
+            jobs_left[job.download_dir] -= 1
+            if jobs_left[job.download_dir]==0:
+                # Failed jobs are kept in the journal, so that the next run resumes them
+                journal_for(job.download_dir).close( clear=failed_jobs[job.download_dir]==0 )
+                remux_dirs = touched_dirs.pop(job.download_dir, ())
+        if remux_dirs is not None:
+            remuxes[remux_executor.submit(remux_surveiled_path, job.download_dir, remux_dirs)] = job.download_dir
+
+    for future in as_completed(remuxes):
+        try:
+            future.result()
+        except Exception as e:
+            LOG.error("Remuxing files in %s failed; check error message.\ne=%s", remuxes[future], e)
+    remux_executor.shutdown()
+
+    if job_queue is not None:
+        for surveiled_path_p in stores:
+            journal_for(surveiled_path_p).close()
+    next_due = min( (
+        expires_at
+        for expires_at in ( cache.next_expiry(urls[p]) for p, cache in caches.items() )
+        if expires_at is not None
+    ), default=None )
+    for cache in caches.values():
+        cache.close()
+    for surveiled_path_p, store in stores.items():
+        deferred = store.deferred()
+        if deferred:
+            with log_context( surveiled_path_p ):
+                LOG.warning(
+                    "%s: %d videos of %d playlists/channels deferred for lack of disk space (%s of known size); they will be downloaded first once space is available",
+                    surveiled_path_p, sum( count for count, _ in deferred.values() ), len(deferred), yt_dlp.utils.format_bytes( sum( size for _, size in deferred.values() ) )
+                )
+        store.close()
+    YDL_FACTORY.report()
+    content_index().report()
+    return next_due
+
+
+def watched_files_mtimes( cfg: Optional[dict] ) -> Dict[Path,Optional[int]]:
+    ''' Returns modification times of config file and playlist files (None for missing files) '''
+    files = [ SCRIPT_DIR / 'AutoYoutubeDL.ini' ]
+    if cfg is not None:
+        files.extend( p / 'AutoYoutubeDL.txt' for p in cfg['surveiled_path'] )
+    return { f: f.stat().st_mtime_ns if f.is_file() else None for f in files }
+
+
+def run_daemon( runner: bool = False ) -> NoReturn:
+    ''' Keeps the process (and yt-dlp) warm instead of being started by the task scheduler:
+    a run happens when the earliest cached playlist/channel infos expire, so each one is
+    checked according to its update frequency (see ``MetadataCache`` tiers), or as soon
+    as the config file or a playlist file is edited (mtime polling).
+    As a ``runner`` (see ``JobQueue``), it also joins rounds of jobs planned by other runners.
+    Metrics are exported after each run.
+    '''
+    cfg, watched, next_run, job_queue = None, None, 0.0, None
+    while True:
+        mtimes = watched_files_mtimes(cfg)
+        if mtimes!=watched:
+            if watched is not None:
+                LOG.info("Config or playlist file changed")
+            cfg = load_config()
+            SETTINGS.update(cfg)
+            configure_logging(cfg)
+            watched = watched_files_mtimes(cfg)
+            next_run = 0.0
+            if runner and job_queue is None:
+                job_queue = open_job_queue(cfg)
+
+        if time.time() >= next_run or ( job_queue is not None and job_queue.pending() ):
+            log_date()
+            next_due = None
+            try:
+                next_due = process_surveiled_paths(cfg, job_queue)
+            except Exception as e:
+                LOG.exception("Run failed: %s", e)
+            export_metrics()
+            METRICS.reset()
+            earliest = time.time() + SETTINGS['daemon_poll_interval']
+            next_run = max( earliest, next_due if next_due is not None else time.time() + SETTINGS['cache_ttl_hot'] )
+            LOG.info("Next run at %s", datetime.datetime.fromtimestamp(next_run).isoformat(sep=' ', timespec='seconds'))
 
-        check_for_unmuxed_videos(surveiled_path_p)
+        time.sleep( max( 1, min( SETTINGS['daemon_poll_interval'], next_run - time.time() ) ) )
 
 
 if __name__=='__main__':
     
-    if LOCK.is_file():
-        # Lock file present => abort
-        LOG.warning("Lock file detected: aborting execution")
+    if not any( x in sys.argv for x in ('-h','--help') ) and not acquire_lock( shared='--runner' in sys.argv ):
+        # Another instance is running => abort
+        LOG.warning("Lock held by another instance: aborting execution")
+        open_log_file( new_run=False )
         sys.exit(0)
-    if not any( x in sys.argv for x in ('-h','--help') ):
-        # Lock file abscent + not lauching help => create lock
-        LOCK.touch()
     try:
-        log_date()
+        if '--daemon' not in sys.argv:
+            log_date()
         main()
-    except Exception:
-        pass
+    except Exception as e:
+        # Interrupted jobs are resumed by the next run (see `JobJournal`)
+        LOG.exception("AutoYoutubeDL failed: %s", e)
+        end(1)
     end()
@@ -0,0 +1 @@
+''' Benchmarks of AutoYoutubeDL, run from the repository root: ``python -m benchmarks <benchmark>`` '''
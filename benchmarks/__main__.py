@@ -0,0 +1,36 @@
+''' Runs a benchmark and prints its results: ``python -m benchmarks <benchmark>`` (see README) '''
+
+import argparse
+
+import AutoYoutubeDL as aydl
+from benchmarks.offline import benchmark_batching, benchmark_offline, benchmark_runners
+from benchmarks.profiles import benchmark_profiles
+from benchmarks.progress import benchmark_progress
+from benchmarks.startup import benchmark_startup
+from benchmarks.state import benchmark_content_index, benchmark_index_ranges
+
+
+BENCHMARKS = {
+    'batching': benchmark_batching,
+    'index_ranges': benchmark_index_ranges,
+    'content_index': benchmark_content_index,
+    'offline': benchmark_offline,
+    'profiles': benchmark_profiles,
+    'progress': benchmark_progress,
+    'runners': benchmark_runners,
+    'startup': benchmark_startup
+}
+
+
+def main() -> None:
+    ''' Main '''
+    parser = argparse.ArgumentParser( prog='python -m benchmarks', description="Runs an AutoYoutubeDL benchmark" )
+    parser.add_argument( 'benchmark', choices=sorted(BENCHMARKS) )
+    args = parser.parse_args()
+    aydl.open_log_file( new_run=True )
+    aydl.import_yt_dlp()
+    BENCHMARKS[args.benchmark]()
+
+
+if __name__=='__main__':
+    main()
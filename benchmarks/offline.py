@@ -0,0 +1,139 @@
+''' Offline benchmarks: whole runs on a fake yt-dlp backend (see ``tests.fakes``), measuring
+orchestration overhead, batched downloads and runners sharing a job queue '''
+
+import contextlib
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, List, Optional
+try:
+    import resource
+except ModuleNotFoundError:
+    resource = None # not available on Windows
+
+from AutoYoutubeDL import DEFAULT_SETTINGS, METRICS, SETTINGS, open_job_queue, process_surveiled_paths
+from tests.fakes import FakeLibrary, fake_backend
+
+
+def benchmark_offline_run( size: int, work_dir: Path, runs: int = 2, settings: Optional[dict] = None, **library_kwargs ) -> List[dict]:
+    ''' Runs ``process_surveiled_paths`` ``runs`` times on a ``FakeLibrary`` of ``size`` items, with
+    ``YoutubeDL`` swapped for ``FakeYoutubeDL``: the first run downloads everything, next ones
+    find a few new items. ``settings`` override default settings. Returns, for each run: wall time,
+    peak RSS (KiB) and metrics summary.
+    '''
+    library = FakeLibrary( size, **library_kwargs )
+    user_dir = work_dir / 'user'
+    user_dir.mkdir()
+    (user_dir / 'AutoYoutubeDL.txt').write_text( '\n'.join(library.playlists) + '\n', encoding='utf8' )
+    cfg = dict( DEFAULT_SETTINGS, surveiled_path=[user_dir], workers=4, max_per_host=4, cache_ttl_hot=0, cache_ttl_dormant=0 )
+    cfg.update( settings or {} )
+    SETTINGS.update(cfg)
+
+    results = []
+    with fake_backend( library, work_dir ):
+        for run in range(runs):
+            if run:
+                library.upload( 0.01 )
+            METRICS.drain()
+            t_start = time.perf_counter()
+            with open(os.devnull, 'w', encoding='utf8') as devnull, contextlib.redirect_stdout(devnull):
+                process_surveiled_paths(cfg)
+            results.append({
+                'wall_seconds': time.perf_counter() - t_start,
+                'peak_rss_kib': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None,
+                'summary': METRICS.summary()
+            })
+    return results
+
+
+def benchmark_offline( sizes: Iterable[int] = (10, 1000, 100000), runs: int = 2 ) -> None:
+    ''' Measures orchestration overhead (playlist file parsing, option building, DB I/O, unmuxed
+    file scan, ..) apart from the network, using ``FakeYoutubeDL``; see ``benchmark_offline_run``.
+    Each size runs in its own process, so that peak RSS is that of the given size.
+    Phase times are summed over worker threads, so they may exceed wall time.
+    '''
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp_dir, ProcessPoolExecutor(max_workers=1) as executor:
+            results = executor.submit( benchmark_offline_run, size, Path(tmp_dir), runs ).result()
+        for run, res in enumerate(results):
+            peak_rss = f"{res['peak_rss_kib']/1024:.1f}MiB" if res['peak_rss_kib'] else '?'
+            videos = res['summary']['counters'].get('videos_downloaded', 0)
+            print(f"{size:>7} items, run {run+1}: {res['wall_seconds']:>8.2f}s wall, peak RSS {peak_rss:>9}, {videos:>6.0f} videos downloaded")
+            print("    " + ", ".join( f"{phase} {t['seconds']:.2f}s" for phase, t in sorted(res['summary']['phases'].items()) ))
+
+
+def benchmark_batching( playlists: int = 200, playlist_size: int = 3, batch_sizes: Iterable[int] = (1, 10, 50), invocation_latency: float = 0.25 ) -> None:
+    ''' Measures batched downloads of small playlists (see ``batch_size``): ``playlists`` playlists
+    of ``playlist_size`` items are downloaded, then each gets a new item (second run, reported).
+    Uses ``FakeYoutubeDL``, where each YoutubeDL invocation costs ``invocation_latency`` seconds:
+    what a new instance goes through before its first download (connections to the site, which
+    instances don't share, and initialization of its extractor) is what batching saves.
+    '''
+    print(f"{'batch_size':>10} | {'wall':>8} | {'invocations':>11} | {'videos':>6}")
+    for batch_size in batch_sizes:
+        with tempfile.TemporaryDirectory() as tmp_dir, ProcessPoolExecutor(max_workers=1) as executor:
+            results = executor.submit(
+                benchmark_offline_run, playlists * playlist_size, Path(tmp_dir), 2,
+                settings={ 'batch_size': batch_size }, playlist_size=playlist_size, channel_ratio=0.0, unavailable_rate=0.0, item_failure_rate=0.0,
+                invocation_latency=invocation_latency
+            ).result()
+        res = results[-1]
+        counters = res['summary']['counters']
+        print(f"{batch_size:>10} | {res['wall_seconds']:>7.2f}s | {counters.get('ydl_invocations', 0):>11.0f} | {counters.get('videos_downloaded', 0):>6.0f}")
+
+
+def benchmark_runner( size: int, work_dir: Path, users: int, library_kwargs: dict ) -> dict:
+    ''' Runner process of ``benchmark_runners``: processes jobs of the queue shared in ``work_dir``
+    until none is left, like an instance started with ``--runner``. Returns wall time and metrics summary. '''
+    cfg = dict(
+        DEFAULT_SETTINGS,
+        surveiled_path=[ work_dir / f"user{i}" for i in range(users) ],
+        workers=1, cache_ttl_hot=0, cache_ttl_dormant=0, min_free_space='0',
+        job_queue=( work_dir / 'queue.sqlite' ).as_posix(), lease_duration=30
+    )
+    SETTINGS.update(cfg)
+    METRICS.drain()
+    job_queue = open_job_queue(cfg)
+    t_start = time.perf_counter()
+    try:
+        with fake_backend( FakeLibrary( size, **library_kwargs ), work_dir ), open(os.devnull, 'w', encoding='utf8') as devnull, contextlib.redirect_stdout(devnull):
+            process_surveiled_paths( cfg, job_queue )
+    finally:
+        job_queue.close()
+    return { 'wall_seconds': time.perf_counter() - t_start, 'summary': METRICS.summary() }
+
+
+def benchmark_runners( size: int = 2000, users: int = 4, runner_counts: Iterable[int] = (1, 2, 4), runs: int = 5 ) -> None:
+    ''' Starts several runner processes sharing a ``JobQueue``, on a ``FakeLibrary`` of ``size``
+    items spread over ``users`` surveiled paths (``FakeYoutubeDL``, with simulated download time).
+    Each runner has a single download worker, so that runners are what scales. Wall time varies
+    from run to run (runners compete for the CPU and for database locks): each runner count is
+    run ``runs`` times. Fails if a job failed, or if videos downloaded by all runners don't match
+    files written (a video downloaded twice, or not at all).
+    '''
+    library_kwargs = { 'playlist_size': 50, 'item_latency': 0.002, 'item_failure_rate': 0.0, 'unavailable_rate': 0.0 }
+    print(f"{'runners':>7} | {'min':>7} {'median':>7} {'max':>7} | videos per runner (median run)")
+    for runner_count in runner_counts:
+        walls, per_runner = [], []
+        for _ in range(runs):
+            with tempfile.TemporaryDirectory() as tmp_dir, ProcessPoolExecutor(max_workers=runner_count) as executor:
+                work_dir = Path(tmp_dir)
+                playlists = list( FakeLibrary( size, **library_kwargs ).playlists )
+                for i in range(users):
+                    (work_dir / f"user{i}").mkdir()
+                    (work_dir / f"user{i}" / 'AutoYoutubeDL.txt').write_text( '\n'.join(playlists[i::users]) + '\n', encoding='utf8' )
+                t_start = time.perf_counter()
+                futures = [ executor.submit( benchmark_runner, size, work_dir, users, library_kwargs ) for _ in range(runner_count) ]
+                results = [ future.result() for future in futures ]
+                walls.append( time.perf_counter() - t_start )
+                videos = [ res['summary']['counters'].get('videos_downloaded', 0) for res in results ]
+                failed = sum( res['summary']['counters'].get(k, 0) for res in results for k in ('jobs_failed', 'download_failures') )
+                files = sum( 1 for f in work_dir.glob('user*/**/*.mp4') )
+            assert failed==0, f"{runner_count} runners: {failed:.0f} jobs failed (see log file)"
+            assert sum(videos)==files==size, f"{runner_count} runners: {sum(videos):.0f} videos downloaded, {files} files written, {size} expected"
+            per_runner.append( videos )
+        order = sorted( range(runs), key=walls.__getitem__ )
+        median = order[runs//2]
+        print(f"{runner_count:>7} | {walls[order[0]]:>6.2f}s {walls[median]:>6.2f}s {walls[order[-1]]:>6.2f}s | {' '.join( f'{n:.0f}' for n in per_runner[median] )}")
@@ -0,0 +1,42 @@
+''' Benchmark of tuning profiles' download throughput, from a local server standing in for video hosts '''
+
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import yt_dlp
+
+from AutoYoutubeDL import DEFAULT_PROFILE, load_config, profile_ydl_opts
+from tests.fakes import serve_test_media
+
+
+def benchmark_profiles( size: int = 16 * 1024**2, segments: int = 8, rate: int = 2 * 1024**2, burst: int = 1024**2, latency: float = 0.05 ) -> None:
+    ''' Measures download throughput of tuning profiles (see ``profile_ydl_opts``): tuning profiles of
+    AutoYoutubeDL.ini and no profile at all (yt-dlp defaults) download a single file and a DASH
+    stream of ``segments`` fragments from a local stand-in server (see ``serve_test_media``).
+    An 'aria2c' profile is added if aria2c is installed and no profile uses it.
+    '''
+    profiles = { '(none)': {}, **load_config()['profiles'] }
+    if shutil.which('aria2c') is not None and not any( profile['external_downloader'] for profile in profiles.values() if profile ):
+        profiles['aria2c'] = dict( DEFAULT_PROFILE, external_downloader='aria2c' )
+    print(f"{'profile':>12} | {'source':>6} | {'time':>7} | {'MiB/s':>6} | options")
+    with serve_test_media( size, segments, rate, burst, latency ) as base_url:
+        for name, profile in profiles.items():
+            ydl_opts = profile_ydl_opts( profile )
+            for source in ('mp4', 'mpd'):
+                with tempfile.TemporaryDirectory() as tmp_dir:
+                    t_start = time.perf_counter()
+                    with yt_dlp.YoutubeDL( {
+                        'quiet': True, 'no_warnings': True, 'noprogress': True, 'fixup': 'never',
+                        'outtmpl': { 'default': f"{tmp_dir}/%(id)s.%(ext)s" },
+                        **ydl_opts
+                    } ) as ydl:
+                        retcode = ydl.download( [f"{base_url}/video.{source}"] )
+                    elapsed = time.perf_counter() - t_start
+                    downloaded = sum( f.stat().st_size for f in Path(tmp_dir).iterdir() if f.is_file() )
+                options = ', '.join( f"{k}={v}" for k, v in ydl_opts.items() if k!='noresizebuffer' ) or '-'
+                if retcode or downloaded!=size:
+                    print(f"{name:>12} | {source:>6} | failed: {downloaded} of {size} bytes downloaded | {options}")
+                    continue
+                print(f"{name:>12} | {source:>6} | {elapsed:>6.2f}s | {size / 1024**2 / elapsed:>6.2f} | {options}")
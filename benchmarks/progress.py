@@ -0,0 +1,62 @@
+''' Benchmark of progress hooks and progress output '''
+
+import contextlib
+import io
+import time
+from typing import Any, Callable, Iterable, List
+
+from DRSlib.spinner import MySpinner
+
+from AutoYoutubeDL import PROGRESS_BOARD, ProgressMonitor, YDLDownloadMonitor, import_yt_dlp
+
+
+def benchmark_progress( calls: int = 20000, downloads: Iterable[int] = (1, 8) ) -> None:
+    ''' Measures time per progress hook call and output volume: the former hook (status line
+    formatted and spinner animated on every call) versus ``YDLDownloadMonitor.hook`` with
+    ``downloads`` concurrent downloads, for each ``progress_format``; then ``ProgressMonitor.debug``
+    on download progress messages.
+    '''
+    import_yt_dlp()
+    events = [
+        {
+            'status': 'downloading', 'filename': 'video.f137.mp4', 'tmpfilename': 'video.f137.mp4.part',
+            'downloaded_bytes': i * 1024, 'total_bytes': calls * 1024, 'speed': 2.5e6, 'eta': calls - i,
+            '_speed_str': '2.38MiB/s', '_total_bytes_str': f"{calls/1024:.2f}MiB", '_eta_str': '00:42', '_percent_str': f"{100*i/calls:.1f}%",
+            'info_dict': { '_filename': 'video.mp4', 'id': 'video', 'playlist_index': 1 }
+        }
+        for i in range(calls)
+    ]
+
+    def run( name: str, hooks: List[Callable[[Any],None]], inputs: List[Any] ) -> None:
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            t_start = time.perf_counter()
+            for i, d in enumerate(inputs):
+                hooks[i % len(hooks)]( d )
+            elapsed = time.perf_counter() - t_start
+        print(f"{name:>23} | {len(hooks):>9} | {elapsed/len(inputs)*1e6:>7.2f}µs | {len(out.getvalue())/1024:>8.1f}KiB")
+
+    print(f"{'hook':>23} | {'downloads':>9} | {'per call':>9} | {'output':>11}")
+    with contextlib.redirect_stdout( io.StringIO() ):
+        spinner = MySpinner()
+    def former_hook( d: dict ) -> None:
+        spinner.animation( text="{} ({}): SPD {} - TOT {} - ETA {} {}".format(
+            'video', 'video', d.get('_speed_str','?'), d.get('_total_bytes_str','?'), d.get('_eta_str','?'), d.get('_percent_str','?')
+        ) )
+    run( 'former', [former_hook], events )
+
+    saved_fmt = PROGRESS_BOARD.fmt
+    try:
+        for fmt in ('line', 'json'):
+            PROGRESS_BOARD.fmt = fmt
+            for n_downloads in downloads:
+                monitors = [ YDLDownloadMonitor() for _ in range(n_downloads) ]
+                run( f"YDLDownloadMonitor/{fmt}", [ monitor.hook for monitor in monitors ], events )
+                with contextlib.redirect_stdout( io.StringIO() ):
+                    for monitor in monitors:
+                        monitor.hook( dict(events[-1], status='finished') )
+    finally:
+        PROGRESS_BOARD.fmt = saved_fmt
+
+    messages = [ f"[download] {100*i/calls:5.1f}% of 10.00MiB at 2.38MiB/s ETA 00:42" for i in range(calls) ]
+    run( 'ProgressMonitor.debug', [ProgressMonitor().debug], messages )
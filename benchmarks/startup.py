@@ -0,0 +1,58 @@
+''' Benchmark of runs with nothing to do, which shouldn't load yt-dlp '''
+
+import configparser
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import AutoYoutubeDL as aydl
+from AutoYoutubeDL import MetadataCache, open_state_store
+
+
+def benchmark_startup( runs: int = 5, playlists: int = 50 ) -> None:
+    ''' Measures wall time of a run with nothing to do (``playlists`` playlists with fresh cached
+    infos, all downloaded), which exits before importing yt-dlp, against importing yt-dlp and
+    setting up a YoutubeDL instance (which loads extractors). Each case runs ``runs`` times as
+    a subprocess; runs use a copy of AutoYoutubeDL.py in a temporary directory.
+    '''
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        script = tmp_dir / Path(aydl.__file__).name
+        shutil.copy( aydl.__file__, script )
+        user_dir = tmp_dir / 'user'
+        user_dir.mkdir()
+        urls = [ f"https://www.youtube.com/playlist?list=PLbenchmark{i:04d}" for i in range(playlists) ]
+        (user_dir / 'AutoYoutubeDL.txt').write_text( '\n'.join(urls) + '\n', encoding='utf8' )
+        cfg = configparser.ConfigParser()
+        cfg['Settings'] = { 'surveiled_path': json.dumps([user_dir.as_posix()]) }
+        with (tmp_dir / 'AutoYoutubeDL.ini').open('w', encoding='utf8') as f:
+            cfg.write(f)
+        store = open_state_store(user_dir)
+        cache = MetadataCache( user_dir / 'AutoYoutubeDL.cache.sqlite', ttl={ tier: 86400 for tier in MetadataCache.TIERS }, dormant_after=14, max_entries=2000 )
+        for url in urls:
+            store.update( url, done=range(1, 11), title=url, len=10 )
+            cache.put( url, { 'title': url, 'len': 10, 'is_channel': False, 'latest_video_id': None, 'infos': {} } )
+        cache.close()
+        store.close()
+
+        cases = {
+            'interpreter startup': [ '-c', 'pass' ],
+            'import yt_dlp': [ '-c', 'import yt_dlp' ],
+            'YoutubeDL setup': [ '-c', 'import yt_dlp; yt_dlp.YoutubeDL({"quiet": True}).get_info_extractor("Youtube")' ],
+            'run, nothing to do': [ script.as_posix() ]
+        }
+        print(f"{'case':>20} | {'min':>8} {'median':>8}")
+        for name, args in cases.items():
+            times = []
+            for _ in range(runs):
+                t_start = time.perf_counter()
+                subprocess.run( [ sys.executable, *args ], cwd=tmp_dir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True )
+                times.append( time.perf_counter() - t_start )
+            times.sort()
+            print(f"{name:>20} | {times[0]*1000:>6.0f}ms {times[len(times)//2]*1000:>6.0f}ms")
+        log = (tmp_dir / 'AutoYoutubeDL.log').read_text(encoding='utf8')
+        assert 'Nothing to do' in log and 'Imported yt-dlp' not in log, "Run with nothing to do didn't take the fast path"
@@ -0,0 +1,63 @@
+''' Benchmarks of download state data structures: completed playlist indexes and content index '''
+
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Iterable
+
+from AutoYoutubeDL import ContentIndex, IndexRanges
+
+
+def benchmark_index_ranges() -> None:
+    ''' Compares ``IndexRanges`` with the former flat list representation of completed
+    playlist indexes: time to compute ``playlist_items``, then size of ``playlist_items``
+    and of the persisted ``done`` field. Completed items have a few gaps (failed downloads)
+    and some duplicates (list only), as in real DBs.
+    '''
+    print(f"{'size':>7} | {'list: time':>11} {'items':>8} {'done':>8} | {'ranges: time':>12} {'items':>6} {'done':>6}")
+    for size in (100, 1000, 5000, 20000):
+        gaps = set( range(7, size, 97) )
+        done_list = [ x for x in range(1, size-10) if x not in gaps ] + list( range(1, size//10) )
+        done_ranges = IndexRanges( done_list )
+
+        t_start = time.perf_counter()
+        list_items = ','.join( str(x+1) for x in range(size) if x+1 not in done_list )
+        t_list = time.perf_counter() - t_start
+
+        t_start = time.perf_counter()
+        ranges_items = str( done_ranges.complement(1, size) )
+        t_ranges = time.perf_counter() - t_start
+
+        assert IndexRanges.parse(ranges_items) == IndexRanges( int(x) for x in list_items.split(',') )
+        print(
+            f"{size:>7} | {t_list*1000:>9.2f}ms {len(list_items):>8} {len(json.dumps(done_list)):>8} | "
+            f"{t_ranges*1000:>10.3f}ms {len(ranges_items):>6} {len(str(done_ranges)):>6}"
+        )
+
+
+def benchmark_content_index( sizes: Iterable[int] = (10000, 100000, 500000), lookups: int = 10000 ) -> None:
+    ''' Measures content index lookups on indexes of various sizes: ``lookups`` lookups, one query
+    per video, as done before each download (see ``ContentDeduplicator``). Index entries don't point
+    to actual files, so lookups aren't validated.
+    '''
+    print(f"{'size':>7} | {'fill':>8} | {'lookups':>9} {'per id':>8}")
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            index = ContentIndex( Path(tmp) / 'content.sqlite' )
+            t_start = time.perf_counter()
+            index.con.executemany(
+                "INSERT INTO content (video_id, format, path, size, hash, dev, linked, added) VALUES (?,?,?,?,?,?,?,?)",
+                ( (f"vid{i:08d}", 'best', f"/volume1/user{i%7}/video{i}.mp4", 1 << 20, '', 1, 0, 0.0) for i in range(size) )
+            )
+            index.con.commit()
+            t_fill = time.perf_counter() - t_start
+            video_ids = [ f"vid{random.randrange(2*size):08d}" for _ in range(lookups) ] # ~half are hits
+
+            t_start = time.perf_counter()
+            for video_id in video_ids:
+                index.con.execute( "SELECT path FROM content WHERE video_id=? AND format=? AND dev=?", (video_id, 'best', 1) ).fetchmany(1)
+            t_lookups = time.perf_counter() - t_start
+            index.close()
+        print(f"{size:>7} | {t_fill:>7.2f}s | {t_lookups*1000:>7.1f}ms {t_lookups/lookups*1e6:>6.1f}µs")
@@ -0,0 +1,58 @@
+''' Fixtures shared by tests: isolated settings and log output, and offline runs of
+``process_surveiled_paths`` on a fake yt-dlp backend (see ``tests.fakes``) '''
+
+import contextlib
+from pathlib import Path
+from typing import Callable, Iterator, Tuple
+
+import pytest
+
+import AutoYoutubeDL as aydl
+from tests.fakes import FakeLibrary, fake_backend
+
+
+@pytest.fixture( scope='session', autouse=True )
+def quiet_logs() -> Iterator[None]:
+    ''' Drops log records instead of buffering them for a log file, or writing WARNING.log next to the script '''
+    aydl.log_listener.stop()
+    handlers, aydl.log_listener.handlers = aydl.log_listener.handlers, ()
+    aydl.log_listener.start()
+    yield
+    aydl.log_listener.stop()
+    aydl.log_listener.handlers = handlers
+
+
+@pytest.fixture( autouse=True )
+def settings() -> Iterator[dict]:
+    ''' Settings of the test, restored afterwards; job journals opened by the test are closed '''
+    saved = dict(aydl.SETTINGS)
+    aydl.SETTINGS.update( min_free_space='0' )
+    yield aydl.SETTINGS
+    aydl.SETTINGS.clear()
+    aydl.SETTINGS.update(saved)
+    for journal in aydl.JOURNALS.values():
+        journal.close()
+    aydl.JOURNALS.clear()
+
+
+@pytest.fixture
+def offline_user( tmp_path: Path ) -> Iterator[Callable[...,Tuple[FakeLibrary,dict]]]:
+    ''' Returns a function making a surveiled path for the playlists/channels of a ``FakeLibrary``
+    (created with given arguments; no latency nor failure by default), served by the fake backend.
+    It returns the library and the config to pass to ``offline_run``. '''
+    with contextlib.ExitStack() as stack:
+
+        def make( size: int, **library_kwargs ) -> Tuple[FakeLibrary,dict]:
+            kwargs = dict( extract_latency=0.0, item_latency=0.0, item_failure_rate=0.0, unavailable_rate=0.0 )
+            kwargs.update( library_kwargs )
+            library = FakeLibrary( size, **kwargs )
+            user_dir = tmp_path / 'user'
+            user_dir.mkdir()
+            (user_dir / 'AutoYoutubeDL.txt').write_text( '\n'.join(library.playlists) + '\n', encoding='utf8' )
+            cfg = dict( aydl.SETTINGS, surveiled_path=[user_dir], workers=2 )
+            aydl.SETTINGS.update(cfg)
+            stack.enter_context( fake_backend( library, tmp_path ) )
+            return library, cfg
+
+        yield make
+
@@ -0,0 +1,366 @@
+''' Test doubles shared by tests and benchmarks: a fake yt-dlp backend serving synthetic
+playlists/channels (``FakeLibrary``, ``FakeYoutubeDL``, ``fake_backend``) and a local HTTP
+server standing in for video hosts (``serve_test_media``).
+'''
+
+import contextlib
+import datetime
+import functools
+import os
+import random
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, NoReturn, Optional, Tuple
+
+import yt_dlp
+
+import AutoYoutubeDL as aydl
+from AutoYoutubeDL import IndexRanges
+
+
+class FakeLibrary:
+    ''' Synthetic playlists and channels served by ``FakeYoutubeDL``, for offline tests and benchmarks.
+    ``size`` items are spread over playlists/channels of ``playlist_size`` items; a fraction
+    ``unavailable_rate`` of them can't be extracted (private) and a fraction ``item_failure_rate``
+    of items fail to download. Network latencies are simulated with sleeps, including the setup
+    of each YoutubeDL invocation (``invocation_latency``: connections to the site, initialization of
+    its extractor) which real instances go through before their first download.
+    Setting ``interrupt_after`` to a number of items makes downloads stop after as many, like an interrupted run.
+    '''
+
+    HOST = 'https://www.youtube.com'
+
+    def __init__( self, size: int, playlist_size: int = 500, channel_ratio: float = 0.5, extract_latency: float = 0.005, item_latency: float = 0.0001, invocation_latency: float = 0.0, item_failure_rate: float = 0.01, unavailable_rate: float = 0.02, seed: int = 0 ) -> None:
+        self.extract_latency = extract_latency
+        self.item_latency = item_latency
+        self.invocation_latency = invocation_latency
+        self.item_failure_rate = item_failure_rate
+        self.rng = random.Random(seed)
+        self.interrupt_after: Optional[int] = None
+        self.playlists: Dict[str,dict] = {}
+        self.unavailable = set()
+        old_date = datetime.date.today() - datetime.timedelta(days=2)
+        for p_idx, start in enumerate(range(0, size, playlist_size)):
+            p_id = f"BENCH{p_idx:05d}"
+            is_channel = self.rng.random() < channel_ratio
+            url = f"{FakeLibrary.HOST}/channel/{p_id}" if is_channel else f"{FakeLibrary.HOST}/playlist?list={p_id}"
+            self.playlists[url] = { 'id': p_id, 'is_channel': is_channel, 'channel': f"Channel {p_idx}", 'title': f"Playlist {p_idx}", 'entries': [] }
+            self.add_items( url, min(playlist_size, size - start), old_date )
+            if self.rng.random() < unavailable_rate:
+                self.unavailable.add(url)
+
+    def add_items( self, url: str, count: int, upload_date: datetime.date, at_head: Optional[bool] = None ) -> None:
+        ''' Adds items to playlist/channel, at its head if ``at_head``; by default at the end of
+        playlists, and at the head of channels (they list newest items first) '''
+        playlist = self.playlists[url]
+        n = len(playlist['entries'])
+        new_entries = [
+            {
+                'id': f"{playlist['id']}-{n+i:06d}",
+                'title': f"Video {n+i}",
+                'upload_date': upload_date.strftime("%Y%m%d"),
+                'fails': self.rng.random() < self.item_failure_rate
+            }
+            for i in range(count)
+        ]
+        if playlist['is_channel'] if at_head is None else at_head:
+            playlist['entries'][:0] = reversed(new_entries)
+        else:
+            playlist['entries'].extend(new_entries)
+
+    def upload( self, ratio: float ) -> None:
+        ''' Simulates uploads of today: every playlist/channel grows by ``ratio`` (at least 1 item) '''
+        for url, playlist in self.playlists.items():
+            self.add_items( url, max(1, int(len(playlist['entries']) * ratio)), datetime.date.today() )
+
+    def extract( self, url: str ) -> dict:
+        ''' Returns playlist/channel infos, like an info extractor would (entries are lazy) '''
+        time.sleep( self.extract_latency )
+        if url in self.unavailable:
+            raise yt_dlp.utils.ExtractorError(f"{url}: This playlist is private", expected=True)
+        playlist = self.playlists[url]
+        entries = list(playlist['entries'])
+        infos = {
+            '_type': 'playlist',
+            'id': playlist['id'],
+            'title': f"{playlist['channel']} - Videos" if playlist['is_channel'] else playlist['title'],
+            'channel': playlist['channel'],
+            'channel_url': url if playlist['is_channel'] else f"{FakeLibrary.HOST}/channel/UPLOADER-{playlist['id']}",
+            'entries': ( { '_type': 'url', 'id': entry['id'], 'title': entry['title'] } for entry in entries )
+        }
+        if not playlist['is_channel']:
+            infos['playlist_count'] = len(entries)
+        return infos
+
+
+class FakeYoutubeDL:
+    ''' Stand-in for ``YoutubeDL`` serving ``FakeYoutubeDL.library``, for offline tests and benchmarks.
+    Supports what AutoYoutubeDL uses (``_ies``, ``add_info_extractor``, ``get_info_extractor``,
+    ``download`` with item selection options and hooks) and writes small dummy files instead of
+    downloading videos.
+    '''
+
+    library: Optional[FakeLibrary] = None
+    DUMMY_CONTENT = b'\0' * 1024
+
+    class FakeIE:
+        ''' Stand-in for an info extractor, serving ``FakeYoutubeDL.library`` '''
+
+        @staticmethod
+        def ie_key() -> str:
+            return 'Fake'
+
+        def suitable( self, url: str ) -> bool:
+            ''' Only library URLs are supported '''
+            return url in FakeYoutubeDL.library.playlists
+
+        def extract( self, url: str ) -> dict:
+            ''' Returns playlist/channel infos '''
+            return FakeYoutubeDL.library.extract(url)
+
+    def __init__( self, params: Optional[dict] = None, auto_init: bool = True ) -> None:
+        self.params = params or {}
+        self._ies = {}
+        if auto_init:
+            self.add_info_extractor( FakeYoutubeDL.FakeIE() )
+        self.cookiejar = None
+        self.proxies = {}
+        self._progress_hooks = list( self.params.get('progress_hooks', []) )
+        self._postprocessor_hooks = list( self.params.get('postprocessor_hooks', []) )
+        self._post_hooks = list( self.params.get('post_hooks', []) )
+
+    def __enter__( self ) -> 'FakeYoutubeDL':
+        return self
+
+    def __exit__( self, *args ) -> None:
+        pass
+
+    def add_info_extractor( self, ie: 'FakeYoutubeDL.FakeIE' ) -> None:
+        ''' Registers info extractor '''
+        self._ies[ie.ie_key()] = ie
+
+    def get_info_extractor( self, ie_key: str ) -> 'FakeYoutubeDL.FakeIE':
+        ''' Returns info extractor '''
+        return self._ies[ie_key]
+
+    def add_progress_hook( self, hook: Callable[[dict],None] ) -> None:
+        ''' Registers progress hook '''
+        self._progress_hooks.append( hook )
+
+    class FakeRequestDirector:
+        ''' Stand-in for the request director of an instance (see ``YDLFactory``), with no request handler '''
+
+        def __init__( self ) -> None:
+            self.handlers = {}
+            self.logger = None
+
+        def send( self, request: Any ) -> NoReturn:
+            raise yt_dlp.utils.DownloadError( f"Unable to open {request.url}: the fake backend makes no network request" )
+
+        def close( self ) -> None:
+            self.handlers.clear()
+
+    @functools.cached_property
+    def _request_director( self ) -> 'FakeYoutubeDL.FakeRequestDirector':
+        return FakeYoutubeDL.FakeRequestDirector()
+
+    def urlopen( self, req: Any ) -> NoReturn:
+        ''' For ``Governor.install``: the fake backend serves no URL, so requests fail like unreachable hosts '''
+        raise yt_dlp.utils.DownloadError( f"Unable to open {getattr(req, 'url', req)}: the fake backend makes no network request" )
+
+    def close( self ) -> None:
+        ''' For ``YDLFactory.make`` '''
+
+    @staticmethod
+    def archive_id( entry: dict ) -> str:
+        ''' Download archive ID of an entry '''
+        return f"fake {entry['id']}"
+
+    def in_download_archive( self, info_dict: dict ) -> bool:
+        ''' Returns True if entry was downloaded before '''
+        archive = self.params.get('download_archive')
+        return archive is not None and FakeYoutubeDL.archive_id(info_dict) in archive
+
+    def selected_items( self, url: str ) -> Iterator[Tuple[int,dict]]:
+        ''' Yields ( <playlist_index>, <entry> ) selected by options, like YoutubeDL would '''
+        entries = self.library.playlists[url]['entries']
+        if self.params.get('playlist_items'):
+            indexes = IndexRanges.parse( self.params['playlist_items'] )
+        else:
+            indexes = range( self.params.get('playliststart', 1), min( self.params.get('playlistend') or len(entries), len(entries) ) + 1 )
+        for idx in indexes:
+            if idx > len(entries):
+                break
+            yield idx, entries[idx-1]
+
+    def download( self, urls: List[str] ) -> None:
+        ''' "Downloads" selected items: writes dummy files and calls hooks '''
+        merge = '+' in self.params.get('format', '')
+        home = Path( self.params['paths']['home'] )
+        match_filter = self.params.get('match_filter') or ( lambda info_dict, incomplete: None )
+        time.sleep( self.library.invocation_latency )
+        for url in urls:
+            try:
+                infos = self.library.extract(url)
+            except yt_dlp.utils.ExtractorError:
+                if not self.params.get('ignoreerrors'):
+                    raise
+                continue
+            for idx, entry in self.selected_items(url):
+                info_dict = {
+                    'id': entry['id'],
+                    'title': entry['title'],
+                    'upload_date': entry['upload_date'],
+                    'channel': infos['channel'],
+                    'playlist_id': infos['id'],
+                    'playlist_webpage_url': url,
+                    'playlist_index': idx,
+                    'ext': 'mp4' if merge else 'm4a',
+                    'filesize': len(FakeYoutubeDL.DUMMY_CONTENT)
+                }
+                # like YoutubeDL, entries in download archive are skipped before the match filter
+                if self.in_download_archive( info_dict ) or match_filter( info_dict, incomplete=False ) is not None:
+                    continue
+                time.sleep( self.library.item_latency )
+                outtmpl = self.params['outtmpl']['default']
+                d = entry['upload_date']
+                filename = home / ( outtmpl.replace( '%(upload_date>%Y-%m-%d)s', f"{d[:4]}-{d[4:6]}-{d[6:]}" ) % info_dict )
+                info_dict['_filename'] = str(filename)
+                for hook in self._progress_hooks:
+                    hook({ 'status': 'downloading', 'filename': str(filename), 'info_dict': info_dict, 'downloaded_bytes': 0 })
+                if entry['fails']:
+                    for hook in self._progress_hooks:
+                        hook({ 'status': 'error', 'filename': str(filename), 'info_dict': info_dict })
+                    continue
+                filename.parent.mkdir(parents=True, exist_ok=True)
+                filename.write_bytes( FakeYoutubeDL.DUMMY_CONTENT )
+                for hook in self._progress_hooks:
+                    hook({ 'status': 'finished', 'filename': str(filename), 'info_dict': info_dict, 'total_bytes': len(FakeYoutubeDL.DUMMY_CONTENT), 'elapsed': self.library.item_latency })
+                for postprocessor in ( ('Merger', 'MoveFiles') if merge else ('MoveFiles',) ):
+                    for status in ('started', 'finished'):
+                        for hook in self._postprocessor_hooks:
+                            hook({ 'status': status, 'postprocessor': postprocessor, 'info_dict': info_dict })
+                for hook in self._post_hooks:
+                    hook( str(filename) )
+                if self.params.get('download_archive') is not None:
+                    self.params['download_archive'].add( FakeYoutubeDL.archive_id(entry) )
+                if self.library.interrupt_after is not None:
+                    self.library.interrupt_after -= 1
+                    if self.library.interrupt_after <= 0:
+                        raise KeyboardInterrupt
+
+
+@contextlib.contextmanager
+def fake_backend( library: FakeLibrary, work_dir: Path ) -> Iterator[None]:
+    ''' Swaps ``YoutubeDL`` for ``FakeYoutubeDL`` serving ``library``, and the content index for one in ``work_dir`` '''
+    aydl.import_yt_dlp() # not to be imported over the fake later
+    aydl.YDL_FACTORY.close() # the registry of extractors is made again, of fake ones
+    FakeYoutubeDL.library = library
+    real_YoutubeDL, aydl.YoutubeDL = aydl.YoutubeDL, FakeYoutubeDL
+    real_content_index, aydl.CONTENT_INDEX = aydl.CONTENT_INDEX, aydl.ContentIndex( work_dir / 'content.sqlite' )
+    try:
+        yield
+    finally:
+        aydl.YDL_FACTORY.close()
+        aydl.YoutubeDL = real_YoutubeDL
+        aydl.CONTENT_INDEX.close()
+        aydl.CONTENT_INDEX = real_content_index
+
+
+def offline_run( cfg: dict ) -> dict:
+    ''' Runs ``process_surveiled_paths`` with config ``cfg`` (within ``fake_backend``), with stdout
+    discarded; returns the counters of its metrics '''
+    aydl.SETTINGS.update(cfg)
+    aydl.METRICS.drain()
+    with open(os.devnull, 'w', encoding='utf8') as devnull, contextlib.redirect_stdout(devnull):
+        aydl.process_surveiled_paths(cfg)
+    return aydl.METRICS.summary()['counters']
+
+
+@contextlib.contextmanager
+def serve_test_media( size: int, segments: int, rate: int, burst: int, latency: float ) -> Iterator[str]:
+    ''' Serves random test media on localhost, as a stand-in for video hosts (see ``benchmarks.profiles``);
+    yields the server's base URL. ``/video.mp4`` is a single file of ``size`` bytes (HTTP ranges
+    are supported), ``/video.mpd`` a DASH manifest of the same content in ``segments`` fragments.
+    Like video hosts, each response is throttled to ``rate`` bytes per second once ``burst`` bytes
+    were sent, and each request waits ``latency`` seconds before being answered.
+    '''
+    import http.server
+
+    content = os.urandom(size)
+    bounds = [ size * i // segments for i in range(segments + 1) ]
+    manifest = (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<MPD xmlns="urn:mpeg:dash:schema:mpd:2011" type="static" profiles="urn:mpeg:dash:profile:isoff-on-demand:2011" '
+        f'mediaPresentationDuration="PT{2 * segments}S" minBufferTime="PT2S">\n'
+        '<Period><AdaptationSet mimeType="video/mp4">\n'
+        '<Representation id="video" bandwidth="1000000" codecs="avc1.4d401f,mp4a.40.2" width="640" height="360">\n'
+        '<SegmentList timescale="1" duration="2">\n'
+        + ''.join( f'<SegmentURL media="seg/{i}"/>\n' for i in range(segments) ) +
+        '</SegmentList></Representation></AdaptationSet></Period></MPD>\n'
+    ).encode('utf8')
+
+    class Handler( http.server.BaseHTTPRequestHandler ):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message( self, *args ) -> None:
+            pass
+
+        def resource( self ) -> Optional[Tuple[bytes,str]]:
+            if self.path=='/video.mp4':
+                return content, 'video/mp4'
+            if self.path=='/video.mpd':
+                return manifest, 'application/dash+xml'
+            if self.path.startswith('/seg/') and self.path[5:].isdigit() and int(self.path[5:]) < segments:
+                i = int(self.path[5:])
+                return content[bounds[i]:bounds[i+1]], 'video/mp4'
+            return None
+
+        def answer( self, send_body: bool ) -> None:
+            time.sleep(latency)
+            res = self.resource()
+            if res is None:
+                self.send_error(404)
+                return
+            body, content_type = res
+            start, end = 0, len(body) - 1
+            match = re.fullmatch( r'bytes=(\d+)-(\d*)', self.headers.get('Range', '') )
+            if match:
+                start, end = int(match[1]), min( end, int(match[2]) if match[2] else end )
+            self.send_response( 206 if match else 200 )
+            self.send_header( 'Content-Type', content_type )
+            self.send_header( 'Content-Length', str(end - start + 1) )
+            self.send_header( 'Accept-Ranges', 'bytes' )
+            if match:
+                self.send_header( 'Content-Range', f"bytes {start}-{end}/{len(body)}" )
+            self.end_headers()
+            if not send_body:
+                return
+            t_start, sent = time.monotonic(), 0
+            try:
+                while start + sent <= end:
+                    block = body[start + sent:min( end + 1, start + sent + 65536 )]
+                    self.wfile.write( block )
+                    sent += len(block)
+                    if sent > burst:
+                        time.sleep( max( 0.0, (sent - burst) / rate - (time.monotonic() - t_start) ) )
+            except ConnectionError:
+                pass # client gave up on the connection
+
+        def do_GET( self ) -> None:
+            self.answer( send_body=True )
+
+        def do_HEAD( self ) -> None:
+            self.answer( send_body=False )
+
+    server = http.server.ThreadingHTTPServer( ('127.0.0.1', 0), Handler )
+    server.daemon_threads = True
+    thread = threading.Thread( target=server.serve_forever, name='TestMediaServer', daemon=True )
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
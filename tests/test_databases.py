@@ -0,0 +1,67 @@
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import AutoYoutubeDL as aydl
+from AutoYoutubeDL import ContentIndex, PlaylistStateStore, connect_db, open_job_queue, open_metadata_cache
+
+
+def test_journal_mode_waits_for_database_in_use( tmp_path ):
+    db_file = tmp_path / 'db.sqlite'
+    reader = sqlite3.connect( db_file.as_posix(), isolation_level=None, check_same_thread=False )
+    reader.execute( "CREATE TABLE t (x)" )
+    reader.execute( "BEGIN" )
+    reader.execute( "SELECT * FROM t" ).fetchall() # switching journal mode fails while this transaction is open
+    timer = threading.Timer( 0.3, reader.execute, ("COMMIT",) )
+    timer.start()
+    try:
+        t_start = time.monotonic()
+        con = connect_db( db_file )
+        assert time.monotonic() - t_start >= 0.2
+        assert con.execute( "PRAGMA journal_mode" ).fetchone()[0]=='wal'
+        con.close()
+    finally:
+        timer.join()
+        reader.close()
+
+
+def open_databases( work_dir ):
+    # runner opening shared databases, then writing to them
+    for _ in range(20):
+        store = PlaylistStateStore( work_dir / 'state.sqlite' )
+        store.update( 'url', done=[1] )
+        store.close()
+        index = ContentIndex( work_dir / 'content.sqlite' )
+        index.con.execute( "SELECT COUNT(*) FROM content" ).fetchone()
+        index.close()
+
+
+def test_concurrent_runners_open_new_databases( tmp_path ):
+    with ProcessPoolExecutor( max_workers=6 ) as executor:
+        for future in [ executor.submit( open_databases, tmp_path ) for _ in range(6) ]:
+            future.result()
+    for db_file in ( tmp_path / 'state.sqlite', tmp_path / 'content.sqlite' ):
+        con = sqlite3.connect( db_file.as_posix() )
+        assert con.execute( "PRAGMA journal_mode" ).fetchone()[0]=='wal'
+        con.close()
+
+
+def test_runners_use_rollback_journal( tmp_path, monkeypatch ):
+    store = PlaylistStateStore( tmp_path / 'state.sqlite' ) # created by an instance started without --runner
+    store.close()
+    monkeypatch.setattr( aydl, 'DB_JOURNAL_MODE', aydl.DB_JOURNAL_MODE ) # restored after the test
+    open_job_queue( dict( job_queue=( tmp_path / 'queue.sqlite' ).as_posix(), lease_duration=30 ) ).close()
+    cache = open_metadata_cache( tmp_path )
+    try:
+        assert cache.con.execute( "PRAGMA journal_mode" ).fetchone()[0]=='truncate'
+    finally:
+        cache.close()
+    store = PlaylistStateStore( tmp_path / 'state.sqlite' )
+    try:
+        assert store.con.execute( "PRAGMA journal_mode" ).fetchone()[0]=='truncate'
+        store.update( 'url', done=[1] )
+        assert str(store.get('url')['done'])=='1'
+    finally:
+        store.close()
+    assert not ( tmp_path / 'state.sqlite-wal' ).exists()
@@ -0,0 +1,37 @@
+import json
+import threading
+import time
+
+import AutoYoutubeDL as aydl
+from AutoYoutubeDL import DEFAULT_SETTINGS, DiskBudget
+
+
+def test_counting_files_holds_up_no_other_worker( tmp_path, monkeypatch ):
+    aydl.import_yt_dlp()
+    slow_user, other_user = tmp_path / 'slow', tmp_path / 'other'
+    slow_user.mkdir()
+    other_user.mkdir()
+    budget = DiskBudget()
+    budget.configure( dict( DEFAULT_SETTINGS, min_free_space='0', user_quota=json.dumps({ slow_user.as_posix(): '1G', other_user.as_posix(): '1G' }) ) )
+    counting, done = threading.Event(), threading.Event()
+
+    def count_usage( user ):
+        # eg: a large library on a slow volume
+        if user==slow_user:
+            counting.set()
+            done.wait( 5 )
+        return 0
+
+    monkeypatch.setattr( DiskBudget, 'count_usage', staticmethod(count_usage) )
+    worker = threading.Thread( target=budget.admit, args=( 'slow', slow_user, 1024 ) )
+    worker.start()
+    try:
+        assert counting.wait( 5 )
+        t_start = time.monotonic()
+        assert budget.admit( 'other', other_user, 1024 ) is None
+        assert budget.exhausted( other_user ) is None
+        assert time.monotonic() - t_start < 1
+    finally:
+        done.set()
+        worker.join()
+    assert budget.admit( 'slow', slow_user, 2 * 1024**3 ) is not None
@@ -0,0 +1,59 @@
+import random
+
+import pytest
+
+from AutoYoutubeDL import IndexRanges
+
+
+@pytest.mark.parametrize( 's', ['', '5', '1-3', '1-1200,1205,1300-4999'] )
+def test_str_roundtrip( s ):
+    assert str(IndexRanges.parse(s))==s
+
+
+def test_adjacent_and_overlapping_ranges_merge():
+    ranges = IndexRanges([1, 2, 3, 7])
+    ranges.add_range( 4, 5 )
+    ranges.add_range( 9, 12 )
+    ranges.add_range( 6, 9 )
+    assert list(ranges.ranges())==[(1, 12)]
+    assert IndexRanges.parse('3-5,1-2')==IndexRanges.parse('1-5')
+
+
+def test_empty_range_is_ignored():
+    ranges = IndexRanges()
+    ranges.add_range( 5, 4 )
+    assert not ranges and str(ranges)==''
+
+
+def test_complement():
+    ranges = IndexRanges.parse('3-5,8,10-12')
+    assert str(ranges.complement( 1, 12 ))=='1-2,6-7,9'
+    assert str(ranges.complement( 4, 9 ))=='6-7,9'
+    assert str(ranges.complement( 1, 20 ))=='1-2,6-7,9,13-20'
+    assert str(IndexRanges().complement( 1, 3 ))=='1-3'
+    assert not ranges.complement( 10, 12 )
+
+
+def test_update_from_ranges():
+    ranges = IndexRanges.parse('1-3')
+    ranges.update( IndexRanges.parse('5-6,4') )
+    assert str(ranges)=='1-6'
+
+
+@pytest.mark.parametrize( 'seed', range(20) )
+def test_matches_set( seed ):
+    rng = random.Random(seed)
+    items = set()
+    ranges = IndexRanges()
+    for _ in range(50):
+        start = rng.randint(1, 200)
+        end = start + rng.randint(-1, 10)
+        ranges.add_range( start, end )
+        items.update( range(start, end + 1) )
+    assert list(ranges)==sorted(items)
+    assert len(ranges)==len(items)
+    assert all( (x in ranges)==(x in items) for x in range(0, 220) )
+    assert set(ranges.complement( 1, 220 ))==set(range(1, 221)) - items
+    assert IndexRanges.parse(str(ranges))==ranges
+    starts, ends = zip( *ranges.ranges() )
+    assert all( start > end + 1 for start, end in zip(starts[1:], ends) ), "ranges must be disjoint and non-adjacent"
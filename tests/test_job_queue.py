@@ -0,0 +1,77 @@
+import time
+
+import pytest
+
+from AutoYoutubeDL import JobQueue, PlaylistJob
+
+LEASE = 0.3
+
+
+@pytest.fixture
+def queue_file( tmp_path ):
+    queue = JobQueue( tmp_path / 'queue.sqlite', lease_duration=LEASE )
+    queue.plan( lambda: { tmp_path: [ PlaylistJob( 'url1', None, tmp_path, None ) ] } )
+    queue.close()
+    return tmp_path / 'queue.sqlite'
+
+
+def stopped_runner( queue_file ):
+    ''' Claims a job like a runner that stops right after (its leases aren't renewed) '''
+    runner = JobQueue( queue_file, lease_duration=LEASE )
+    claimed = runner.claim()
+    runner.close()
+    return claimed
+
+
+def test_live_lease_is_renewed( queue_file ):
+    runner1, runner2 = JobQueue( queue_file, lease_duration=LEASE ), JobQueue( queue_file, lease_duration=LEASE )
+    try:
+        user, url, *_ = runner1.claim()
+        time.sleep( 2 * LEASE )
+        assert runner2.claim() is None
+        assert runner1.complete( user, url )==[]
+        assert runner1.pending()==0
+    finally:
+        runner1.close()
+        runner2.close()
+
+
+def test_expired_lease_is_taken_over( queue_file ):
+    user, url, *_ = stopped_runner( queue_file )
+    runner = JobQueue( queue_file, lease_duration=LEASE )
+    try:
+        assert runner.claim() is None # lease not expired yet
+        time.sleep( LEASE )
+        assert runner.pending()==1
+        assert runner.claim()[:2]==(user, url)
+        state, owner, attempts = runner.con.execute( "SELECT state, owner, attempts FROM job" ).fetchone()
+        assert (state, owner, attempts)==('leased', runner.runner_id, 2)
+    finally:
+        runner.close()
+
+
+def test_late_runner_does_not_complete_job( queue_file ):
+    runner1 = JobQueue( queue_file, lease_duration=LEASE )
+    runner1._stop.set() # heartbeat stops at once
+    user, url, *_ = runner1.claim()
+    time.sleep( LEASE )
+    runner2 = JobQueue( queue_file, lease_duration=LEASE )
+    try:
+        assert runner2.claim() is not None
+        assert runner1.complete( user, url ) is None
+        assert runner2.complete( user, url )==[]
+    finally:
+        runner1.close()
+        runner2.close()
+
+
+def test_job_given_up_after_max_attempts( queue_file ):
+    for _ in range( JobQueue.MAX_ATTEMPTS ):
+        assert stopped_runner( queue_file ) is not None
+        time.sleep( LEASE )
+    runner = JobQueue( queue_file, lease_duration=LEASE )
+    try:
+        assert runner.claim() is None
+        assert runner.con.execute( "SELECT state, attempts FROM job" ).fetchone()==('failed', JobQueue.MAX_ATTEMPTS)
+    finally:
+        runner.close()
@@ -0,0 +1,74 @@
+import json
+
+import pytest
+
+import AutoYoutubeDL as aydl
+
+from AutoYoutubeDL import IndexRanges, JobJournal, PlaylistStateStore, journal_for, resume_interrupted_jobs, work_is_due
+from tests.fakes import offline_run
+
+SUMMARY = { 'title': 'Playlist', 'len': 5, 'is_channel': False, 'latest_video_id': None, 'infos': { 'id': 'PL', 'title': 'Playlist', 'channel': 'Channel' } }
+
+
+def test_replay( tmp_path ):
+    journal = JobJournal( tmp_path / 'journal.jsonl' )
+    journal.record( 'url1', 'probed', summary=SUMMARY )
+    journal.record( 'url1', 'planned', items='1-5', format='best' )
+    for idx in (1, 2, 4):
+        journal.record( 'url1', 'downloading', index=idx )
+        journal.record( 'url1', 'moved', index=idx )
+    journal.record( 'url2', 'probed', summary=SUMMARY )
+    journal.record( 'url2', 'committed' )
+    journal.close()
+    with journal.journal_file.open('a', encoding='utf8') as f:
+        f.write('{"t": 1, "url": "url3"') # interrupted while writing
+
+    jobs = journal.replay()
+    assert list(jobs)==['url1']
+    assert jobs['url1']['summary']==SUMMARY
+    assert jobs['url1']['planned']['items']=='1-5'
+    assert jobs['url1']['moved']==IndexRanges([1, 2, 4])
+
+
+def test_resume_commits_moved_items( tmp_path ):
+    journal = JobJournal( tmp_path / 'journal.jsonl' )
+    store = PlaylistStateStore( tmp_path / 'state.sqlite' )
+    journal.record( 'url1', 'probed', summary=SUMMARY )
+    for idx in (1, 2, 4):
+        journal.record( 'url1', 'moved', index=idx )
+    journal.record( 'url2', 'downloading', index=1 ) # never probed: nothing to resume from
+
+    assert resume_interrupted_jobs( journal, store )=={ 'url1': SUMMARY }
+    assert str(store.get('url1')['done'])=='1-2,4'
+    assert store.get('url2') is None
+    # the journal is restarted with probe summaries only: another interruption resumes the same jobs
+    journal.close()
+    events = [ json.loads(line) for line in journal.journal_file.read_text(encoding='utf8').splitlines() ]
+    assert [ (e['url'], e['event']) for e in events ]==[('url1', 'probed')]
+    store.close()
+
+
+def test_interrupted_run_resumes( offline_user ):
+    library, cfg = offline_user( 5, playlist_size=5, channel_ratio=0.0 )
+    user_dir = cfg['surveiled_path'][0]
+    url = next(iter(library.playlists))
+    cfg.update( cache_ttl_hot=0, adaptive_polling=False ) # probe every run
+    offline_run(cfg)
+    library.upload( 1.0 )
+    library.interrupt_after = 3
+    with pytest.raises( KeyboardInterrupt ):
+        offline_run(cfg)
+    assert str(journal_for(user_dir).replay()[url]['moved'])=='6-8'
+
+    # the next run resumes from the journal: it doesn't probe again, and downloads what is left
+    library.interrupt_after = None
+    assert work_is_due(cfg)
+    counters = offline_run(cfg)
+    assert counters['videos_downloaded']==2
+    assert 'probe' not in aydl.METRICS.summary()['phases']
+    store = PlaylistStateStore( user_dir / 'AutoYoutubeDL.sqlite' )
+    try:
+        assert str(store.get(url)['done'])=='1-10'
+    finally:
+        store.close()
+    assert not (user_dir / 'AutoYoutubeDL.journal.jsonl').exists()
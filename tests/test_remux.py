@@ -0,0 +1,50 @@
+import os
+import stat
+import sys
+
+import pytest
+
+from AutoYoutubeDL import mux_mp4
+
+# Stand-in for ffmpeg: like ffmpeg run without a tty, it refuses to overwrite its output without
+# -y; it writes a partial output file, then fails if $FAKE_FFMPEG_FAIL is set
+FAKE_FFMPEG = f'''#!{sys.executable}
+import os, sys
+output = sys.argv[-1]
+if os.path.exists(output) and '-y' not in sys.argv:
+    sys.exit(1)
+with open(output, 'wb') as f:
+    f.write(b'muxed')
+sys.exit(1 if os.environ.get('FAKE_FFMPEG_FAIL') else 0)
+'''
+
+
+@pytest.fixture
+def streams( tmp_path, monkeypatch ):
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    (bin_dir / 'ffmpeg').write_text( FAKE_FFMPEG, encoding='utf8' )
+    (bin_dir / 'ffmpeg').chmod( stat.S_IRWXU )
+    monkeypatch.setenv( 'PATH', str(bin_dir) )
+    video, audio = tmp_path / 'video.mp4', tmp_path / 'video.m4a'
+    video.write_bytes(b'video')
+    audio.write_bytes(b'audio')
+    return video, audio
+
+
+@pytest.mark.skipif( os.name=='nt', reason="stand-in ffmpeg is a script" )
+def test_failed_mux_removes_partial_output( streams, tmp_path, monkeypatch ):
+    video, audio = streams
+    destination = tmp_path / 'muxed.mp4'
+    monkeypatch.setenv( 'FAKE_FFMPEG_FAIL', '1' )
+    with pytest.raises( RuntimeError ):
+        mux_mp4( destination, video, audio )
+    assert not destination.exists()
+    assert video.exists() and audio.exists()
+
+    # retry overwrites what a previous attempt left (eg: killed along with this script)
+    monkeypatch.delenv( 'FAKE_FFMPEG_FAIL' )
+    destination.write_bytes(b'partial')
+    mux_mp4( destination, video, audio )
+    assert destination.read_bytes()==b'muxed'
+    assert not video.exists() and not audio.exists()
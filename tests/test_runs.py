@@ -0,0 +1,210 @@
+import datetime
+import sqlite3
+import threading
+
+import pytest
+
+import AutoYoutubeDL as aydl
+from AutoYoutubeDL import DISK_BUDGET, DiskBudget, PlaylistStateStore, open_metadata_cache, work_is_due
+from tests.fakes import FakeYoutubeDL, offline_run
+
+
+def expire_cache( cfg ):
+    ''' Expires cached probe summaries: playlists/channels are probed by the next run '''
+    cache = open_metadata_cache( cfg['surveiled_path'][0] )
+    with cache.con:
+        cache.con.execute( "UPDATE metadata SET expires_at=0" )
+    cache.close()
+
+
+def stored_state( cfg, url ):
+    store = PlaylistStateStore( cfg['surveiled_path'][0] / 'AutoYoutubeDL.sqlite' )
+    try:
+        return store.get(url)
+    finally:
+        store.close()
+
+
+@pytest.mark.parametrize( 'channel_ratio', [0.0, 1.0], ids=['playlists', 'channels'] )
+def test_nothing_to_do_after_complete_run( offline_user, channel_ratio ):
+    library, cfg = offline_user( 20, playlist_size=5, channel_ratio=channel_ratio )
+    assert work_is_due(cfg)
+    counters = offline_run(cfg)
+    assert counters['videos_downloaded']==20
+
+    assert not work_is_due(cfg)
+    counters = offline_run(cfg)
+    assert counters.get('ydl_invocations', 0)==0
+    assert counters.get('playlists_skipped', 0)==len(library.playlists)
+
+
+def test_checking_whether_work_is_due_writes_nothing( offline_user ):
+    library, cfg = offline_user( 5, playlist_size=5, channel_ratio=0.0 )
+    surveiled_path_p = cfg['surveiled_path'][0]
+    dbs = [ surveiled_path_p / 'AutoYoutubeDL.sqlite', surveiled_path_p / 'AutoYoutubeDL.cache.sqlite' ]
+    assert work_is_due(cfg)
+    assert not any( db_file.exists() for db_file in dbs )
+
+    offline_run(cfg)
+    # a run holding the databases doesn't hold up the check
+    writers = [ sqlite3.connect( db_file.as_posix() ) for db_file in dbs ]
+    for con in writers:
+        con.execute( "BEGIN IMMEDIATE" )
+    due = []
+    check = threading.Thread( target=lambda: due.append( work_is_due(cfg) ) )
+    check.start()
+    check.join( timeout=5 )
+    held_up = check.is_alive()
+    for con in writers:
+        con.rollback()
+        con.close()
+    check.join()
+    assert not held_up
+    assert due==[False]
+
+
+def test_outdated_state_store_is_due( offline_user ):
+    library, cfg = offline_user( 5, playlist_size=5, channel_ratio=0.0 )
+    offline_run(cfg)
+    store = PlaylistStateStore( cfg['surveiled_path'][0] / 'AutoYoutubeDL.sqlite' )
+    store.con.execute( "PRAGMA user_version=5" )
+    store.close()
+    assert work_is_due(cfg)
+    offline_run(cfg)
+    assert not work_is_due(cfg)
+
+
+def test_new_uploads_are_due_once_cache_expires( offline_user ):
+    library, cfg = offline_user( 10, playlist_size=5, channel_ratio=0.0 )
+    offline_run(cfg)
+    library.upload( 0.2 )
+    assert not work_is_due(cfg) # cached infos are fresh
+    expire_cache(cfg)
+    assert work_is_due(cfg)
+    assert offline_run(cfg)['videos_downloaded']==2
+
+
+def test_nothing_to_do_after_insertion_at_head( offline_user ):
+    library, cfg = offline_user( 5, playlist_size=5, channel_ratio=0.0 )
+    url = next(iter(library.playlists))
+    offline_run(cfg)
+    # eg: a playlist sorted newest first; the items downloaded so far move to indexes 2-6
+    library.add_items( url, 1, datetime.date.today(), at_head=True )
+    expire_cache(cfg)
+    assert offline_run(cfg)['videos_downloaded']==1
+    assert str(stored_state( cfg, url )['done'])=='1-6'
+
+    assert not work_is_due(cfg)
+    assert offline_run(cfg).get('ydl_invocations', 0)==0
+
+
+def test_failed_item_is_retried_once_cache_expires( offline_user ):
+    library, cfg = offline_user( 5, playlist_size=5, channel_ratio=0.0 )
+    url = next(iter(library.playlists))
+    library.playlists[url]['entries'][2]['fails'] = True # eg: unavailable video
+    assert offline_run(cfg)['videos_downloaded']==4
+    assert str(stored_state( cfg, url )['done'])=='1-2,4-5'
+    assert not work_is_due(cfg)
+    assert offline_run(cfg).get('ydl_invocations', 0)==0
+
+    library.playlists[url]['entries'][2]['fails'] = False
+    expire_cache(cfg)
+    assert offline_run(cfg)['videos_downloaded']==1
+    assert str(stored_state( cfg, url )['done'])=='1-5'
+
+
+def test_quota_defers_downloads( offline_user, settings ):
+    library, cfg = offline_user( 6, playlist_size=3, channel_ratio=0.0 )
+    user_dir = cfg['surveiled_path'][0]
+    cfg['user_quota'] = '1' # less than the playlist file
+    counters = offline_run(cfg)
+    assert counters.get('videos_downloaded', 0)==0
+    assert not list( user_dir.rglob('*.mp4') )
+    store = PlaylistStateStore( user_dir / 'AutoYoutubeDL.sqlite' )
+    try:
+        assert store.deferred()=={ url: (3, 3 * 1024) for url in library.playlists }
+    finally:
+        store.close()
+    assert work_is_due(cfg)
+
+    cfg['user_quota'] = '0'
+    counters = offline_run(cfg)
+    assert counters['videos_downloaded']==6
+    assert len( list( user_dir.rglob('*.mp4') ) )==6
+    store = PlaylistStateStore( user_dir / 'AutoYoutubeDL.sqlite' )
+    try:
+        assert store.deferred()=={}
+    finally:
+        store.close()
+    assert not work_is_due(cfg)
+
+
+def test_quota_usage_tracked_without_rescanning( offline_user, monkeypatch ):
+    library, cfg = offline_user( 6, playlist_size=3, channel_ratio=0.0 )
+    user_dir = cfg['surveiled_path'][0]
+    cfg['user_quota'] = '1G'
+    offline_run(cfg)
+    def files_size():
+        return sum( f.stat().st_size for f in user_dir.rglob('*') if f.is_file() )
+    store = PlaylistStateStore( user_dir / 'AutoYoutubeDL.sqlite' )
+    try:
+        size, counted_at = store.disk_usage()
+    finally:
+        store.close()
+    # counted before the first run, then downloaded videos were added
+    assert 0 < size < files_size()
+    assert size >= 6 * 1024
+
+    # new uploads: downloaded files are added to the stored size, files aren't counted again
+    for url in library.playlists:
+        library.add_items( url, 1, datetime.date.today(), at_head=True )
+    expire_cache(cfg)
+    counted = []
+    monkeypatch.setattr( DiskBudget, 'count_usage', staticmethod( lambda user: counted.append(user) or 0 ) )
+    assert offline_run(cfg)['videos_downloaded']==2
+    assert counted==[]
+    store = PlaylistStateStore( user_dir / 'AutoYoutubeDL.sqlite' )
+    try:
+        assert store.disk_usage()==( size + 2 * 1024, counted_at )
+    finally:
+        store.close()
+
+    # files are counted again on demand, or once the stored size is too old
+    for rescan, interval in ( (True, 7), (False, 0) ):
+        DISK_BUDGET.rescan = rescan
+        cfg['quota_rescan_interval'] = interval
+        offline_run(cfg)
+        assert counted==[user_dir]
+        counted.clear()
+
+
+@pytest.mark.parametrize( 'stop', ['deferred', 'interrupted'] )
+def test_pending_channel_only_goes_through_new_items( offline_user, monkeypatch, stop ):
+    library, cfg = offline_user( 20, playlist_size=20, channel_ratio=1.0 )
+    url = next(iter(library.playlists))
+    offline_run(cfg)
+    library.add_items( url, 3, datetime.date.today() )
+    expire_cache(cfg)
+    # new videos are found by a probe, then not downloaded by that run
+    if stop=='deferred':
+        cfg['user_quota'] = '1'
+        assert offline_run(cfg).get('videos_downloaded', 0)==0
+        cfg['user_quota'] = '0'
+    else:
+        library.interrupt_after = 1
+        with pytest.raises( KeyboardInterrupt ):
+            offline_run(cfg)
+        library.interrupt_after = None
+
+    # the next run uses the probe's summary (cached, or from the journal)
+    selections = []
+    download = FakeYoutubeDL.download
+    def spy( ydl, urls ):
+        selections.append( { k: ydl.params[k] for k in ('playliststart', 'playlistend', 'playlist_items') if k in ydl.params } )
+        return download( ydl, urls )
+    monkeypatch.setattr( FakeYoutubeDL, 'download', spy )
+    counters = offline_run(cfg)
+    assert 'probe' not in aydl.METRICS.summary()['phases']
+    assert selections==[ { 'playlistend': 3 } ]
+    assert counters['videos_downloaded']==( 3 if stop=='deferred' else 2 )
+    assert stored_state( cfg, url )['last_video_id']==library.playlists[url]['entries'][0]['id']
@@ -0,0 +1,47 @@
+import logging
+import multiprocessing
+
+import AutoYoutubeDL as aydl
+
+
+def probe( job: aydl.PlaylistJob ) -> dict:
+    return dict( status='pending' )
+
+
+def worker_config( job: aydl.PlaylistJob ) -> dict:
+    aydl.LOG.info("Configured worker")
+    return dict(
+        yt_dlp='yt_dlp' in vars(aydl),
+        max_bandwidth=aydl.SETTINGS['max_bandwidth'],
+        share=aydl.GOVERNOR.share,
+        disk_usage=aydl.DISK_BUDGET.usage(),
+        progress_to_file=aydl.PROGRESS_TO_FILE,
+        db_journal_mode=aydl.DB_JOURNAL_MODE
+    )
+
+
+def test_spawned_worker_processes_get_configuration( tmp_path, monkeypatch ):
+    monkeypatch.setitem( aydl.SETTINGS, 'max_bandwidth', '1M' )
+    monkeypatch.setattr( aydl.GOVERNOR, 'share', 0.5 )
+    monkeypatch.setattr( aydl.DISK_BUDGET, '_used', { tmp_path.as_posix(): 123 } )
+    monkeypatch.setattr( aydl, 'PROGRESS_TO_FILE', True )
+    monkeypatch.setattr( aydl, 'DB_JOURNAL_MODE', 'truncate' )
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    monkeypatch.setattr( aydl.log_listener, 'handlers', aydl.log_listener.handlers + (handler,) )
+
+    # spawned processes don't inherit anything from this one
+    start_method = multiprocessing.get_start_method()
+    multiprocessing.set_start_method( 'spawn', force=True )
+    try:
+        scheduler = aydl.PlaylistScheduler( workers=1, worker_type='process' )
+        scheduler.add_jobs( tmp_path, [ aydl.PlaylistJob( 'https://example.com/playlist', None, tmp_path, None ) ] )
+        (( _, config ),) = scheduler.run( worker=worker_config, prober=probe )
+    finally:
+        multiprocessing.set_start_method( start_method, force=True )
+    aydl.log_listener.stop() # writes records left in the queue
+    aydl.log_listener.start()
+
+    assert config==dict( yt_dlp=True, max_bandwidth='1M', share=0.5, disk_usage={ tmp_path.as_posix(): 123 }, progress_to_file=True, db_journal_mode='truncate' )
+    assert [ record.user for record in records if record.getMessage()=="Configured worker" ]==[ tmp_path.as_posix() ]
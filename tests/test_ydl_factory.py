@@ -0,0 +1,87 @@
+import time
+
+import pytest
+
+import AutoYoutubeDL as aydl
+from AutoYoutubeDL import DEFAULT_SETTINGS, GOVERNOR, YDLFactory
+from tests.fakes import serve_test_media
+
+
+def test_jobs_get_their_own_options():
+    aydl.import_yt_dlp()
+    factory = YDLFactory()
+    with factory.make( { 'quiet': True, 'socket_timeout': 5, 'http_headers': { 'X-Job': '1' } } ) as ydl1:
+        handlers1 = list( ydl1._request_director.handlers.values() )
+    with factory.make( { 'quiet': True, 'socket_timeout': 20, 'proxy': 'http://127.0.0.1:3128' } ) as ydl2:
+        handlers2 = list( ydl2._request_director.handlers.values() )
+        assert 'X-Job' not in ydl2.params['http_headers']
+        assert ydl2._num_downloads==0 and not any( ydl2._pps.values() )
+    assert all( handler.timeout==5 for handler in handlers1 )
+    assert all( handler.timeout==20 and handler.proxies.get('all')=='http://127.0.0.1:3128' for handler in handlers2 )
+
+
+def test_extractor_registry_and_cookies_are_shared( tmp_path ):
+    aydl.import_yt_dlp()
+    factory = YDLFactory()
+    reference = aydl.YoutubeDL( { 'quiet': True } )
+    with factory.make( { 'quiet': True } ) as ydl1, factory.make( { 'quiet': True } ) as ydl2:
+        assert list(ydl2._ies)==list(reference._ies)
+        assert all( ydl2._ies[k] is ie for k, ie in reference._ies.items() if isinstance(ie, type) )
+        # extractor instances are bound to their own YoutubeDL
+        assert all( ie._downloader is ydl2 for ie in ydl2._ies_instances.values() )
+        assert ydl1.cookiejar is ydl2.cookiejar
+    with factory.make( { 'quiet': True, 'cookiefile': str(tmp_path / 'cookies.txt') } ) as ydl3:
+        assert ydl3.cookiejar is not ydl1.cookiejar
+    assert factory.created==3
+
+
+def test_bandwidth_limit_applies_to_downloads( tmp_path ):
+    aydl.import_yt_dlp()
+    factory = YDLFactory()
+    size, limit = 512 * 1024, 256 * 1024
+    GOVERNOR.configure( dict( DEFAULT_SETTINGS, max_bandwidth=str(limit) ) )
+    try:
+        with serve_test_media( size, segments=1, rate=100 * size, burst=size, latency=0.0 ) as base_url:
+            with factory.make( { 'quiet': True, 'noprogress': True, 'outtmpl': { 'default': f"{tmp_path}/%(id)s.%(ext)s" } } ) as ydl:
+                t_start = time.perf_counter()
+                assert ydl.download( [f"{base_url}/video.mp4"] )==0
+                elapsed = time.perf_counter() - t_start
+        assert sum( f.stat().st_size for f in tmp_path.iterdir() )==size
+        # the first second worth of bytes is a burst
+        assert elapsed >= ( size - limit ) / limit * 0.9
+    finally:
+        GOVERNOR.configure( DEFAULT_SETTINGS )
+    # whatever hooks a job registers (eg: none for audio passes)
+    with factory.make( { 'quiet': True } ) as ydl:
+        assert GOVERNOR.progress_hook in ydl._progress_hooks
+
+
+def test_request_handlers_are_shared_by_jobs_with_same_network_options():
+    aydl.import_yt_dlp()
+    factory = YDLFactory()
+    with factory.make( { 'quiet': True, 'socket_timeout': 5 } ) as ydl1:
+        director = ydl1._request_director
+    with factory.make( { 'quiet': True, 'socket_timeout': 5, 'format': 'bestaudio' } ) as ydl2, factory.make( { 'quiet': True, 'socket_timeout': 20 } ) as ydl3:
+        assert ydl2._request_director is director
+        assert ydl3._request_director is not director
+    # kept open for the next jobs, until the factory is closed
+    assert director.handlers
+    assert factory.directors_reused==1
+    factory.close()
+    assert not director.handlers
+
+
+def test_connections_are_kept_alive_between_jobs( tmp_path ):
+    pytest.importorskip( 'requests' ) # urllib (yt-dlp's fallback) opens a connection per request
+    aydl.import_yt_dlp()
+    factory = YDLFactory()
+    try:
+        with serve_test_media( 64 * 1024, segments=1, rate=1024**3, burst=1024**3, latency=0.0 ) as base_url:
+            for i in range(3):
+                with factory.make( { 'quiet': True, 'noprogress': True, 'outtmpl': { 'default': f"{tmp_path}/{i}.%(ext)s" } } ) as ydl:
+                    assert ydl.download( [f"{base_url}/video.mp4"] )==0
+    finally:
+        factory.close()
+    assert factory.directors_reused==2
+    # each job sends 2 requests (extraction, download), over connections kept alive by earlier ones
+    assert factory.requests_sent==6 and factory.connections_opened < 6